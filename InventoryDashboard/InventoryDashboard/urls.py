@@ -16,7 +16,8 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from InventoryManagementWebApp.views import Endpoints as views
+from InventoryManagementWebApp.views import Endpoints as views, AsyncEndpoints as async_views
+from InventoryManagementWebApp.api import ApiEndpoints as api, AsyncApiEndpoints as async_api
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,9 +26,30 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('select-operations/', views.select_operations, name='select_operations'),
     path('create-new-inventory-product/', views.create_new_inventory_product, name='create_new_inventory_product'),
+    path('bulk-import-inventory-products/', views.bulk_import_inventory_products, name='bulk_import_inventory_products'),
     path('read-inventory-products/', views.read_inventory_products, name='read_inventory_products'),
     path('read-inventory-product/', views.read_inventory_product, name='read_inventory_product'),
     path('update-inventory-product-location/', views.update_inventory_product_location, name='update_inventory_product_location'),
     path('update-inventory-product-quantity-on-pallet/', views.update_inventory_product_quantity_on_pallet, name='update_inventory_product_quantity_on_pallet'),
+    path('batch-update-inventory-products/', views.batch_update_inventory_products, name='batch_update_inventory_products'),
+    path('inventory-cache-statistics/', views.inventory_cache_statistics, name='inventory_cache_statistics'),
+    path('instrumentation-summary/', views.instrumentation_summary, name='instrumentation_summary'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('export-inventory-products/', views.export_inventory_products, name='export_inventory_products'),
+    path('export-transaction-history/', views.export_transaction_history, name='export_transaction_history'),
+    path('inventory-summary/', views.inventory_summary, name='inventory_summary'),
     path('delete-inventory-product/', views.delete_inventory_product, name='delete_inventory_product'),
+    path('async/read-inventory-products/', async_views.read_inventory_products, name='async_read_inventory_products'),
+    path('async/update-inventory-product-location/', async_views.update_inventory_product_location, name='async_update_inventory_product_location'),
+    path('async/update-inventory-product-quantity-on-pallet/', async_views.update_inventory_product_quantity_on_pallet, name='async_update_inventory_product_quantity_on_pallet'),
+    path('api/inventory-products/', api.inventory_products, name='api_inventory_products'),
+    path('api/inventory-products/<int:record_id>/', api.inventory_product, name='api_inventory_product'),
+    path('api/inventory-products/<int:record_id>/move/', api.move_inventory_product, name='api_move_inventory_product'),
+    path('api/inventory-products/<int:record_id>/adjust/', api.adjust_inventory_product, name='api_adjust_inventory_product'),
+    path('api/transaction-history/changes/', api.transaction_history_changes, name='api_transaction_history_changes'),
+    path('async-api/inventory-products/', async_api.inventory_products, name='async_api_inventory_products'),
+    path('async-api/inventory-products/<int:record_id>/', async_api.inventory_product, name='async_api_inventory_product'),
+    path('async-api/inventory-products/<int:record_id>/move/', async_api.move_inventory_product, name='async_api_move_inventory_product'),
+    path('async-api/inventory-products/<int:record_id>/adjust/', async_api.adjust_inventory_product, name='async_api_adjust_inventory_product'),
+    path('async-api/transaction-history/changes/', async_api.transaction_history_changes, name='async_api_transaction_history_changes'),
 ]
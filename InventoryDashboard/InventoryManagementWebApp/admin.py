@@ -5,3 +5,6 @@ from .models import *
 admin.site.register(Associate)
 admin.site.register(TransactionHistory)
 admin.site.register(Inventory)
+admin.site.register(ArchivedTransactionHistory)
+admin.site.register(LocationSummary)
+admin.site.register(ProductSummary)
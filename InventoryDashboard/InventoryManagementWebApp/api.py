@@ -0,0 +1,329 @@
+import json
+import logging
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from .forms import CreateInventoryProductForm, UpdateInventoryProductLocationForm, UpdateInventoryProductQuantityForm
+from .feed import aread_changes, get_feed_limit, get_feed_wait, read_changes, serialize_changes
+from .middleware import aget_associate, get_associate
+from .pagination import get_cursor
+from .models import Inventory
+from .views import Middleware
+
+logger = logging.getLogger(__name__)
+
+# Fields of an inventory product an API client can select with ?fields=; all of them are returned by default
+API_FIELDS = ('record_id', 'label_id', 'storage_location', 'quantity_on_pallet', 'product_description', 'scheduled_for_deletion')
+# Fields of a transaction returned with ?history=1, left out when empty
+HISTORY_FIELDS = ('record_id', 'action_name', 'timestamp', 'previous_quantity', 'new_quantity', 'previous_location', 'new_location')
+
+
+def api_response(data, status=200):
+    """JSON response without the whitespace json.dumps adds by default."""
+    return JsonResponse(data, status=status, json_dumps_params={'separators': (',', ':')})
+
+
+def api_error(message, status=400):
+    return api_response({'error': message}, status=status)
+
+
+def api_login_required(view):
+    """Like login_required, but answers with a 401 JSON error instead of redirecting to the login page.
+    The signed in associate is set as request.associate."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_error('Authentication required.', status=401)
+        request.associate = get_associate(request)
+        if request.associate is None:
+            return api_error('Only associates can use the inventory API.', status=403)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def async_api_login_required(view):
+    """Async version of api_login_required."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return api_error('Authentication required.', status=401)
+        request.associate = await aget_associate(request)
+        if request.associate is None:
+            return api_error('Only associates can use the inventory API.', status=403)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def get_fields(query_data):
+    """Return the product fields selected with the comma separated fields query parameter.
+    Raises ValueError if an unknown field is selected."""
+    requested = query_data.get('fields')
+    if not requested:
+        return API_FIELDS
+    fields = tuple(name.strip() for name in requested.split(',') if name.strip())
+    unknown = [name for name in fields if name not in API_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}.")
+    return fields or API_FIELDS
+
+
+def read_api_data(request):
+    """Return the fields sent in the body of an API request as strings, the way form fields arrive.
+    Accepts a JSON object or form encoded data. Raises ValueError if the body cannot be read."""
+    if request.content_type != 'application/json':
+        return request.POST
+    data = json.loads(request.body or b'{}')
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object.")
+    return {key: str(value) for key, value in data.items() if value is not None}
+
+
+def serialize_product(product, fields):
+    return {field: getattr(product, field) for field in fields}
+
+
+def serialize_transaction(transaction):
+    data = {field: getattr(transaction, field) for field in HISTORY_FIELDS if getattr(transaction, field) is not None}
+    data['performed_by'] = transaction.performed_by.name
+    return data
+
+
+def serialize_page(page, fields):
+    return {
+        'results': [serialize_product(product, fields) for product in page],
+        'next': getattr(page, 'next_cursor', None),
+        'previous': getattr(page, 'previous_cursor', None),
+    }
+
+
+def serialize_detail(product, transaction_history, fields, query_data):
+    data = serialize_product(product, fields)
+    if query_data.get('history'):
+        data['history'] = [serialize_transaction(transaction) for transaction in transaction_history]
+        data['history_next'] = transaction_history.next_cursor
+    return data
+
+
+def _form_error(form):
+    return '; '.join(f"{field}: {' '.join(errors)}" for field, errors in form.errors.items())
+
+
+def location_update(record_id, data):
+    """Validate a move request and return the form data for Middleware._update_inventory_product_location.
+    Raises ValueError describing the problem if the request is invalid."""
+    form = UpdateInventoryProductLocationForm({'new_location': data.get('new_location', '')})
+    if not form.is_valid():
+        raise ValueError(_form_error(form))
+    return {'product_id': str(record_id), 'new_storage_location': form.cleaned_data['new_location']}
+
+
+def quantity_update(record_id, data):
+    """Validate a quantity change and return the form data for Middleware._update_inventory_product_quantity_on_pallet.
+    Raises ValueError describing the problem if the request is invalid."""
+    form = UpdateInventoryProductQuantityForm({name: data[name] for name in ('new_quantity', 'increase_quantity') if name in data})
+    if not form.is_valid():
+        raise ValueError(_form_error(form))
+    form_data = {name: str(value) for name, value in form.cleaned_data.items() if value is not None}
+    if not form_data:
+        raise ValueError('Send a new_quantity or an increase_quantity.')
+    form_data['product_id'] = str(record_id)
+    return form_data
+
+
+def _read_written_product(record_id, fields):
+    """Read back the selected fields of a product after a write, or None if it does not exist."""
+    return Inventory.objects.filter(record_id=record_id).values(*fields).first()
+
+
+def _write_failed(record_id, message):
+    # The Middleware functions only report failure, so tell a missing product apart here
+    if not Inventory.objects.filter(record_id=record_id).exists():
+        return api_error(f'No inventory product found with Record ID: {record_id}.', status=404)
+    return api_error(message)
+
+
+async def _awrite_failed(record_id, message):
+    if not await Inventory.objects.filter(record_id=record_id).aexists():
+        return api_error(f'No inventory product found with Record ID: {record_id}.', status=404)
+    return api_error(message)
+
+
+class ApiEndpoints:
+    """JSON endpoints over the same Middleware functions as the HTML views.
+
+    Responses hold only the product fields asked for, without whitespace, so a scanner round
+    trip costs a few hundred bytes instead of a rendered page. Lists are paged with the same
+    after/before cursors and page_size as the search forms."""
+
+    @api_login_required
+    def inventory_products(request):
+        """GET: search inventory products with the same filters as the search form.
+        POST: create an inventory product and return it with status 201."""
+        try:
+            fields = get_fields(request.GET)
+        except ValueError as e:
+            return api_error(str(e))
+        if request.method == 'POST':
+            try:
+                data = read_api_data(request)
+            except ValueError as e:
+                return api_error(f'The request body could not be read: {e}')
+            form = CreateInventoryProductForm(data=data)
+            if not form.is_valid():
+                return api_error(_form_error(form))
+            try:
+                product = Middleware._create_inventory_product(data, request.associate)
+            except Exception as e:
+                logger.warning("Error creating inventory product: %s", e)
+                return api_error('Failed to create inventory product.')
+            return api_response(serialize_product(product, fields), status=201)
+        if request.method != 'GET':
+            return api_error('Use GET to search inventory products or POST to create one.', status=405)
+        try:
+            page = Middleware._read_inventory_products(request.GET, request.associate)
+        except ValueError:
+            return api_error('Product ID and quantity on pallet must be whole numbers.')
+        return api_response(serialize_page(page, fields))
+
+    @api_login_required
+    def inventory_product(request, record_id):
+        """GET: read an inventory product; with ?history=1 one page of its transaction history is
+        included, paged with history_before like the detail page.
+        DELETE: schedule the product for deletion; only managers can delete products."""
+        try:
+            fields = get_fields(request.GET)
+        except ValueError as e:
+            return api_error(str(e))
+        if request.method == 'DELETE':
+            if not request.associate.is_manager:
+                return api_error('Only managers can delete inventory items.', status=403)
+            if Middleware._delete_inventory_product({'product_id': str(record_id)}, request.associate) != 1:
+                return _write_failed(record_id, 'Failed to delete inventory product.')
+            return api_response(_read_written_product(record_id, fields))
+        if request.method != 'GET':
+            return api_error('Use GET to read an inventory product or DELETE to delete it.', status=405)
+        try:
+            product, transaction_history = Middleware._read_inventory_product(record_id, request.GET)
+        except Inventory.DoesNotExist:
+            return api_error(f'No inventory product found with Record ID: {record_id}.', status=404)
+        return api_response(serialize_detail(product, transaction_history, fields, request.GET))
+
+    @api_login_required
+    def move_inventory_product(request, record_id):
+        """POST new_location to move an inventory product and return it."""
+        if request.method != 'POST':
+            return api_error('Moves must be sent as a POST request.', status=405)
+        try:
+            fields = get_fields(request.GET)
+            form_data = location_update(record_id, read_api_data(request))
+        except ValueError as e:
+            return api_error(str(e))
+        if Middleware._update_inventory_product_location(form_data, request.associate) != 1:
+            return _write_failed(record_id, 'Failed to update inventory product location.')
+        return api_response(_read_written_product(record_id, fields))
+
+    @api_login_required
+    def adjust_inventory_product(request, record_id):
+        """POST new_quantity to set the quantity of an inventory product, or increase_quantity
+        to change it by a (possibly negative) amount, and return the product."""
+        if request.method != 'POST':
+            return api_error('Quantity changes must be sent as a POST request.', status=405)
+        try:
+            fields = get_fields(request.GET)
+            form_data = quantity_update(record_id, read_api_data(request))
+        except ValueError as e:
+            return api_error(str(e))
+        if Middleware._update_inventory_product_quantity_on_pallet(form_data, request.associate) != 1:
+            return _write_failed(record_id, 'Failed to update inventory product quantity.')
+        return api_response(_read_written_product(record_id, fields))
+
+    @api_login_required
+    def transaction_history_changes(request):
+        """GET the transaction history committed after the `after` feed position, in commit order, each
+        change with the current state of its item. Send the returned next value back as after to continue.
+        limit bounds the batch, and wait=N holds the request open for up to N seconds until changes
+        arrive; under ASGI, prefer the async endpoint for long polls."""
+        if request.method != 'GET':
+            return api_error('Use GET to read the change feed.', status=405)
+        after = get_cursor(request.GET, 'after') or 0
+        changes = read_changes(after, get_feed_limit(request.GET), get_feed_wait(request.GET))
+        return api_response(serialize_changes(changes, after))
+
+
+class AsyncApiEndpoints:
+    """Async versions of the search, read and update endpoints of ApiEndpoints.
+
+    Served by an ASGI deployment, a request waiting on the database no longer holds a worker
+    thread, so one process can keep many scanners in flight at once. Reads use the async ORM.
+    Writes still run the Middleware functions in a thread, since Django transactions are not
+    available in async code; the read back of the written product is async again."""
+
+    @async_api_login_required
+    async def inventory_products(request):
+        """GET: search inventory products with the same filters as the search form."""
+        if request.method != 'GET':
+            return api_error('Use GET to search inventory products.', status=405)
+        try:
+            fields = get_fields(request.GET)
+        except ValueError as e:
+            return api_error(str(e))
+        try:
+            page = await Middleware._aread_inventory_products(request.GET, request.associate)
+        except ValueError:
+            return api_error('Product ID and quantity on pallet must be whole numbers.')
+        return api_response(serialize_page(page, fields))
+
+    @async_api_login_required
+    async def inventory_product(request, record_id):
+        """GET: read an inventory product, with one page of its history if ?history=1."""
+        if request.method != 'GET':
+            return api_error('Use GET to read an inventory product.', status=405)
+        try:
+            fields = get_fields(request.GET)
+        except ValueError as e:
+            return api_error(str(e))
+        try:
+            product, transaction_history = await Middleware._aread_inventory_product(record_id, request.GET)
+        except Inventory.DoesNotExist:
+            return api_error(f'No inventory product found with Record ID: {record_id}.', status=404)
+        return api_response(serialize_detail(product, transaction_history, fields, request.GET))
+
+    @async_api_login_required
+    async def move_inventory_product(request, record_id):
+        """POST new_location to move an inventory product and return it."""
+        if request.method != 'POST':
+            return api_error('Moves must be sent as a POST request.', status=405)
+        try:
+            fields = get_fields(request.GET)
+            form_data = location_update(record_id, read_api_data(request))
+        except ValueError as e:
+            return api_error(str(e))
+        if await sync_to_async(Middleware._update_inventory_product_location)(form_data, request.associate) != 1:
+            return await _awrite_failed(record_id, 'Failed to update inventory product location.')
+        return api_response(await Inventory.objects.filter(record_id=record_id).values(*fields).afirst())
+
+    @async_api_login_required
+    async def adjust_inventory_product(request, record_id):
+        """POST new_quantity or increase_quantity to change the quantity of an inventory product and return it."""
+        if request.method != 'POST':
+            return api_error('Quantity changes must be sent as a POST request.', status=405)
+        try:
+            fields = get_fields(request.GET)
+            form_data = quantity_update(record_id, read_api_data(request))
+        except ValueError as e:
+            return api_error(str(e))
+        if await sync_to_async(Middleware._update_inventory_product_quantity_on_pallet)(form_data, request.associate) != 1:
+            return await _awrite_failed(record_id, 'Failed to update inventory product quantity.')
+        return api_response(await Inventory.objects.filter(record_id=record_id).values(*fields).afirst())
+
+    @async_api_login_required
+    async def transaction_history_changes(request):
+        """GET the change feed like ApiEndpoints.transaction_history_changes; a long poll waits without holding a thread."""
+        if request.method != 'GET':
+            return api_error('Use GET to read the change feed.', status=405)
+        after = get_cursor(request.GET, 'after') or 0
+        changes = await aread_changes(after, get_feed_limit(request.GET), get_feed_wait(request.GET))
+        return api_response(serialize_changes(changes, after))
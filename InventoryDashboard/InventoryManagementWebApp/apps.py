@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class InventorymanagementwebappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'InventoryManagementWebApp'
+
+    def ready(self):
+        # Optional in-process purge of expired inventory items; enabled by INVENTORY_PURGE_INTERVAL_SECONDS
+        from .purge import start_purge_scheduler
+        start_purge_scheduler()
+        # Drop cached signed in users when they or their associate change; see backends.AssociateBackend
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_save
+        from .backends import invalidate_cached_user_on_save
+        for model in (get_user_model(), self.get_model('Associate')):
+            post_save.connect(invalidate_cached_user_on_save, sender=model, dispatch_uid=f'invalidate_cached_user_save_{model.__name__}')
+            post_delete.connect(invalidate_cached_user_on_save, sender=model, dispatch_uid=f'invalidate_cached_user_delete_{model.__name__}')
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedTransactionHistory, TransactionHistory
+from .cache import invalidate_inventory_items
+
+# Age in days after which transaction history records are archived; override with TRANSACTION_HISTORY_ARCHIVE_AFTER_DAYS in settings
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+# Number of records moved per transaction
+DEFAULT_ARCHIVE_BATCH_SIZE = 1000
+
+ARCHIVED_FIELDS = ('record_id', 'inventory_item_id', 'action_name', 'timestamp', 'performed_by_id',
+                   'previous_quantity', 'new_quantity', 'previous_location', 'new_location')
+
+
+def archive_transaction_history(older_than_days=None, batch_size=DEFAULT_ARCHIVE_BATCH_SIZE, now=None):
+    """Move transaction history records older than the given age into ArchivedTransactionHistory.
+
+    Records are copied and deleted in batches, each batch in its own transaction, so the
+    TransactionHistory table is never locked for long. An item's creation record stays in
+    TransactionHistory, so Inventory.creation_record can always find it.
+    Yields the number of records archived by each batch."""
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'TRANSACTION_HISTORY_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    cutoff = (now or timezone.now()) - timedelta(days=older_than_days)
+    expired = TransactionHistory.objects.filter(timestamp__lt=cutoff).exclude(action_name=TransactionHistory.Actions.CREATED).order_by('record_id')
+    while True:
+        with transaction.atomic():
+            rows = list(expired.values(*ARCHIVED_FIELDS)[:batch_size])
+            if not rows:
+                return
+            ArchivedTransactionHistory.objects.bulk_create(
+                [ArchivedTransactionHistory(**row) for row in rows], batch_size=batch_size
+            )
+            TransactionHistory.objects.filter(record_id__in=[row['record_id'] for row in rows]).delete()
+            # Cached detail pages may show the records that just moved
+            invalidate_inventory_items(row['inventory_item_id'] for row in rows)
+        yield len(rows)
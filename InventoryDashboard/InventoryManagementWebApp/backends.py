@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+# Seconds a signed in user and their associate stay cached between requests; override with
+# INVENTORY_USER_CACHE_TIMEOUT in settings. None loads them from the database on every request
+DEFAULT_USER_CACHE_TIMEOUT = None
+# Cache in CACHES holding signed in users; override with INVENTORY_USER_CACHE_ALIAS in settings
+DEFAULT_USER_CACHE_ALIAS = 'default'
+
+
+def _user_cache_key(user_id):
+    return f'inventory:user:{user_id}'
+
+
+def _user_cache():
+    return caches[getattr(settings, 'INVENTORY_USER_CACHE_ALIAS', DEFAULT_USER_CACHE_ALIAS)]
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached copy of a user, so the next request loads the user and associate again."""
+    if user_id is not None and getattr(settings, 'INVENTORY_USER_CACHE_TIMEOUT', DEFAULT_USER_CACHE_TIMEOUT):
+        _user_cache().delete(_user_cache_key(user_id))
+
+
+def invalidate_cached_user_on_save(sender, instance, **kwargs):
+    # Connected to the save and delete signals of the user model and Associate in AppConfig.ready()
+    invalidate_cached_user(instance.django_user_id if hasattr(instance, 'django_user_id') else instance.pk)
+
+
+class AssociateBackend(ModelBackend):
+    """Authentication backend that loads a signed in user together with their associate.
+
+    ModelBackend loads the user on every request, and request.user.associate then costs a
+    second query. This backend joins the associate into the user query. With
+    INVENTORY_USER_CACHE_TIMEOUT set, the user and associate are also kept in a cache for that
+    many seconds, so most requests skip the query altogether; the cached copy is dropped
+    whenever the user or the associate is saved or deleted.
+
+    Enable with AUTHENTICATION_BACKENDS = ['InventoryManagementWebApp.backends.AssociateBackend'].
+    Sessions started under another backend keep using it until the associate signs in again."""
+
+    def get_user(self, user_id):
+        timeout = getattr(settings, 'INVENTORY_USER_CACHE_TIMEOUT', DEFAULT_USER_CACHE_TIMEOUT)
+        user = _user_cache().get(_user_cache_key(user_id)) if timeout else None
+        if user is None:
+            try:
+                user = get_user_model()._default_manager.select_related('associate').get(pk=user_id)
+            except get_user_model().DoesNotExist:
+                return None
+            if timeout:
+                _user_cache().set(_user_cache_key(user_id), user, timeout)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,205 @@
+import csv
+import json
+from itertools import chain
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from .forms import CreateInventoryProductForm
+from .models import Inventory, TransactionHistory
+from .search import index_inventory_item
+from .cache import invalidate_inventory_items
+from .summaries import apply_stock_changes, stock_change
+from .validators import validate_not_whitespace
+
+# Number of manifest rows written per transaction; override with INVENTORY_IMPORT_BATCH_SIZE in settings
+DEFAULT_IMPORT_BATCH_SIZE = 1000
+# Manifest formats accepted by import_inventory_manifest
+MANIFEST_FORMATS = ('csv', 'json')
+# Characters read from the manifest at a time while parsing a JSON array
+JSON_READ_SIZE = 64 * 1024
+# Values used for columns missing from a manifest row, matching InventoryManager.create
+ROW_DEFAULTS = {'storage_location': 'HOLD', 'quantity_on_pallet': -100, 'product_description': ''}
+
+
+class ImportReport:
+    """Outcome of a manifest import: the number of pallets created and the errors of rejected rows.
+    Rows are numbered from 1 in the order they appear in the manifest."""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.errors.append((row_number, message))
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+
+def read_manifest_rows(stream, manifest_format):
+    """Yield the rows of a manifest as dictionaries.
+
+    CSV manifests need a header row naming the columns. JSON manifests are either an array of
+    objects or one object per line. Both JSON forms are read as they stream in, so a manifest of
+    any size is never held in memory whole."""
+    if manifest_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    if manifest_format != 'json':
+        raise ValueError(f"Unsupported manifest format: {manifest_format}")
+    first_line = stream.readline()
+    while first_line and not first_line.strip():
+        first_line = stream.readline()
+    if first_line.lstrip().startswith('['):
+        yield from _read_json_array(stream, first_line.lstrip()[1:])
+        return
+    for line in chain([first_line], stream):
+        if line.strip():
+            yield json.loads(line)
+
+
+def _read_json_array(stream, text):
+    """Yield the elements of a JSON array one at a time, reading the stream in chunks as needed.
+    text is what has already been read of the array after its opening bracket."""
+    decoder = json.JSONDecoder()
+    buffer = text
+    position = 0
+    exhausted = False
+
+    def read_more():
+        nonlocal buffer, position, exhausted
+        chunk = stream.read(JSON_READ_SIZE)
+        exhausted = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+    def next_character():
+        # The next character that is not whitespace, or '' at the end of the stream
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or exhausted:
+                return buffer[position:position + 1]
+            read_more()
+
+    separator = ','
+    if next_character() == ']':
+        position += 1
+        separator = ']'
+    while separator == ',':
+        if not next_character():
+            raise ValueError("Manifest ends before its JSON array is closed.")
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if exhausted:
+                raise
+            # The element continues past what has been read so far
+            read_more()
+            continue
+        if end == len(buffer) and not exhausted:
+            # A number at the end of the buffer may have more digits still unread
+            read_more()
+            continue
+        yield element
+        position = end
+        separator = next_character()
+        if separator not in (',', ']'):
+            raise ValueError(f"Expected ',' or ']' after a JSON array element, found {separator!r}.")
+        position += 1
+    if next_character():
+        raise ValueError("Unexpected data after the JSON array.")
+
+
+def validate_manifest_row(row):
+    """Validate a manifest row with the same rules as the create form.
+    Returns the cleaned values, or raises ValueError or ValidationError describing the problems with the row."""
+    if not isinstance(row, dict):
+        raise ValueError("Row is not an object.")
+    data = {**ROW_DEFAULTS, **{key: value for key, value in row.items() if value not in (None, '')}}
+    form = CreateInventoryProductForm(data=data)
+    if not form.is_valid():
+        raise ValueError('; '.join(f"{field}: {' '.join(errors)}" for field, errors in form.errors.items()))
+    validate_not_whitespace(form.cleaned_data['label_id'])
+    return form.cleaned_data
+
+
+def _write_batch(batch, associate):
+    """Write a batch of validated rows with one bulk insert per table inside a single transaction."""
+    with transaction.atomic():
+        items = Inventory.objects.bulk_create([
+            Inventory(
+                label_id=row['label_id'],
+                storage_location=row['storage_location'],
+                quantity_on_pallet=row['quantity_on_pallet'],
+                product_description=row['product_description'],
+            )
+            for row in batch
+        ])
+        TransactionHistory.objects.bulk_create([
+            TransactionHistory(
+                inventory_item=item,
+                action_name=TransactionHistory.Actions.CREATED,
+                performed_by=associate,
+                new_quantity=item.quantity_on_pallet,
+                new_location=item.storage_location,
+            )
+            for item in items
+        ])
+        apply_stock_changes([stock_change(item.storage_location, item.product_description, item.quantity_on_pallet) for item in items])
+        for item in items:
+            index_inventory_item(item)
+        invalidate_inventory_items(item.record_id for item in items)
+    return len(items)
+
+
+def _flush_batch(batch, row_numbers, associate, report):
+    """Write a batch of validated rows, retrying them one at a time if the database refuses the batch."""
+    try:
+        report.created += _write_batch(batch, associate)
+    except DatabaseError as e:
+        if len(batch) == 1:
+            report.add_error(row_numbers[0], f"Could not be saved: {e}")
+            return
+        for row, row_number in zip(batch, row_numbers):
+            _flush_batch([row], [row_number], associate, report)
+
+
+def import_inventory_manifest(stream, manifest_format, associate, batch_size=None):
+    """Create inventory products from a CSV or JSON manifest.
+
+    Rows are validated one at a time; rows that fail validation are reported and skipped
+    without stopping the import. Valid rows are written in batches of batch_size, each batch
+    in its own transaction with bulk inserts for Inventory and TransactionHistory, so only
+    one batch of rows is held in memory and a failing batch does not undo earlier ones. A batch
+    the database refuses is retried one row at a time, and only the rows it still refuses are
+    reported.
+    Returns an ImportReport."""
+    batch_size = batch_size or getattr(settings, 'INVENTORY_IMPORT_BATCH_SIZE', DEFAULT_IMPORT_BATCH_SIZE)
+    report = ImportReport()
+    batch = []
+    row_numbers = []
+    try:
+        for row_number, row in enumerate(read_manifest_rows(stream, manifest_format), start=1):
+            try:
+                batch.append(validate_manifest_row(row))
+                row_numbers.append(row_number)
+            except ValidationError as e:
+                report.add_error(row_number, '; '.join(e.messages))
+                continue
+            except ValueError as e:
+                report.add_error(row_number, str(e))
+                continue
+            if len(batch) >= batch_size:
+                _flush_batch(batch, row_numbers, associate, report)
+                batch = []
+                row_numbers = []
+    except (csv.Error, ValueError) as e:
+        # The rest of the manifest cannot be read (JSON and encoding errors are ValueErrors)
+        report.add_error(None, f"Manifest could not be read: {e}")
+    if batch:
+        _flush_batch(batch, row_numbers, associate, report)
+    return report
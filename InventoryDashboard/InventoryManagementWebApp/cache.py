@@ -0,0 +1,271 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+# Cache used when INVENTORY_CACHE_BACKEND is not set: 'local' for the in-process LRU cache,
+# the alias of a cache in CACHES to share entries between processes, or None to disable caching
+DEFAULT_CACHE_BACKEND = 'local'
+# Seconds an entry stays valid; override with INVENTORY_CACHE_TIMEOUT in settings
+DEFAULT_CACHE_TIMEOUT = 30
+# Entries kept by the in-process cache before the least recently used are evicted; override with INVENTORY_CACHE_MAX_ENTRIES in settings
+DEFAULT_CACHE_MAX_ENTRIES = 1024
+
+# Fields of an inventory item that search filters can refer to
+FILTERED_FIELDS = ('record_id', 'label_id', 'storage_location', 'quantity_on_pallet', 'product_description', 'scheduled_for_deletion')
+
+
+def filters_match(filters, values):
+    """Return whether an item with the given field values could satisfy the search filters.
+    Text comparisons ignore case, so an item may be reported as matching a filter the database
+    would not match it with, but never the other way round."""
+    for lookup, expected in filters.items():
+        field, _, operator = lookup.partition('__')
+        actual = values.get(field)
+        if operator == '':
+            matches = actual == expected
+        elif operator == 'isnull':
+            matches = (actual is None) == expected
+        elif operator in ('startswith', 'istartswith'):
+            matches = actual is not None and str(actual).lower().startswith(str(expected).lower())
+        elif operator in ('contains', 'icontains'):
+            matches = actual is not None and str(expected).lower() in str(actual).lower()
+        else:
+            # An unknown lookup might match anything
+            matches = True
+        if not matches:
+            return False
+    return True
+
+
+class LocalCache:
+    """In-process cache with a time to live for every entry and least recently used eviction."""
+
+    def __init__(self, timeout, max_entries):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_matching(self, predicate):
+        """Delete every entry for which predicate(key, value) is true."""
+        with self._lock:
+            stale_keys = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+            for key in stale_keys:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class InventoryCache:
+    """Cache of inventory search result pages and item detail pages.
+
+    Search pages are keyed on the normalized filters and paging fields of the search, and item
+    detail pages on the item's record id. Whenever an item is written, invalidate_item() drops its
+    detail page and every cached search page that holds the item or whose filters the item now
+    matches, so a cached page is never served after a write that changes it.
+
+    Entries live in the in-process LocalCache, or in a Django cache to share them between
+    processes. Django caches cannot list their keys, so with one every write invalidates all
+    cached search pages at once by moving them to a new generation; detail pages are deleted
+    by key. Batch writes call invalidate_items() once, which drops every cached search page
+    and the detail pages of the whole batch.
+    Nothing read inside a transaction is cached, since the transaction may still roll back."""
+
+    def __init__(self, backend, timeout, max_entries):
+        self.timeout = timeout
+        if backend == 'local':
+            self._cache = LocalCache(timeout, max_entries)
+            self._shared = None
+        else:
+            self._cache = None
+            self._shared = caches[backend]
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        value = self._cache.get(key) if self._cache is not None else self._shared.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def _set(self, key, value):
+        if self._cache is not None:
+            self._cache.set(key, value)
+        else:
+            self._shared.set(key, value, self.timeout)
+
+    def _search_key(self, filters, paging):
+        normalized = json.dumps([sorted(filters.items()), sorted(paging.items())], default=str)
+        key = 'inventory:search:' + hashlib.sha1(normalized.encode()).hexdigest()
+        if self._shared is not None:
+            key += ':%s' % self._shared.get_or_set('inventory:search-generation', 0)
+        return key
+
+    def _item_key(self, record_id):
+        return f'inventory:item:{record_id}'
+
+    def get_search_page(self, filters, paging):
+        """Return the cached page of a search, or None."""
+        entry = self._get(self._search_key(filters, paging))
+        return entry[2] if entry is not None else None
+
+    def set_search_page(self, filters, paging, page):
+        """Cache the page of a search, unless it was read inside a transaction."""
+        if connection.in_atomic_block:
+            return
+        # The filters and record ids are kept with the page to decide which writes make it stale
+        self._set(self._search_key(filters, paging), (filters, {product.record_id for product in page}, page))
+
+    def get_item_detail(self, record_id):
+        """Return the cached detail page of an item, or None."""
+        return self._get(self._item_key(record_id))
+
+    def set_item_detail(self, record_id, detail):
+        """Cache the detail page of an item, unless it was read inside a transaction."""
+        if connection.in_atomic_block:
+            return
+        self._set(self._item_key(record_id), detail)
+
+    def invalidate_item(self, inventory_item):
+        """Drop every cached page the item appears on or now belongs on."""
+        values = {field: getattr(inventory_item, field, None) for field in FILTERED_FIELDS}
+        item_key = self._item_key(inventory_item.record_id)
+        with self._lock:
+            self.invalidations += 1
+        if self._shared is not None:
+            self._shared.delete(item_key)
+            self._next_search_generation()
+            return
+
+        def is_stale(key, value):
+            if key == item_key:
+                return True
+            if not key.startswith('inventory:search:'):
+                return False
+            filters, record_ids, _ = value
+            return inventory_item.record_id in record_ids or filters_match(filters, values)
+        self._cache.delete_matching(is_stale)
+
+    def invalidate_items(self, record_ids):
+        """Drop the detail pages of many items and every cached search page, for writes of a whole batch.
+        Matching each item against each cached search would cost far more than the searches saved,
+        so the search pages are all dropped in one pass and the detail pages deleted in one call."""
+        item_keys = {self._item_key(record_id) for record_id in record_ids}
+        if not item_keys:
+            return
+        with self._lock:
+            self.invalidations += 1
+        if self._shared is not None:
+            self._shared.delete_many(item_keys)
+            self._next_search_generation()
+            return
+        self._cache.delete_matching(lambda key, value: key in item_keys or key.startswith('inventory:search:'))
+
+    def _next_search_generation(self):
+        try:
+            self._shared.incr('inventory:search-generation')
+        except ValueError:
+            self._shared.set('inventory:search-generation', 1, None)
+
+    def clear(self):
+        if self._cache is not None:
+            self._cache.clear()
+        else:
+            self._shared.clear()
+
+    def statistics(self):
+        """Hit, miss, eviction and invalidation counters of the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self._cache.evictions if self._cache is not None else None,
+                'invalidations': self.invalidations,
+            }
+
+
+_inventory_cache = None
+_inventory_cache_lock = threading.Lock()
+
+
+def get_inventory_cache():
+    """Return the inventory cache configured by INVENTORY_CACHE_BACKEND, or None if caching is disabled."""
+    global _inventory_cache
+    backend = getattr(settings, 'INVENTORY_CACHE_BACKEND', DEFAULT_CACHE_BACKEND)
+    if backend is None:
+        return None
+    if _inventory_cache is None:
+        with _inventory_cache_lock:
+            if _inventory_cache is None:
+                _inventory_cache = InventoryCache(
+                    backend,
+                    getattr(settings, 'INVENTORY_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT),
+                    getattr(settings, 'INVENTORY_CACHE_MAX_ENTRIES', DEFAULT_CACHE_MAX_ENTRIES),
+                )
+    return _inventory_cache
+
+
+def reset_inventory_cache():
+    """Discard the current inventory cache so the next use creates a fresh one from settings."""
+    global _inventory_cache
+    with _inventory_cache_lock:
+        _inventory_cache = None
+
+
+def invalidate_inventory_item(inventory_item):
+    """Invalidate the cached pages of an inventory item now and again once the current transaction commits.
+    The second invalidation drops any page cached from the old data while the transaction was open."""
+    inventory_cache = get_inventory_cache()
+    if inventory_cache is None:
+        return
+    inventory_cache.invalidate_item(inventory_item)
+    transaction.on_commit(lambda: inventory_cache.invalidate_item(inventory_item))
+
+
+def invalidate_inventory_items(record_ids):
+    """Invalidate the cached pages of many inventory items in one pass once the current transaction commits.
+    Used by batch writes instead of invalidating each item; the pass after the commit also drops any
+    page other requests cached from the old data while the transaction was open."""
+    inventory_cache = get_inventory_cache()
+    if inventory_cache is None:
+        return
+    record_ids = set(record_ids)
+    transaction.on_commit(lambda: inventory_cache.invalidate_items(record_ids))
@@ -0,0 +1,103 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import ArchivedTransactionHistory, TransactionHistory
+
+# Rows fetched from the database at a time while exporting; override with INVENTORY_EXPORT_CHUNK_SIZE in settings
+DEFAULT_EXPORT_CHUNK_SIZE = 2000
+# Formats the exports can be written in
+EXPORT_FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+# Columns of the exports, in order
+INVENTORY_EXPORT_FIELDS = ('record_id', 'label_id', 'storage_location', 'quantity_on_pallet', 'product_description', 'scheduled_for_deletion')
+HISTORY_EXPORT_FIELDS = ('record_id', 'inventory_item_id', 'action_name', 'timestamp', 'performed_by__name',
+                         'previous_quantity', 'new_quantity', 'previous_location', 'new_location')
+
+
+class _Echo:
+    """File-like object whose write() returns what was written, so csv.writer can produce lines one at a time."""
+
+    def write(self, value):
+        return value
+
+
+def get_chunk_size():
+    return getattr(settings, 'INVENTORY_EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE)
+
+
+def parse_timestamp(value, end_of_range=False):
+    """Parse a date or datetime query value into an aware datetime.
+    A date alone means the start of that day, or with end_of_range the start of the following day.
+    Raises ValueError if the value is not a date or datetime."""
+    try:
+        day = parse_date(value)
+        moment = parse_datetime(value) if day is None else datetime.combine(day + timedelta(days=1) if end_of_range else day, time.min)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValueError(f"{value!r} is not a date or datetime.")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def inventory_export_rows(products):
+    """Yield the export rows of a queryset of inventory products, in record id order.
+    Rows are read with a database cursor chunk by chunk, so memory use does not grow with the export."""
+    return products.order_by('record_id').values_list(*INVENTORY_EXPORT_FIELDS).iterator(chunk_size=get_chunk_size())
+
+
+def history_export_rows(query_data):
+    """Yield the export rows of the transaction history selected by the query data, in record id order.
+
+    product_id selects one item's history, action_name one kind of transaction, and since and
+    until a range of timestamps; since is inclusive and until exclusive, and a date alone for
+    until covers that whole day. With archived set, the archived history is exported instead.
+    Raises ValueError if a filter value is invalid."""
+    history_model = ArchivedTransactionHistory if query_data.get('archived') else TransactionHistory
+    filters = {}
+    if query_data.get('product_id'):
+        filters['inventory_item_id'] = int(query_data.get('product_id').strip())
+    if query_data.get('action_name'):
+        filters['action_name'] = query_data.get('action_name').strip()
+    if query_data.get('since'):
+        filters['timestamp__gte'] = parse_timestamp(query_data.get('since').strip())
+    if query_data.get('until'):
+        filters['timestamp__lt'] = parse_timestamp(query_data.get('until').strip(), end_of_range=True)
+    transactions = history_model.objects.filter(**filters).order_by('record_id')
+    return transactions.values_list(*HISTORY_EXPORT_FIELDS).iterator(chunk_size=get_chunk_size())
+
+
+def _column_names(fields):
+    return [field.replace('__', '_') for field in fields]
+
+
+def csv_lines(fields, rows):
+    """Yield a CSV header line, then one line per row."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(_column_names(fields))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(fields, rows):
+    """Yield one JSON object per row, one per line."""
+    columns = _column_names(fields)
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + '\n'
+
+
+def export_lines(export_format, fields, rows):
+    """Yield the lines of an export in the given format."""
+    if export_format == 'csv':
+        return csv_lines(fields, rows)
+    if export_format == 'ndjson':
+        return ndjson_lines(fields, rows)
+    raise ValueError(f"Unsupported export format: {export_format}")
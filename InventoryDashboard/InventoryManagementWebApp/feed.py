@@ -0,0 +1,115 @@
+import asyncio
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TransactionHistory
+
+# Changes returned per request when no limit is given; override with INVENTORY_FEED_BATCH_SIZE in settings
+DEFAULT_FEED_BATCH_SIZE = 500
+# Upper bound on the limit a request can ask for; override with INVENTORY_FEED_MAX_BATCH_SIZE in settings
+DEFAULT_FEED_MAX_BATCH_SIZE = 5000
+# Longest a long poll waits for new changes, in seconds; override with INVENTORY_FEED_MAX_WAIT_SECONDS in settings
+DEFAULT_FEED_MAX_WAIT_SECONDS = 25
+# Seconds between checks for new changes while a long poll waits; override with INVENTORY_FEED_POLL_INTERVAL_SECONDS in settings
+DEFAULT_FEED_POLL_INTERVAL_SECONDS = 0.25
+# Age in seconds after which the feed itself positions committed changes still waiting for a feed position,
+# such as those of a process that stopped between its commit and positioning them; override with INVENTORY_FEED_SETTLE_SECONDS in settings
+DEFAULT_FEED_SETTLE_SECONDS = 1
+
+# Fields of the changed item included with each change
+ITEM_FIELDS = ('record_id', 'label_id', 'storage_location', 'quantity_on_pallet', 'product_description', 'scheduled_for_deletion')
+# Fields of a change, left out when empty
+CHANGE_FIELDS = ('record_id', 'action_name', 'timestamp', 'previous_quantity', 'new_quantity', 'previous_location', 'new_location')
+
+
+def get_feed_limit(query_data):
+    """Return the batch size requested with the limit query parameter, clamped to the configured maximum."""
+    default_limit = getattr(settings, 'INVENTORY_FEED_BATCH_SIZE', DEFAULT_FEED_BATCH_SIZE)
+    max_limit = getattr(settings, 'INVENTORY_FEED_MAX_BATCH_SIZE', DEFAULT_FEED_MAX_BATCH_SIZE)
+    try:
+        limit = int(query_data.get('limit', '').strip())
+    except (AttributeError, ValueError):
+        return default_limit
+    return max(1, min(limit, max_limit))
+
+
+def get_feed_wait(query_data):
+    """Return the seconds a long poll should wait, from the wait query parameter; 0 answers at once."""
+    max_wait = getattr(settings, 'INVENTORY_FEED_MAX_WAIT_SECONDS', DEFAULT_FEED_MAX_WAIT_SECONDS)
+    try:
+        wait = float(query_data.get('wait', '').strip())
+    except (AttributeError, ValueError):
+        return 0
+    return max(0, min(wait, max_wait))
+
+
+def changes_query(after, limit):
+    """Return the query for the next batch of changes after the feed position, in commit order, with the
+    changed item and the associate joined in.
+
+    The feed pages by feed position rather than record id. Record ids are handed out when a change
+    is written but become visible when its transaction commits, so a change can appear behind one
+    the feed has already returned, however long the feed waits. Feed positions are handed out
+    after the commit, in the order they become visible, so no change is ever skipped; see
+    TransactionHistoryManager. Changes whose positions are not handed out yet are not returned."""
+    changes = TransactionHistory.objects.filter(feed_position__gt=after)
+    return changes.select_related('inventory_item', 'performed_by').order_by('feed_position')[:limit]
+
+
+def position_stranded_changes():
+    """Position committed changes that have waited longer than INVENTORY_FEED_SETTLE_SECONDS for a feed position.
+    Their writers position them right after committing, so this only finds the changes of a writer
+    that stopped in between. Returns the number of changes positioned."""
+    settle_seconds = getattr(settings, 'INVENTORY_FEED_SETTLE_SECONDS', DEFAULT_FEED_SETTLE_SECONDS)
+    stranded = TransactionHistory.objects.filter(feed_position__isnull=True, timestamp__lte=timezone.now() - timedelta(seconds=settle_seconds))
+    if not stranded.exists():
+        return 0
+    return TransactionHistory.objects.assign_feed_positions()
+
+
+def _poll_interval():
+    return getattr(settings, 'INVENTORY_FEED_POLL_INTERVAL_SECONDS', DEFAULT_FEED_POLL_INTERVAL_SECONDS)
+
+
+def read_changes(after, limit, wait=0):
+    """Return up to limit changes after the feed position, in commit order.
+    If there are none yet, keep checking for up to wait seconds before returning an empty list."""
+    deadline = time.monotonic() + wait
+    while True:
+        changes = list(changes_query(after, limit))
+        if not changes and position_stranded_changes():
+            changes = list(changes_query(after, limit))
+        if changes or time.monotonic() >= deadline:
+            return changes
+        time.sleep(_poll_interval())
+
+
+async def aread_changes(after, limit, wait=0):
+    """Async version of read_changes; a waiting long poll holds no thread."""
+    deadline = time.monotonic() + wait
+    while True:
+        changes = [change async for change in changes_query(after, limit)]
+        if not changes and await sync_to_async(position_stranded_changes)():
+            changes = [change async for change in changes_query(after, limit)]
+        if changes or time.monotonic() >= deadline:
+            return changes
+        await asyncio.sleep(_poll_interval())
+
+
+def serialize_change(change):
+    data = {field: getattr(change, field) for field in CHANGE_FIELDS if getattr(change, field) is not None}
+    data['performed_by'] = change.performed_by.name
+    data['item'] = {field: getattr(change.inventory_item, field) for field in ITEM_FIELDS}
+    return data
+
+
+def serialize_changes(changes, after):
+    """The feed response: the changes, and the feed position to send back as after for the next batch."""
+    return {
+        'changes': [serialize_change(change) for change in changes],
+        'next': changes[-1].feed_position if changes else after,
+    }
@@ -8,10 +8,13 @@ class CreateInventoryProductForm(forms.Form):
 
 class ReadInventoryProductsForm(forms.Form):
     label_id = forms.CharField(max_length=100, label='Label ID', required=False)
+    exact_label_id = forms.BooleanField(label='Whole Label ID Scanned', required=False)
     storage_location = forms.CharField(max_length=4, label='Storage Location', required=False)
     quantity_on_pallet = forms.IntegerField(label='Quantity on Pallet', required=False)
     product_description = forms.CharField(max_length=200, label='Product Description', required=False)
     scheduled_for_deletion = forms.BooleanField(label='Scheduled for Deletion', required=False)
+    search = forms.CharField(max_length=200, label='Search Labels and Descriptions', required=False)
+    page_size = forms.IntegerField(label='Results per Page', required=False, min_value=1)
 
 class UpdateInventoryProductLocationForm(forms.Form):
     new_location = forms.CharField(max_length=4, label='New Storage Location')
@@ -20,5 +23,9 @@ class UpdateInventoryProductQuantityForm(forms.Form):
     new_quantity = forms.IntegerField(label='New Quantity on Pallet', required=False)
     increase_quantity = forms.IntegerField(label='Increase Quantity By', required=False)
 
+class BulkImportInventoryProductsForm(forms.Form):
+    manifest = forms.FileField(label='Manifest File')
+    manifest_format = forms.ChoiceField(label='Manifest Format', choices=[('csv', 'CSV'), ('json', 'JSON')], initial='csv')
+
 class DeleteInventoryProductForm(forms.Form):
     confirmation = forms.BooleanField(label='Confirm Deletion')
\ No newline at end of file
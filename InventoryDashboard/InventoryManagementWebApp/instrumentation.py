@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+# Whether InstrumentationMiddleware records requests; override with INVENTORY_INSTRUMENTATION in settings
+DEFAULT_INSTRUMENTATION = False
+# Queries slower than this many milliseconds are flagged; override with INVENTORY_SLOW_QUERY_MS in settings
+DEFAULT_SLOW_QUERY_MS = 100
+# A query run this many times in one request is flagged as repeated, the N+1 signature; override with INVENTORY_REPEATED_QUERY_THRESHOLD in settings
+DEFAULT_REPEATED_QUERY_THRESHOLD = 3
+# Number of recent requests kept for the rolling summary; override with INVENTORY_INSTRUMENTATION_WINDOW in settings
+DEFAULT_INSTRUMENTATION_WINDOW = 1000
+
+# Template render time of the current request, while one is being instrumented
+_render_timer = ContextVar('inventory_render_timer', default=None)
+
+
+class RenderTimer:
+    """Accumulates the time spent rendering templates. Included templates are timed as part of the template including them."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.depth = 0
+
+
+def _install_render_timing():
+    """Wrap Template.render once so template render time is added to the current request's RenderTimer.
+    Outside an instrumented request the wrapper only checks a context variable."""
+    if getattr(Template.render, 'inventory_timed', False):
+        return
+    render = Template.render
+
+    def timed_render(self, context):
+        timer = _render_timer.get()
+        if timer is None:
+            return render(self, context)
+        timer.depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timer.depth -= 1
+            if timer.depth == 0:
+                timer.seconds += time.perf_counter() - started
+    timed_render.inventory_timed = True
+    Template.render = timed_render
+
+
+class QueryRecorder:
+    """Database execute wrapper recording the SQL and duration of every query of a request."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+
+class RequestRecord:
+    """What was measured about one request."""
+
+    __slots__ = ('view', 'status', 'seconds', 'queries', 'db_seconds', 'render_seconds', 'response_bytes', 'slow_queries', 'repeated_queries')
+
+    def __init__(self, view, status, seconds, queries, db_seconds, render_seconds, response_bytes, slow_queries, repeated_queries):
+        self.view = view
+        self.status = status
+        self.seconds = seconds
+        self.queries = queries
+        self.db_seconds = db_seconds
+        self.render_seconds = render_seconds
+        self.response_bytes = response_bytes
+        # SQL of the flagged queries, with their durations or repeat counts
+        self.slow_queries = slow_queries
+        self.repeated_queries = repeated_queries
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction + 0.5) - 1)] if values else 0.0
+
+
+class RequestMetrics:
+    """Running totals per view since the process started, for the Prometheus endpoint, and the most
+    recent requests, for the rolling summary."""
+
+    # Totals kept per view, with the Prometheus metric each is exported as
+    TOTALS = (
+        ('requests', 'inventory_requests_total', 'counter', "Requests handled."),
+        ('seconds', 'inventory_request_seconds_total', 'counter', "Time spent handling requests."),
+        ('queries', 'inventory_request_queries_total', 'counter', "SQL queries run by requests."),
+        ('db_seconds', 'inventory_request_db_seconds_total', 'counter', "Time spent in SQL queries."),
+        ('render_seconds', 'inventory_request_render_seconds_total', 'counter', "Time spent rendering templates."),
+        ('response_bytes', 'inventory_response_bytes_total', 'counter', "Bytes of non-streaming response bodies."),
+        ('slow_queries', 'inventory_slow_queries_total', 'counter', "Queries slower than INVENTORY_SLOW_QUERY_MS."),
+        ('repeated_queries', 'inventory_repeated_queries_total', 'counter', "Queries repeated within a request at least INVENTORY_REPEATED_QUERY_THRESHOLD times."),
+    )
+
+    def __init__(self, window):
+        self.recent = deque(maxlen=window)
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, request_record):
+        with self._lock:
+            self.recent.append(request_record)
+            totals = self.totals.setdefault(request_record.view, Counter())
+            totals['requests'] += 1
+            totals['seconds'] += request_record.seconds
+            totals['queries'] += request_record.queries
+            totals['db_seconds'] += request_record.db_seconds
+            totals['render_seconds'] += request_record.render_seconds
+            totals['response_bytes'] += request_record.response_bytes or 0
+            totals['slow_queries'] += len(request_record.slow_queries)
+            totals['repeated_queries'] += len(request_record.repeated_queries)
+
+    def prometheus(self):
+        """The totals in the Prometheus text exposition format."""
+        with self._lock:
+            totals = {view: Counter(view_totals) for view, view_totals in self.totals.items()}
+        lines = []
+        for key, name, metric_type, description in self.TOTALS:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for view in sorted(totals):
+                label = view.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{name}{{view="{label}"}} {totals[view][key]}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Per view statistics of the recent requests, with the queries flagged among them."""
+        with self._lock:
+            recent = list(self.recent)
+        by_view = {}
+        for request_record in recent:
+            by_view.setdefault(request_record.view, []).append(request_record)
+        views = {}
+        for view, records in sorted(by_view.items()):
+            views[view] = {
+                'requests': len(records),
+                'p50_ms': _percentile([record.seconds for record in records], 0.5) * 1000,
+                'p95_ms': _percentile([record.seconds for record in records], 0.95) * 1000,
+                'mean_queries': sum(record.queries for record in records) / len(records),
+                'mean_db_ms': sum(record.db_seconds for record in records) / len(records) * 1000,
+                'mean_render_ms': sum(record.render_seconds for record in records) / len(records) * 1000,
+                'mean_response_bytes': sum(record.response_bytes or 0 for record in records) / len(records),
+                'slow_queries': [query for record in records for query in record.slow_queries][-10:],
+                'repeated_queries': [query for record in records for query in record.repeated_queries][-10:],
+            }
+        return {'window': self.recent.maxlen, 'requests': len(recent), 'views': views}
+
+    def clear(self):
+        with self._lock:
+            self.recent.clear()
+            self.totals.clear()
+
+
+_request_metrics = None
+_request_metrics_lock = threading.Lock()
+
+
+def get_request_metrics():
+    """Return the process wide RequestMetrics, creating it on first use."""
+    global _request_metrics
+    if _request_metrics is None:
+        with _request_metrics_lock:
+            if _request_metrics is None:
+                _request_metrics = RequestMetrics(getattr(settings, 'INVENTORY_INSTRUMENTATION_WINDOW', DEFAULT_INSTRUMENTATION_WINDOW))
+    return _request_metrics
+
+
+class InstrumentationMiddleware:
+    """Record the view, SQL queries, database time, template render time and response size of every request.
+
+    Queries slower than INVENTORY_SLOW_QUERY_MS and queries run INVENTORY_REPEATED_QUERY_THRESHOLD
+    or more times in one request are flagged and logged. The results are served by the metrics
+    endpoint in the Prometheus format and by the instrumentation summary endpoint.
+
+    Add to MIDDLEWARE as 'InventoryManagementWebApp.instrumentation.InstrumentationMiddleware' and set
+    INVENTORY_INSTRUMENTATION = True. While the setting is off, Django drops the middleware at startup,
+    so it costs nothing. Async views are run behind it in a thread, so their queries are recorded too."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INVENTORY_INSTRUMENTATION', DEFAULT_INSTRUMENTATION):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _install_render_timing()
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        timer = RenderTimer()
+        token = _render_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            _render_timer.reset(token)
+        seconds = time.perf_counter() - started
+        self.record(request, response, seconds, recorder.queries, timer.seconds)
+        return response
+
+    def record(self, request, response, seconds, queries, render_seconds):
+        resolver_match = getattr(request, 'resolver_match', None)
+        view = resolver_match.view_name if resolver_match is not None else 'unresolved'
+        slow_query_seconds = getattr(settings, 'INVENTORY_SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS) / 1000
+        repeated_query_threshold = getattr(settings, 'INVENTORY_REPEATED_QUERY_THRESHOLD', DEFAULT_REPEATED_QUERY_THRESHOLD)
+        slow_queries = [
+            {'sql': sql, 'ms': round(duration * 1000, 3)}
+            for sql, duration in queries if duration >= slow_query_seconds
+        ]
+        repeated_queries = [
+            {'sql': sql, 'count': count}
+            for sql, count in Counter(sql for sql, _ in queries).items() if count >= repeated_query_threshold
+        ]
+        for query in slow_queries:
+            logger.warning("Slow query in %s (%.1fms): %s", view, query['ms'], query['sql'])
+        for query in repeated_queries:
+            logger.warning("Query repeated %d times in %s: %s", query['count'], view, query['sql'])
+        get_request_metrics().record(RequestRecord(
+            view=view,
+            status=response.status_code,
+            seconds=seconds,
+            queries=len(queries),
+            db_seconds=sum(duration for _, duration in queries),
+            render_seconds=render_seconds,
+            response_bytes=None if response.streaming else len(response.content),
+            slow_queries=slow_queries,
+            repeated_queries=repeated_queries,
+        ))
@@ -0,0 +1,219 @@
+import http.client
+import json
+import re
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from .warehouse_data import LABEL_PREFIXES
+
+# Seconds to wait for a response before counting the request as failed
+DEFAULT_REQUEST_TIMEOUT = 30
+
+CSRF_FIELD = 'csrfmiddlewaretoken'
+CSRF_COOKIE = 'csrftoken'
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+# Record ids of the rows of a product table
+PRODUCT_ROW = re.compile(r'<tr id="(\d+)"')
+# Form fields whose values are left out of request logs, and the value recorded in their place
+REDACTED_FIELDS = ('password',)
+REDACTED = '<redacted>'
+
+
+def _percentile_ms(latencies, fraction):
+    return latencies[max(0, int(len(latencies) * fraction + 0.5) - 1)] * 1000
+
+
+class LoadReport:
+    """Latencies and statuses of the requests sent during a load test, per endpoint.
+    Requests that failed to get a response are recorded with status 0."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.statuses = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint, seconds, status):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 0 or status >= 400:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def _endpoint_summary(self, latencies, errors, statuses, elapsed):
+        latencies = sorted(latencies)
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'error_rate': errors / len(latencies) if latencies else 0.0,
+            'requests_per_second': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': _percentile_ms(latencies, 0.5),
+            'p90_ms': _percentile_ms(latencies, 0.9),
+            'p95_ms': _percentile_ms(latencies, 0.95),
+            'p99_ms': _percentile_ms(latencies, 0.99),
+            'max_ms': latencies[-1] * 1000,
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        }
+
+    def summary(self):
+        """Throughput, latency percentiles and error rates of each endpoint and of all requests together."""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        with self._lock:
+            endpoints = {
+                endpoint: self._endpoint_summary(latencies, self.errors.get(endpoint, 0), self.statuses[endpoint], elapsed)
+                for endpoint, latencies in sorted(self.latencies.items())
+            }
+            all_statuses = {}
+            for statuses in self.statuses.values():
+                for status, count in statuses.items():
+                    all_statuses[status] = all_statuses.get(status, 0) + count
+            all_latencies = [seconds for latencies in self.latencies.values() for seconds in latencies]
+        total = self._endpoint_summary(all_latencies, sum(self.errors.values()), all_statuses, elapsed) if all_latencies else None
+        return {'seconds': elapsed, 'total': total, 'endpoints': endpoints}
+
+
+class HttpSession:
+    """A browser-like session with the dashboard over one keep-alive HTTP connection.
+
+    Cookies set by the server, such as the session and CSRF cookies, are sent back with every
+    request, and the CSRF token of the last page that had a form is added to every POST. Redirects
+    are not followed. Until a page with a form has been read since the CSRF cookie was last set, the
+    cookie's value is sent as the token. Every request is timed into the LoadReport under the given endpoint name,
+    and, if a recorder list is given, appended to it as a replayable request log entry with the
+    REDACTED_FIELDS, such as the password, recorded as REDACTED."""
+
+    def __init__(self, base_url, report, name=None, recorder=None, timeout=DEFAULT_REQUEST_TIMEOUT):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(url.netloc, timeout=timeout)
+        self.base_url = base_url.rstrip('/')
+        self.prefix = url.path.rstrip('/')
+        self.report = report
+        self.name = name
+        self.recorder = recorder
+        self.cookies = {}
+        self.csrf_token = None
+
+    def request(self, method, path, fields=None, endpoint=None):
+        """Send a request and return its status and body; the status is 0 if no response arrived."""
+        headers = {'Referer': self.base_url + path}
+        body = None
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        if method == 'POST':
+            fields = dict(fields or {})
+            csrf_token = self.csrf_token or self.cookies.get(CSRF_COOKIE)
+            if csrf_token:
+                fields[CSRF_FIELD] = csrf_token
+            body = urlencode(fields, doseq=True)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.recorder is not None:
+            self.recorder.append({'session': self.name, 'method': method, 'path': path, 'data': {
+                name: REDACTED if name in REDACTED_FIELDS else value for name, value in (fields or {}).items() if name != CSRF_FIELD
+            }})
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read().decode('utf-8', 'replace')
+        except (OSError, http.client.HTTPException):
+            # Drop the broken connection; the next request opens a new one
+            self.connection.close()
+            self.report.record(endpoint or f'{method} {path}', time.perf_counter() - started, 0)
+            return 0, ''
+        self.report.record(endpoint or f'{method} {path}', time.perf_counter() - started, response.status)
+        for header in response.headers.get_all('Set-Cookie') or ():
+            for name, morsel in SimpleCookie(header).items():
+                if morsel['max-age'] == '0' or not morsel.value:
+                    self.cookies.pop(name, None)
+                else:
+                    self.cookies[name] = morsel.value
+                if name == CSRF_COOKIE:
+                    # Signing in rotates the CSRF secret; tokens from earlier pages no longer match it
+                    self.csrf_token = None
+        token = CSRF_TOKEN.search(content)
+        if token:
+            self.csrf_token = token.group(1)
+        return response.status, content
+
+    def close(self):
+        self.connection.close()
+
+
+def scanner_session(session, username, password, rounds, rng, search_terms=LABEL_PREFIXES):
+    """Run one scanner's shift: sign in, then for each round search for pallets by label prefix and move
+    one, search again and edit the quantity of one, then sign out. Returns the number of updates sent."""
+    updates = 0
+    session.request('GET', '/login/', endpoint='login_page')
+    status, _ = session.request('POST', '/login/', {'username': username, 'password': password}, endpoint='login')
+    if status != 302:
+        return updates
+    session.request('GET', '/select-operations/', endpoint='select_operations')
+    for _ in range(rounds):
+        search = {'label_id': rng.choice(search_terms)}
+        _, page = session.request('POST', '/update-inventory-product-location/', search, endpoint='search_location')
+        record_ids = PRODUCT_ROW.findall(page)
+        if record_ids:
+            session.request('POST', '/update-inventory-product-location/', {
+                **search, 'product_id': rng.choice(record_ids), 'new_storage_location': f'{rng.choice("ABCDEF")}{rng.randint(1, 999):03d}',
+            }, endpoint='update_location')
+            updates += 1
+        _, page = session.request('POST', '/update-inventory-product-quantity-on-pallet/', search, endpoint='search_quantity')
+        record_ids = PRODUCT_ROW.findall(page)
+        if record_ids:
+            session.request('POST', '/update-inventory-product-quantity-on-pallet/', {
+                **search, 'product_id': rng.choice(record_ids), 'new_quantity': rng.randint(0, 500),
+            }, endpoint='update_quantity')
+            updates += 1
+    session.request('GET', '/logout/', endpoint='logout')
+    return updates
+
+
+def read_request_log(stream):
+    """Read a request log of one JSON object per line, each with the method and path of a request, the
+    form data of POSTs under data, and the session it belongs to. Returns the requests of each session, in order."""
+    sessions = {}
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+            sessions.setdefault(entry.get('session'), []).append((entry['method'].upper(), entry['path'], entry.get('data') or {}))
+        except (ValueError, KeyError, AttributeError) as e:
+            raise ValueError(f"Line {line_number} of the request log is not a request: {e}")
+    return list(sessions.values())
+
+
+def replay_session(session, requests, password=None):
+    """Send the requests of one recorded session in order, with this session's own cookies and CSRF token.
+    Redacted fields are sent with the given password in their place."""
+    for method, path, data in requests:
+        session.request(method, path, {name: password if value == REDACTED else value for name, value in data.items()})
+
+
+def run_concurrently(work, workers):
+    """Run the callables in work on at most workers threads at a time."""
+    pending = list(work)
+    pending.reverse()
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                task = pending.pop()
+            task()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(workers, len(pending)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from InventoryManagementWebApp.archive import DEFAULT_ARCHIVE_BATCH_SIZE, archive_transaction_history
+
+
+class Command(BaseCommand):
+    help = "Move old transaction history records into the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=None,
+                            help="Archive records older than this many days (default: TRANSACTION_HISTORY_ARCHIVE_AFTER_DAYS).")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_ARCHIVE_BATCH_SIZE,
+                            help="Number of records moved per transaction.")
+
+    def handle(self, *args, **options):
+        total = 0
+        for archived in archive_transaction_history(options['older_than_days'], options['batch_size']):
+            total += archived
+            self.stdout.write(f"Archived {archived} transaction history records.")
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} transaction history records in total."))
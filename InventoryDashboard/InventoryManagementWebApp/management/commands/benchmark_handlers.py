@@ -0,0 +1,124 @@
+import asyncio
+import queue
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+from InventoryManagementWebApp.models import Inventory
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request overhead of Django's request handlers: the sync JSON API through the WSGI "
+        "handler on a pool of worker threads, against the async JSON API through the ASGI handler on one "
+        "event loop. Each simulated scanner repeatedly searches by label prefix and reads one product. "
+        "Requests are passed to the handlers in process with Django's test clients, so no sockets, HTTP "
+        "parsing, server workers or processes are involved, and the results are not the serving capacity "
+        "of a deployment. To compare deployments, serve the project with gunicorn and uvicorn and run "
+        "load_test against each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('associate', help="Name of the associate the scanners log in as.")
+        parser.add_argument('--scanners', type=int, default=50, help="Number of scanners sending requests at once (default: 50).")
+        parser.add_argument('--requests', type=int, default=20, help="Search and read rounds sent by each scanner (default: 20).")
+        parser.add_argument('--workers', type=int, default=8, help="Threads sending requests to the WSGI handler (default: 8).")
+        parser.add_argument('--label-prefix', default='', help="Label ID prefix the scanners search for.")
+
+    def handle(self, *args, **options):
+        try:
+            self.user = User.objects.get(username=options['associate'])
+        except User.DoesNotExist:
+            raise CommandError(f"No associate named {options['associate']}.")
+        self.record_ids = list(Inventory.live_items.values_list('record_id', flat=True)[:1000])
+        if not self.record_ids:
+            raise CommandError("There are no live inventory products to read.")
+        self.search = {'label_id': options['label_prefix'], 'page_size': 20, 'fields': 'record_id,quantity_on_pallet'}
+        rounds = options['scanners'] * options['requests']
+        # The in-process clients send requests as testserver
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            wsgi = self.run_wsgi(rounds, options['workers'])
+            asgi = asyncio.run(self.run_asgi(options['scanners'], options['requests']))
+        for name, result in (('WSGI handler', wsgi), ('ASGI handler', asgi)):
+            self.stdout.write(
+                f"{name}: {result['requests']} requests in {result['seconds']:.2f}s, "
+                f"{result['requests_per_second']:.1f} requests/s, p50 {result['p50_ms']:.1f}ms, "
+                f"p95 {result['p95_ms']:.1f}ms, {result['errors']} errors"
+            )
+        if wsgi['requests_per_second']:
+            self.stdout.write(self.style.SUCCESS(
+                f"ASGI handler throughput is {asgi['requests_per_second'] / wsgi['requests_per_second']:.2f}x "
+                f"the WSGI handler's, in process."
+            ))
+
+    def run_wsgi(self, rounds, workers):
+        latencies = []
+        errors = []
+        # Sign the clients in before timing starts; a client is used by one worker thread at a time
+        clients = queue.Queue()
+        for _ in range(workers):
+            client = Client(raise_request_exception=False)
+            client.force_login(self.user)
+            clients.put(client)
+
+        def scanner_round(_):
+            # Like a threaded WSGI server, each worker thread handles one request at a time
+            client = clients.get()
+            try:
+                for path, params in self.round_requests('/api/inventory-products/'):
+                    started = time.perf_counter()
+                    response = client.get(path, params)
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code >= 400:
+                        errors.append(response.status_code)
+            finally:
+                clients.put(client)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(scanner_round, range(rounds)))
+        return summarize(latencies, len(errors), time.perf_counter() - started)
+
+    async def run_asgi(self, scanners, requests):
+        latencies = []
+        errors = []
+        clients = []
+        for _ in range(scanners):
+            client = AsyncClient(raise_request_exception=False)
+            await client.aforce_login(self.user)
+            clients.append(client)
+
+        async def scanner(client):
+            for _ in range(requests):
+                for path, params in self.round_requests('/async-api/inventory-products/'):
+                    started = time.perf_counter()
+                    response = await client.get(path, params)
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code >= 400:
+                        errors.append(response.status_code)
+        started = time.perf_counter()
+        await asyncio.gather(*(scanner(client) for client in clients))
+        return summarize(latencies, len(errors), time.perf_counter() - started)
+
+    def round_requests(self, api_path):
+        """The requests of one scanner round: a search, then a read of one product."""
+        return [
+            (api_path, self.search),
+            (f'{api_path}{random.choice(self.record_ids)}/', {'fields': 'record_id,storage_location,quantity_on_pallet'}),
+        ]
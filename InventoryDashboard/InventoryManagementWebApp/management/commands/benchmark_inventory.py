@@ -0,0 +1,210 @@
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.http import QueryDict
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from InventoryManagementWebApp.cache import reset_inventory_cache
+from InventoryManagementWebApp.models import Associate, Inventory, TransactionHistory
+from InventoryManagementWebApp.pagination import inventory_rows
+from InventoryManagementWebApp.views import Middleware
+from InventoryManagementWebApp.warehouse_data import generate_warehouse
+
+from .generate_warehouse_data import add_generator_arguments, generator_options
+
+
+# Rows built by the list row benchmarks; their results are scaled to this many rows
+LIST_ROWS = 10000
+
+
+def query_data(**values):
+    data = QueryDict(mutable=True)
+    data.update({name: str(value) for name, value in values.items()})
+    return data
+
+
+def measure(operation, repeat):
+    """Time repeat calls of operation after one untimed call, which also counts the queries of a call."""
+    with CaptureQueriesContext(connection) as queries:
+        operation()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        'calls': repeat,
+        'queries': len(queries),
+        'min_ms': round(timings[0] * 1000, 3),
+        'median_ms': round(statistics.median(timings) * 1000, 3),
+        'p95_ms': round(timings[max(0, int(len(timings) * 0.95 + 0.5) - 1)] * 1000, 3),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot paths of the inventory against the data in the database and write the results as JSON: "
+        "reading product pages by each kind of filter, reading products with short and long transaction "
+        "histories, and creating, moving and editing products. With --rows, a seeded synthetic warehouse "
+        "is generated first. The write benchmarks change the data, so use a database set aside for benchmarking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=None, help="Generate a synthetic warehouse of this many items first.")
+        add_generator_arguments(parser)
+        parser.add_argument('--repeat', type=int, default=20, help="Timed calls per benchmark (default: 20).")
+        parser.add_argument('--associate', default='associate0001', help="Associate performing the writes (default: associate0001).")
+        parser.add_argument('--output', default=None, help="File to write the JSON results to (default: standard output).")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("Repeat each benchmark at least once.")
+        dataset = {}
+        long_history_items = None
+        if options['rows']:
+            started = time.perf_counter()
+            report = generate_warehouse(options['rows'], **generator_options(options))
+            dataset = {**report.as_dict(), 'generate_seconds': time.perf_counter() - started}
+            long_history_items = report.long_history_items
+        try:
+            associate = Associate.objects.get(name=options['associate'])
+        except Associate.DoesNotExist:
+            raise CommandError(f"No associate named {options['associate']}.")
+        dataset.update(items=Inventory.objects.count(), transactions=TransactionHistory.objects.count())
+        if not Inventory.live_items.exists():
+            raise CommandError("There are no live inventory products to benchmark; generate some with --rows.")
+        self.rng = random.Random(options['seed'])
+        # Time the database paths, not the inventory cache
+        with override_settings(INVENTORY_CACHE_BACKEND=None):
+            reset_inventory_cache()
+            results = {}
+            results.update(self.read_products_benchmarks(associate, options['repeat']))
+            results.update(self.read_product_benchmarks(long_history_items, options['repeat']))
+            results.update(self.list_row_benchmarks(options['repeat']))
+            results.update(self.write_benchmarks(associate, options['repeat']))
+        reset_inventory_cache()
+        output = json.dumps({
+            'dataset': dataset,
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'repeat': options['repeat'],
+            'results': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} benchmark results to {options['output']}."))
+        else:
+            self.stdout.write(output)
+
+    def sample_item(self):
+        record_ids = Inventory.live_items.values_list('record_id', flat=True)
+        last = record_ids.order_by('-record_id').first()
+        # Take the first live item at or after a random record id, so sampling stays cheap on large tables
+        return Inventory.live_items.filter(record_id__gte=self.rng.randint(1, last)).order_by('record_id').first() \
+            or Inventory.live_items.order_by('record_id').first()
+
+    def read_products_benchmarks(self, associate, repeat):
+        item = self.sample_item()
+        middle = self.sample_item()
+        word = max(item.product_description.split(), key=len)
+        cases = {
+            'first_page': query_data(),
+            'page_after_cursor': query_data(after=middle.record_id),
+            'product_id': query_data(product_id=item.record_id),
+            'label_id_prefix': query_data(label_id=item.label_id[:4]),
+            'label_id_exact': query_data(label_id=item.label_id),
+            'storage_location_prefix': query_data(storage_location=item.storage_location[:2]),
+            'quantity_on_pallet': query_data(quantity_on_pallet=item.quantity_on_pallet),
+            'product_description': query_data(product_description=word),
+            'scheduled_for_deletion': query_data(scheduled_for_deletion='on'),
+            'search': query_data(search=item.product_description[:12]),
+        }
+        return {
+            f'read_inventory_products.{name}': measure(lambda data=data: Middleware._read_inventory_products(data, associate), repeat)
+            for name, data in cases.items()
+        }
+
+    def read_product_benchmarks(self, long_history_items, repeat):
+        if long_history_items:
+            long_history_item = long_history_items[0]
+        else:
+            busiest = TransactionHistory.objects.values('inventory_item').annotate(transactions=Count('record_id')).order_by('-transactions').first()
+            long_history_item = busiest['inventory_item']
+        history = TransactionHistory.objects.filter(inventory_item=long_history_item).order_by('record_id').values_list('record_id', flat=True)
+        older_page = history[history.count() // 2]
+        cases = {
+            'short_history': query_data(),
+            'long_history': query_data(),
+            'long_history_older_page': query_data(history_before=older_page),
+        }
+        record_ids = {'short_history': self.sample_item().record_id, 'long_history': long_history_item, 'long_history_older_page': long_history_item}
+        return {
+            f'read_inventory_product.{name}': measure(lambda name=name, data=data: Middleware._read_inventory_product(record_ids[name], data), repeat)
+            for name, data in cases.items()
+        }
+
+    def list_row_benchmarks(self, repeat):
+        """Compare reading list rows as model instances with reading them as projected InventoryRows:
+        the CPU time to read them, and the memory they hold and take at peak, per LIST_ROWS rows."""
+        products = Inventory.live_items.order_by('record_id')[:LIST_ROWS]
+        rows = products.count()
+        results = {}
+        # all() gives each read a fresh queryset, so no read is served from an earlier one's result cache
+        for name, read in (('model_instances', lambda: list(products.all())), ('projected_rows', lambda: inventory_rows(products.all()))):
+            cpu_times = []
+            for _ in range(repeat):
+                started = time.process_time()
+                read()
+                cpu_times.append(time.process_time() - started)
+            tracemalloc.start()
+            try:
+                listed = read()
+                held, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            del listed
+            scale = LIST_ROWS / rows
+            results[f'list_rows.{name}'] = {
+                'rows': rows,
+                'cpu_ms_per_10k_rows': round(statistics.median(cpu_times) * 1000 * scale, 3),
+                'held_kib_per_10k_rows': round(held / 1024 * scale, 1),
+                'peak_kib_per_10k_rows': round(peak / 1024 * scale, 1),
+            }
+        return results
+
+    def write_benchmarks(self, associate, repeat):
+        labels = iter(range(10 ** 9))
+        locations = list(Inventory.live_items.values_list('storage_location', flat=True).distinct()[:100])
+        # Pick the items before timing starts, so only the writes are timed
+        moved_items = iter([self.sample_item() for _ in range(repeat + 1)])
+        edited_items = iter([self.sample_item() for _ in range(repeat + 1)])
+
+        def create():
+            Inventory.objects.create(label_id=f'BENCH{next(labels):09d}', product_description='Benchmark Product',
+                                     associate=associate, storage_location='HOLD', quantity_on_pallet=10)
+
+        def update_location():
+            next(moved_items).update_location(self.rng.choice(locations), associate)
+
+        def update_quantity():
+            next(edited_items).update_quantity(self.rng.randint(0, 500), associate)
+        return {
+            'inventory.create': measure(create, repeat),
+            'inventory.update_location': measure(update_location, repeat),
+            'inventory.update_quantity': measure(update_quantity, repeat),
+        }
@@ -0,0 +1,70 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from InventoryManagementWebApp.session_settings import SESSION_STORES, session_settings
+
+
+def is_session_query(query):
+    return 'django_session' in query['sql']
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of each session store: an associate signs in, sends signed in "
+        "requests and signs out, and the time and sessions table queries of each step are reported. "
+        "'db' is the store the project used before session_settings()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('associate', help="Name of the associate to sign in as.")
+        parser.add_argument('password', help="Password of the associate.")
+        parser.add_argument('--requests', type=int, default=200, help="Signed in requests sent per store (default: 200).")
+        parser.add_argument('--stores', nargs='+', choices=SESSION_STORES, default=list(SESSION_STORES),
+                            help="Session stores to measure (default: all of them).")
+        parser.add_argument('--path', default='/select-operations/', help="Page requested while signed in (default: /select-operations/).")
+
+    def handle(self, *args, **options):
+        if not User.objects.filter(username=options['associate']).exists():
+            raise CommandError(f"No associate named {options['associate']}.")
+        for store in options['stores']:
+            # The in-process client sends requests as testserver
+            with override_settings(ALLOWED_HOSTS=['testserver'], **session_settings(store)):
+                result = self.measure(options['associate'], options['password'], options['path'], options['requests'])
+            self.stdout.write(
+                f"{store}: login {result['login_ms']:.2f}ms ({result['login_session_queries']} session queries), "
+                f"{result['request_ms']:.3f}ms per request ({result['request_session_queries']:.2f} session queries), "
+                f"logout {result['logout_ms']:.2f}ms ({result['logout_session_queries']} session queries)"
+            )
+
+    def measure(self, username, password, path, requests):
+        client = Client()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.post('/login/', {'username': username, 'password': password})
+            login_seconds = time.perf_counter() - started
+        if response.status_code != 302:
+            raise CommandError("Could not sign in; check the associate's name and password.")
+        login_session_queries = len([query for query in queries if is_session_query(query)])
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(path)
+            request_seconds = time.perf_counter() - started
+        request_session_queries = len([query for query in queries if is_session_query(query)])
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            client.get('/logout/')
+            logout_seconds = time.perf_counter() - started
+        return {
+            'login_ms': login_seconds * 1000,
+            'login_session_queries': login_session_queries,
+            'request_ms': request_seconds * 1000 / requests,
+            'request_session_queries': request_session_queries / requests,
+            'logout_ms': logout_seconds * 1000,
+            'logout_session_queries': len([query for query in queries if is_session_query(query)]),
+        }
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from InventoryManagementWebApp.export import EXPORT_FORMATS, HISTORY_EXPORT_FIELDS, INVENTORY_EXPORT_FIELDS, export_lines, history_export_rows, inventory_export_rows
+from InventoryManagementWebApp.views import Middleware
+
+
+class Command(BaseCommand):
+    help = "Stream the inventory products or the transaction history to a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=('inventory', 'history'), help="What to export.")
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS, default='csv', help="Export format (default: csv).")
+        parser.add_argument('--output', default=None, help="File to write (default: standard output).")
+        parser.add_argument('--label-id', help="Inventory: label ID prefix.")
+        parser.add_argument('--storage-location', help="Inventory: storage location prefix.")
+        parser.add_argument('--product-description', help="Inventory: text in the product description.")
+        parser.add_argument('--scheduled-for-deletion', action='store_true', help="Inventory: export the items scheduled for deletion instead of the live items.")
+        parser.add_argument('--product-id', help="History: record ID of the item whose history is exported.")
+        parser.add_argument('--action-name', help="History: action code, such as MOVE or QUAN.")
+        parser.add_argument('--since', help="History: first date or datetime to export.")
+        parser.add_argument('--until', help="History: date or datetime to export up to; a date includes the whole day.")
+        parser.add_argument('--archived', action='store_true', help="History: export the archived history.")
+
+    def handle(self, *args, **options):
+        query_data = QueryDict(mutable=True)
+        for name in ('label_id', 'storage_location', 'product_description', 'product_id', 'action_name', 'since', 'until'):
+            if options[name]:
+                query_data[name] = options[name]
+        for name in ('scheduled_for_deletion', 'archived'):
+            if options[name]:
+                query_data[name] = 'on'
+        try:
+            if options['table'] == 'inventory':
+                products, _, _ = Middleware._filter_inventory_products(query_data)
+                fields, rows = INVENTORY_EXPORT_FIELDS, inventory_export_rows(products)
+            else:
+                fields, rows = HISTORY_EXPORT_FIELDS, history_export_rows(query_data)
+        except ValueError as e:
+            raise CommandError(f"Invalid filter: {e}")
+        lines = export_lines(options['export_format'], fields, rows)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,45 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from InventoryManagementWebApp.warehouse_data import DEFAULT_ASSOCIATE_PASSWORD, DEFAULT_GENERATE_BATCH_SIZE, generate_warehouse
+
+
+def add_generator_arguments(parser):
+    """Add the options of generate_warehouse, shared with the benchmark command."""
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the generator; the same seed gives the same data (default: 0).")
+    parser.add_argument('--associates', type=int, default=20, help="Associates performing the transactions (default: 20).")
+    parser.add_argument('--history-per-item', type=int, default=3, help="Average transactions per item, including its creation (default: 3).")
+    parser.add_argument('--long-histories', type=int, default=10, help="Items given a long transaction history (default: 10).")
+    parser.add_argument('--long-history-length', type=int, default=1000, help="Extra transactions of each long history (default: 1000).")
+    parser.add_argument('--deleted-fraction', type=float, default=0.01, help="Share of the items scheduled for deletion (default: 0.01).")
+    parser.add_argument('--password', default=DEFAULT_ASSOCIATE_PASSWORD, help="Password of the generated associates.")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_GENERATE_BATCH_SIZE, help="Rows per bulk insert (default: 5000).")
+
+
+def generator_options(options):
+    return {name: options[name] for name in ('seed', 'associates', 'history_per_item', 'long_histories', 'long_history_length',
+                                             'deleted_fraction', 'password', 'batch_size')}
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a seeded synthetic warehouse for benchmarks and load tests: inventory items, "
+        "their transaction histories and the associates named associate0001 and up who performed them. "
+        "Use a database set aside for benchmarking; the generated rows are added to whatever it holds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('rows', type=int, help="Number of inventory items to generate, such as 10000 to 5000000.")
+        add_generator_arguments(parser)
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['associates'] < 1:
+            raise CommandError("Generate at least one item and one associate.")
+        started = time.perf_counter()
+        report = generate_warehouse(options['rows'], **generator_options(options))
+        self.stdout.write(json.dumps(report.as_dict()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {report.items} items and {report.transactions} transactions in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from InventoryManagementWebApp.bulk_import import MANIFEST_FORMATS, import_inventory_manifest
+from InventoryManagementWebApp.models import Associate
+
+
+class Command(BaseCommand):
+    help = "Create inventory products from a CSV or JSON manifest file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', help="Path to the manifest file.")
+        parser.add_argument('--associate', required=True, help="Name of the associate recorded as creating the products.")
+        parser.add_argument('--format', dest='manifest_format', choices=MANIFEST_FORMATS, default=None,
+                            help="Manifest format (default: taken from the file extension).")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Number of rows written per transaction (default: INVENTORY_IMPORT_BATCH_SIZE).")
+
+    def handle(self, *args, **options):
+        try:
+            associate = Associate.objects.get(name=options['associate'])
+        except Associate.DoesNotExist:
+            raise CommandError(f"No associate named {options['associate']}.")
+        manifest_format = options['manifest_format'] or options['manifest'].rsplit('.', 1)[-1].lower()
+        if manifest_format not in MANIFEST_FORMATS:
+            raise CommandError(f"Cannot tell the manifest format of {options['manifest']}; pass --format.")
+        with open(options['manifest'], encoding='utf-8-sig', newline='') as manifest:
+            report = import_inventory_manifest(manifest, manifest_format, associate, options['batch_size'])
+        for row_number, error in report.errors:
+            self.stderr.write(f"Row {row_number}: {error}" if row_number else error)
+        self.stdout.write(self.style.SUCCESS(f"Created {report.created} inventory products; rejected {report.rejected} rows."))
@@ -0,0 +1,94 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from InventoryManagementWebApp.loadtest import HttpSession, LoadReport, read_request_log, replay_session, run_concurrently, scanner_session
+from InventoryManagementWebApp.warehouse_data import DEFAULT_ASSOCIATE_PASSWORD
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running dashboard over HTTP and report throughput, latency percentiles and error rates "
+        "per endpoint. By default, simulated scanners each sign in as one of the generated associates "
+        "(see generate_warehouse_data), search for pallets, move one, search again, edit one's quantity and "
+        "sign out, all at once. With --replay, the sessions of a request log are replayed instead, such as "
+        "one written with --record. Serve the project with a WSGI server (gunicorn InventoryDashboard.wsgi) "
+        "or an ASGI server (uvicorn InventoryDashboard.asgi:application), run the load test against each with "
+        "--deployment naming it, and compare the results. Only the Python standard library is used."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Address of the dashboard (default: http://127.0.0.1:8000).")
+        parser.add_argument('--deployment', default='', help="Name of the deployment under test, such as wsgi or asgi, for the results.")
+        parser.add_argument('--scanners', type=int, default=300, help="Scanners running at once (default: 300).")
+        parser.add_argument('--rounds', type=int, default=5, help="Search and update rounds of each scanner (default: 5).")
+        parser.add_argument('--associates', type=int, default=20, help="Scanners sign in as associate0001 up to this one (default: 20).")
+        parser.add_argument('--password', default=DEFAULT_ASSOCIATE_PASSWORD,
+                            help="Password of the associates; request logs leave it out, and replays send it in its place.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the scanners' choices (default: 0).")
+        parser.add_argument('--record', default=None, help="Write the requests the scanners send to this file as a request log.")
+        parser.add_argument('--replay', default=None, help="Replay the sessions of this request log instead of running scanners.")
+        parser.add_argument('--concurrency', type=int, default=50, help="Sessions replayed at once (default: 50).")
+        parser.add_argument('--output', default=None, help="Also write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        if options['replay']:
+            try:
+                with open(options['replay']) as log:
+                    sessions = read_request_log(log)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read the request log: {e}")
+            report = LoadReport()
+            run_concurrently([self.replay(options['url'], report, requests, options['password']) for requests in sessions], options['concurrency'])
+        else:
+            if options['scanners'] < 1 or options['associates'] < 1:
+                raise CommandError("Run at least one scanner as at least one associate.")
+            recorder = [] if options['record'] else None
+            report = LoadReport()
+            run_concurrently([
+                self.scanner(options, report, recorder, number) for number in range(options['scanners'])
+            ], options['scanners'])
+            if recorder is not None:
+                with open(options['record'], 'w') as log:
+                    for entry in recorder:
+                        log.write(json.dumps(entry) + '\n')
+        report.finish()
+        results = {'deployment': options['deployment'], 'url': options['url'], **report.summary()}
+        self.write_results(results)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(json.dumps(results, indent=2) + '\n')
+
+    def scanner(self, options, report, recorder, number):
+        def run():
+            session = HttpSession(options['url'], report, name=f'scanner{number}', recorder=recorder)
+            username = f"associate{number % options['associates'] + 1:04d}"
+            try:
+                scanner_session(session, username, options['password'], options['rounds'], random.Random(options['seed'] * 100003 + number))
+            finally:
+                session.close()
+        return run
+
+    def replay(self, url, report, requests, password):
+        def run():
+            session = HttpSession(url, report)
+            try:
+                replay_session(session, requests, password)
+            finally:
+                session.close()
+        return run
+
+    def write_results(self, results):
+        name = f" ({results['deployment']})" if results['deployment'] else ''
+        if results['total'] is None:
+            raise CommandError("No requests were sent.")
+        for endpoint, summary in [('all requests', results['total'])] + list(results['endpoints'].items()):
+            self.stdout.write(
+                f"{endpoint}: {summary['requests']} requests, {summary['requests_per_second']:.1f} requests/s, "
+                f"p50 {summary['p50_ms']:.1f}ms, p95 {summary['p95_ms']:.1f}ms, p99 {summary['p99_ms']:.1f}ms, "
+                f"{summary['error_rate']:.1%} errors"
+            )
+        total = results['total']
+        style = self.style.SUCCESS if not total['errors'] else self.style.WARNING
+        self.stdout.write(style(f"Load test{name} finished in {results['seconds']:.2f}s with {total['errors']} errors."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from InventoryManagementWebApp.purge import purge_expired_inventory
+
+
+class Command(BaseCommand):
+    help = "Delete inventory items whose scheduled deletion wait has run out, along with their history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Number of items deleted per transaction (default: INVENTORY_PURGE_BATCH_SIZE).")
+        parser.add_argument('--sleep', type=float, default=None,
+                            help="Seconds to pause between batches (default: INVENTORY_PURGE_SLEEP_SECONDS).")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Count what would be purged without deleting anything.")
+
+    def handle(self, *args, **options):
+        verb = "Would purge" if options['dry_run'] else "Purged"
+        total = 0
+        for batch_number, purged in enumerate(purge_expired_inventory(options['batch_size'], options['sleep'], options['dry_run']), start=1):
+            total += purged['inventory']
+            self.stdout.write(
+                f"Batch {batch_number}: {verb} {purged['inventory']} inventory items, "
+                f"{purged['transaction_history']} history records and "
+                f"{purged['archived_transaction_history']} archived history records."
+            )
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} inventory items in total."))
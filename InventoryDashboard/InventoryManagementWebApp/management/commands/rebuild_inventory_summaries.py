@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from InventoryManagementWebApp.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the location and product summaries from the live inventory items."
+
+    def handle(self, *args, **options):
+        locations, products = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt summaries of {locations} storage locations and {products} products."))
@@ -0,0 +1,43 @@
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.utils.functional import SimpleLazyObject
+
+
+def get_associate(request):
+    """Return the associate of the signed in user, or None, resolving it at most once per request."""
+    if not hasattr(request, '_cached_associate'):
+        user = request.user
+        request._cached_associate = getattr(user, 'associate', None) if user.is_authenticated else None
+    return request._cached_associate
+
+
+async def aget_associate(request):
+    """Async version of get_associate."""
+    if not hasattr(request, '_cached_associate'):
+        user = await request.auser()
+        request._cached_associate = await sync_to_async(getattr)(user, 'associate', None) if user.is_authenticated else None
+    return request._cached_associate
+
+
+class AssociateMiddleware:
+    """Set request.associate to the signed in user's associate, resolved once per request.
+
+    Like request.user, request.associate is lazy, and async views use await request.aassociate()
+    instead. With AssociateBackend the associate is loaded in the same query as the user, so
+    resolving it costs no query of its own. Add after AuthenticationMiddleware in MIDDLEWARE as
+    'InventoryManagementWebApp.middleware.AssociateMiddleware'."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.associate = SimpleLazyObject(lambda: get_associate(request))
+        request.aassociate = partial(aget_associate, request)
+        # Under ASGI this returns the coroutine of the async handler chain for the caller to await
+        return self.get_response(request)
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:13
+
+import InventoryManagementWebApp.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Inventory',
+            fields=[
+                ('record_id', models.AutoField(primary_key=True, serialize=False)),
+                ('label_id', models.CharField(max_length=100, validators=[InventoryManagementWebApp.validators.validate_not_whitespace])),
+                ('storage_location', models.CharField(default='HOLD', max_length=4)),
+                ('quantity_on_pallet', models.IntegerField(default=-100)),
+                ('product_description', models.CharField(max_length=200)),
+                ('scheduled_for_deletion', models.DateTimeField(blank=True, default=None, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Associate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('password', models.CharField(max_length=20)),
+                ('is_manager', models.BooleanField(default=False)),
+                ('is_authenticated', models.BooleanField(default=False)),
+                ('django_user', models.OneToOneField(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TransactionHistory',
+            fields=[
+                ('record_id', models.AutoField(primary_key=True, serialize=False)),
+                ('action_name', models.CharField(choices=[('CREA', 'Created'), ('DELE', 'Deleted'), ('MOVE', 'Move Location'), ('QUAN', 'Edit Quantity')], default='CREA', max_length=4)),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('previous_quantity', models.IntegerField(blank=True, null=True)),
+                ('new_quantity', models.IntegerField(blank=True, null=True)),
+                ('previous_location', models.CharField(blank=True, max_length=4, null=True)),
+                ('new_location', models.CharField(blank=True, max_length=4, null=True)),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='InventoryManagementWebApp.inventory')),
+                ('performed_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='InventoryManagementWebApp.associate')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='inventory',
+            name='transaction_history',
+            field=models.OneToOneField(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to='InventoryManagementWebApp.transactionhistory'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InventoryManagementWebApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['label_id'], name='inventory_label_id_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['storage_location'], name='inventory_location_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
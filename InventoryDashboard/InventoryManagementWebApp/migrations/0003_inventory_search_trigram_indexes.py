@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Trigram GIN indexes back PostgresSearchBackend; other databases use the in-process index
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS inventory_description_trgm_idx ON "InventoryManagementWebApp_inventory" '
+        'USING gin (product_description gin_trgm_ops)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS inventory_label_id_trgm_idx ON "InventoryManagementWebApp_inventory" '
+        'USING gin (label_id gin_trgm_ops)'
+    )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS inventory_description_trgm_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS inventory_label_id_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InventoryManagementWebApp', '0002_inventory_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InventoryManagementWebApp', '0003_inventory_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTransactionHistory',
+            fields=[
+                ('record_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('action_name', models.CharField(choices=[('CREA', 'Created'), ('DELE', 'Deleted'), ('MOVE', 'Move Location'), ('QUAN', 'Edit Quantity')], max_length=4)),
+                ('timestamp', models.DateTimeField()),
+                ('previous_quantity', models.IntegerField(blank=True, null=True)),
+                ('new_quantity', models.IntegerField(blank=True, null=True)),
+                ('previous_location', models.CharField(blank=True, max_length=4, null=True)),
+                ('new_location', models.CharField(blank=True, max_length=4, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transactionhistory',
+            index=models.Index(fields=['inventory_item', 'timestamp'], name='history_item_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionhistory',
+            index=models.Index(fields=['timestamp'], name='history_timestamp_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedtransactionhistory',
+            name='inventory_item',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='InventoryManagementWebApp.inventory'),
+        ),
+        migrations.AddField(
+            model_name='archivedtransactionhistory',
+            name='performed_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='InventoryManagementWebApp.associate'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransactionhistory',
+            index=models.Index(fields=['inventory_item', 'timestamp'], name='archive_item_timestamp_idx'),
+        ),
+    ]
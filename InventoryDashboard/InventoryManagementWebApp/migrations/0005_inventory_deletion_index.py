@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InventoryManagementWebApp', '0004_transaction_history_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['scheduled_for_deletion'], name='inventory_deletion_idx'),
+        ),
+    ]
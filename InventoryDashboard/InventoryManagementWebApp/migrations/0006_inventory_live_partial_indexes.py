@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InventoryManagementWebApp', '0005_inventory_deletion_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inventory',
+            name='inventory_label_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='inventory',
+            name='inventory_location_idx',
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('scheduled_for_deletion__isnull', True)), fields=['label_id'], name='inventory_live_label_id_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('scheduled_for_deletion__isnull', True)), fields=['storage_location'], name='inventory_live_location_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('scheduled_for_deletion__isnull', True)), fields=['record_id'], name='inventory_live_record_id_idx'),
+        ),
+    ]
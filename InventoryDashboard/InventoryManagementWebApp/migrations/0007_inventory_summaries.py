@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:24
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Sum, Value, When
+
+
+def populate_summaries(apps, schema_editor):
+    # Start the running totals from the inventory already in stock
+    Inventory = apps.get_model('InventoryManagementWebApp', 'Inventory')
+    LocationSummary = apps.get_model('InventoryManagementWebApp', 'LocationSummary')
+    ProductSummary = apps.get_model('InventoryManagementWebApp', 'ProductSummary')
+    units = Sum(Case(When(quantity_on_pallet__gt=0, then=F('quantity_on_pallet')), default=Value(0)))
+    live_items = Inventory.objects.filter(scheduled_for_deletion__isnull=True).order_by()
+    LocationSummary.objects.bulk_create(
+        LocationSummary(storage_location=row['storage_location'], pallet_count=row['pallets'], total_units=row['units'] or 0)
+        for row in live_items.values('storage_location').annotate(pallets=Count('record_id'), units=units)
+    )
+    ProductSummary.objects.bulk_create(
+        ProductSummary(product_description=row['product_description'], pallet_count=row['pallets'], total_units=row['units'] or 0)
+        for row in live_items.values('product_description').annotate(pallets=Count('record_id'), units=units)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InventoryManagementWebApp', '0006_inventory_live_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationSummary',
+            fields=[
+                ('storage_location', models.CharField(max_length=4, primary_key=True, serialize=False)),
+                ('pallet_count', models.IntegerField(default=0)),
+                ('total_units', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductSummary',
+            fields=[
+                ('product_description', models.CharField(max_length=200, primary_key=True, serialize=False)),
+                ('pallet_count', models.IntegerField(default=0)),
+                ('total_units', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InventoryManagementWebApp', '0007_inventory_summaries'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='associate',
+            name='is_authenticated',
+        ),
+    ]
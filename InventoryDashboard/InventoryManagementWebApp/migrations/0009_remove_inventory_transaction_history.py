@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:56
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InventoryManagementWebApp', '0008_remove_associate_is_authenticated'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='inventory',
+            name='transaction_history',
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InventoryManagementWebApp', '0009_remove_inventory_transaction_history'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inventory',
+            name='inventory_deletion_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='inventory',
+            name='inventory_live_label_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='inventory',
+            name='inventory_live_location_idx',
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('scheduled_for_deletion__isnull', True)), fields=['label_id'], name='inventory_live_label_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('scheduled_for_deletion__isnull', True)), fields=['storage_location'], name='inventory_live_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('scheduled_for_deletion__isnull', False)), fields=['scheduled_for_deletion'], name='inventory_deletion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('scheduled_for_deletion__isnull', False)), fields=['record_id'], name='inventory_pending_record_idx'),
+        ),
+    ]
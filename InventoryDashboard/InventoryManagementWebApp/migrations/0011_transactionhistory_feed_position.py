@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+def position_existing_history(apps, schema_editor):
+    # Existing records keep their record ids as feed positions, so feed cursors handed out before stay valid
+    TransactionHistory = apps.get_model('InventoryManagementWebApp', 'TransactionHistory')
+    ChangeFeedCounter = apps.get_model('InventoryManagementWebApp', 'ChangeFeedCounter')
+    TransactionHistory.objects.update(feed_position=models.F('record_id'))
+    last_position = TransactionHistory.objects.aggregate(last=models.Max('record_id'))['last'] or 0
+    ChangeFeedCounter.objects.create(pk=1, last_position=last_position)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InventoryManagementWebApp', '0010_partial_deletion_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeFeedCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_position', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='transactionhistory',
+            name='feed_position',
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='transactionhistory',
+            index=models.Index(condition=models.Q(('feed_position__isnull', True)), fields=['record_id'], name='history_unpositioned_idx'),
+        ),
+        migrations.RunPython(position_existing_history, migrations.RunPython.noop),
+    ]
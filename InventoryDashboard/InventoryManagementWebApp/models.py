@@ -1,7 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
-from datetime import datetime
+from django.utils import timezone
 from .validators import validate_not_whitespace
+from .search import index_inventory_item
+from .cache import invalidate_inventory_item
+from .summaries import apply_stock_changes, stock_change
 # Constant defining the time to wait before an item scheduled for deletion is actually deleted
 TIME_TO_WAIT_BEFORE_DELETION = 45  # days
 
@@ -12,18 +16,13 @@ class Associate(models.Model):
     name = models.CharField(max_length=100)
     password = models.CharField(max_length=20)
     is_manager = models.BooleanField(default=False)
-    is_authenticated = models.BooleanField(default=False)
 
     def authenticate(self, password):
         """ Authenticate the associate with the given password. 
         Using a simple password check for demonstration purposes.
-        A real application should use hashed passwords."""
-        if self.password == password:
-            self.is_authenticated = True
-        else:
-            self.is_authenticated = False
-        self.save()
-        return self.is_authenticated
+        A real application should use hashed passwords.
+        Nothing is saved; whether an associate is signed in is tracked by their session."""
+        return self.password == password
 
     def __str__(self):
         return self.name
@@ -35,6 +34,49 @@ class Associate(models.Model):
             self.django_user = user
         super().save(*args, **kwargs)
 
+class ChangeFeedCounter(models.Model):
+    """Single row holding the last change feed position handed out to a transaction history record."""
+    last_position = models.BigIntegerField(default=0)
+
+class TransactionHistoryManager(models.Manager):
+    """Manager that gives transaction history records their change feed positions once they commit.
+
+    Record ids are handed out when a record is written, but the record only becomes visible when
+    its transaction commits, possibly after records with higher ids. Feed positions are handed out
+    after the commit instead, by one transaction at a time, so they become visible in the order
+    they are handed out and the change feed can page by position without skipping late commits."""
+
+    def create(self, **kwargs):
+        record = super().create(**kwargs)
+        transaction.on_commit(self.assign_feed_positions, robust=True)
+        return record
+
+    def bulk_create(self, objs, *args, **kwargs):
+        records = super().bulk_create(objs, *args, **kwargs)
+        transaction.on_commit(self.assign_feed_positions, robust=True)
+        return records
+
+    def assign_feed_positions(self):
+        """Give every committed record without a feed position a position after all those handed out so far.
+        Positions follow record ids among the records positioned together. Records of transactions that
+        are still running are not visible yet, and are positioned when they commit.
+        Returns the number of records positioned."""
+        with transaction.atomic():
+            # Writing the counter row first locks it until the commit, so only one transaction hands out positions at a time
+            while not ChangeFeedCounter.objects.filter(pk=1).update(last_position=F('last_position')):
+                ChangeFeedCounter.objects.get_or_create(pk=1)
+            last_position = ChangeFeedCounter.objects.values_list('last_position', flat=True).get(pk=1)
+            unpositioned = self.filter(feed_position__isnull=True)
+            bounds = unpositioned.aggregate(first=models.Min('record_id'), last=models.Max('record_id'))
+            if bounds['first'] is None:
+                return 0
+            # Offsetting the record ids keeps their order and puts every new position past the last one.
+            # Records committing meanwhile are positioned here only if their ids fall inside the bounds.
+            offset = last_position - bounds['first'] + 1
+            positioned = unpositioned.filter(record_id__range=(bounds['first'], bounds['last'])).update(feed_position=F('record_id') + offset)
+            ChangeFeedCounter.objects.filter(pk=1).update(last_position=bounds['last'] + offset)
+        return positioned
+
 class TransactionHistory(models.Model):
     """Model to store transaction history for inventory items.
     
@@ -55,67 +97,215 @@ class TransactionHistory(models.Model):
     new_quantity = models.IntegerField(null=True, blank=True)
     previous_location = models.CharField(max_length=4, null=True, blank=True)
     new_location = models.CharField(max_length=4, null=True, blank=True)
+    # Position of the record in the change feed, in commit order; set by TransactionHistoryManager once the record has committed
+    feed_position = models.BigIntegerField(null=True, blank=True, unique=True)
+
+    objects = TransactionHistoryManager()
+
+    class Meta:
+        indexes = [
+            # Serves the search for committed records still waiting for a feed position
+            models.Index(fields=['record_id'], name='history_unpositioned_idx', condition=models.Q(feed_position__isnull=True)),
+            # Serves an item's history sorted by time without a separate sort step
+            models.Index(fields=['inventory_item', 'timestamp'], name='history_item_timestamp_idx'),
+            # Serves the archive's scan for records older than the cutoff
+            models.Index(fields=['timestamp'], name='history_timestamp_idx'),
+        ]
 
     def __str__(self):
         return f"TransactionHistory {self.record_id}"
 
-class InventoryManager(models.Manager):
+class ArchivedTransactionHistory(models.Model):
+    """Model to store transaction history records moved out of TransactionHistory.
+
+    Records older than TRANSACTION_HISTORY_ARCHIVE_AFTER_DAYS are moved here by the
+    archive_transaction_history command so the TransactionHistory table only holds recent
+    activity. Records keep their original record id, and the table carries only the index
+    needed to read an item's archived history on demand."""
+    record_id = models.IntegerField(primary_key=True)
+    inventory_item = models.ForeignKey('Inventory', on_delete=models.CASCADE, db_index=False)
+    action_name = models.CharField(max_length=4, choices=TransactionHistory.Actions.choices)
+    timestamp = models.DateTimeField()
+    performed_by = models.ForeignKey(Associate, on_delete=models.CASCADE, db_index=False)
+    previous_quantity = models.IntegerField(null=True, blank=True)
+    new_quantity = models.IntegerField(null=True, blank=True)
+    previous_location = models.CharField(max_length=4, null=True, blank=True)
+    new_location = models.CharField(max_length=4, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['inventory_item', 'timestamp'], name='archive_item_timestamp_idx'),
+        ]
+
+    def __str__(self):
+        return f"ArchivedTransactionHistory {self.record_id}"
+
+class InventoryQuerySet(models.QuerySet):
+    def live(self):
+        """Items that are not scheduled for deletion."""
+        return self.filter(scheduled_for_deletion__isnull=True)
+
+    def pending_deletion(self):
+        """Items scheduled for deletion that have not been purged yet."""
+        return self.filter(scheduled_for_deletion__isnull=False)
+
+class InventoryManager(models.Manager.from_queryset(InventoryQuerySet)):
     def create(self, label_id, product_description, associate, storage_location='HOLD', quantity_on_pallet=-100):
         # Override create method to create a transaction history record
         validate_not_whitespace(label_id)
-        inventory_item = super().create(label_id=label_id, storage_location=storage_location, quantity_on_pallet=quantity_on_pallet,
-                       product_description=product_description
-                       )
-        transaction_history = TransactionHistory.objects.create(
-            inventory_item=inventory_item,
-            action_name=TransactionHistory.Actions.CREATED,
-            performed_by=associate,
-            new_quantity=quantity_on_pallet,
-            new_location=storage_location,
-        )
-        inventory_item.transaction_history = transaction_history
-        inventory_item.save()
+        # Write the item and its creation record in one transaction so neither exists without the other.
+        # The creation record points at the item, so the item row is written once and never updated here.
+        with transaction.atomic():
+            inventory_item = super().create(label_id=label_id, storage_location=storage_location, quantity_on_pallet=quantity_on_pallet,
+                           product_description=product_description
+                           )
+            TransactionHistory.objects.create(
+                inventory_item=inventory_item,
+                action_name=TransactionHistory.Actions.CREATED,
+                performed_by=associate,
+                new_quantity=quantity_on_pallet,
+                new_location=storage_location,
+            )
+            apply_stock_changes([stock_change(storage_location, product_description, quantity_on_pallet)])
+        index_inventory_item(inventory_item)
+        invalidate_inventory_item(inventory_item)
         return inventory_item
 
+class LiveInventoryManager(models.Manager.from_queryset(InventoryQuerySet)):
+    """Manager returning only items that are not scheduled for deletion.
+    Its queries carry the condition of the partial indexes on Inventory, so they are served
+    by indexes covering only active stock."""
+    def get_queryset(self):
+        return super().get_queryset().live()
+
+class PendingDeletionInventoryManager(models.Manager.from_queryset(InventoryQuerySet)):
+    """Manager returning only items scheduled for deletion that have not been purged yet."""
+    def get_queryset(self):
+        return super().get_queryset().pending_deletion()
+
 class Inventory(models.Model):
     record_id = models.AutoField(primary_key=True)
     label_id = models.CharField(max_length=100, blank=False, null=False, validators=[validate_not_whitespace])
     storage_location = models.CharField(max_length=4, default='HOLD')
     quantity_on_pallet = models.IntegerField(default=-100)
     product_description = models.CharField(max_length=200)
-    transaction_history = models.OneToOneField(TransactionHistory, on_delete=models.CASCADE, blank=True, null=True, default=None)
     scheduled_for_deletion = models.DateTimeField(null=True, blank=True, default=None)
 
+    # Every item, including those scheduled for deletion; the default manager
     objects = InventoryManager()
+    # Items not scheduled for deletion
+    live_items = LiveInventoryManager()
+    # Items scheduled for deletion that have not been purged yet
+    pending_deletion = PendingDeletionInventoryManager()
+
+    class Meta:
+        indexes = [
+            # Scan-gun lookups send a full or leading part of the label or location. A full label is
+            # matched with =, and a prefix as the range label_id >= prefix AND label_id < the next
+            # prefix, so a plain B-tree index serves both on every database; LIKE 'prefix%' cannot
+            # use one on SQLite. The indexes only cover live items, so their size tracks active stock.
+            models.Index(fields=['label_id'], name='inventory_live_label_id_idx',
+                         condition=models.Q(scheduled_for_deletion__isnull=True)),
+            models.Index(fields=['storage_location'], name='inventory_live_location_idx',
+                         condition=models.Q(scheduled_for_deletion__isnull=True)),
+            # Serves paging through live items in record id order
+            models.Index(fields=['record_id'], name='inventory_live_record_id_idx',
+                         condition=models.Q(scheduled_for_deletion__isnull=True)),
+            # Serve the purge's scan for items whose deletion wait has run out and searches of pending
+            # deletions. They only cover pending deletions, so a search of live items is never drawn to
+            # them by its scheduled_for_deletion IS NULL condition instead of to the label or location index.
+            models.Index(fields=['scheduled_for_deletion'], name='inventory_deletion_idx',
+                         condition=models.Q(scheduled_for_deletion__isnull=False)),
+            models.Index(fields=['record_id'], name='inventory_pending_record_idx',
+                         condition=models.Q(scheduled_for_deletion__isnull=False)),
+        ]
 
     def __str__(self):
         return f"{self.product_description} - {self.quantity_on_pallet} units at location {self.storage_location}"
 
+    def creation_record(self):
+        """Return the transaction history record of this item's creation.
+        Creation records are never archived, so it is always in TransactionHistory."""
+        return self.transactionhistory_set.get(action_name=TransactionHistory.Actions.CREATED)
+
+    def _lock_stock_values(self):
+        """Lock this item's row and return its current quantity, location, description and deletion date."""
+        return Inventory.objects.select_for_update().values_list(
+            'quantity_on_pallet', 'storage_location', 'product_description', 'scheduled_for_deletion'
+        ).get(record_id=self.record_id)
+
     def update_quantity(self, new_quantity, associate):
         # Override update method to create a transaction history record
-        previous_quantity = self.quantity_on_pallet
+        with transaction.atomic():
+            # Lock the row and record the quantity actually being replaced, not the one read earlier
+            previous_quantity, storage_location, product_description, scheduled_for_deletion = self._lock_stock_values()
+            self.quantity_on_pallet = new_quantity
+            self.save(update_fields=['quantity_on_pallet'])
+            TransactionHistory.objects.create(
+                inventory_item=self,
+                action_name=TransactionHistory.Actions.EDIT_QUANTITY,
+                performed_by=associate,
+                previous_quantity=previous_quantity,
+                new_quantity=new_quantity
+            )
+            if scheduled_for_deletion is None:
+                apply_stock_changes([
+                    stock_change(storage_location, product_description, previous_quantity, -1),
+                    stock_change(storage_location, product_description, new_quantity),
+                ])
+        index_inventory_item(self)
+        invalidate_inventory_item(self)
+
+    def adjust_quantity(self, delta, associate):
+        """Change the quantity on pallet by delta, negative when picking, and record the change.
+
+        The database applies the increment with an F() expression, which locks only this pallet's
+        row until the transaction commits, so concurrent adjustments to the same pallet queue up
+        instead of overwriting each other. The new quantity is read back inside the same
+        transaction, so the history record holds the exact before and after values of this
+        adjustment. Raises ValueError, leaving the pallet unchanged, if picking would take the
+        quantity below zero."""
+        with transaction.atomic():
+            Inventory.objects.filter(record_id=self.record_id).update(quantity_on_pallet=F('quantity_on_pallet') + delta)
+            new_quantity, storage_location, product_description, scheduled_for_deletion = self._lock_stock_values()
+            if delta < 0 and new_quantity < 0:
+                raise ValueError("Quantity on pallet cannot be negative.")
+            TransactionHistory.objects.create(
+                inventory_item=self,
+                action_name=TransactionHistory.Actions.EDIT_QUANTITY,
+                performed_by=associate,
+                previous_quantity=new_quantity - delta,
+                new_quantity=new_quantity
+            )
+            if scheduled_for_deletion is None:
+                apply_stock_changes([
+                    stock_change(storage_location, product_description, new_quantity - delta, -1),
+                    stock_change(storage_location, product_description, new_quantity),
+                ])
         self.quantity_on_pallet = new_quantity
-        self.save()
-        TransactionHistory.objects.create(
-            inventory_item=self,
-            action_name=TransactionHistory.Actions.EDIT_QUANTITY,
-            performed_by=associate,
-            previous_quantity=previous_quantity,
-            new_quantity=new_quantity
-        )
+        index_inventory_item(self)
+        invalidate_inventory_item(self)
 
     def update_location(self, new_location, associate):
         # Override update method to create a transaction history record
-        previous_location = self.storage_location
-        self.storage_location = new_location
-        self.save()
-        TransactionHistory.objects.create(
-            inventory_item=self,
-            action_name=TransactionHistory.Actions.MOVE_LOCATION,
-            performed_by=associate,
-            previous_location=previous_location,
-            new_location=new_location
-        )
+        with transaction.atomic():
+            quantity_on_pallet, previous_location, product_description, scheduled_for_deletion = self._lock_stock_values()
+            self.storage_location = new_location
+            self.save(update_fields=['storage_location'])
+            TransactionHistory.objects.create(
+                inventory_item=self,
+                action_name=TransactionHistory.Actions.MOVE_LOCATION,
+                performed_by=associate,
+                previous_location=previous_location,
+                new_location=new_location
+            )
+            if scheduled_for_deletion is None:
+                apply_stock_changes([
+                    stock_change(previous_location, product_description, quantity_on_pallet, -1),
+                    stock_change(new_location, product_description, quantity_on_pallet),
+                ])
+        index_inventory_item(self)
+        invalidate_inventory_item(self)
 
     def delete(self, associate):
         # Override delete method to create a transaction history record
@@ -123,12 +313,42 @@ class Inventory(models.Model):
         if not associate.is_manager:
             raise PermissionError("Only managers can delete inventory items.")
         # The associate is a manager; proceed with scheduling for deletion
-        self.scheduled_for_deletion = datetime.now()
-        self.save()
-        # Schedule for deletion after TIME_TO_WAIT_BEFORE_DELETION days
-        TransactionHistory.objects.create(
-            inventory_item=self,
-            action_name=TransactionHistory.Actions.DELETED,
-            performed_by=associate  # In a real application, set the associate performing the deletion
-        )
-        
\ No newline at end of file
+        with transaction.atomic():
+            quantity_on_pallet, storage_location, product_description, scheduled_for_deletion = self._lock_stock_values()
+            self.scheduled_for_deletion = timezone.now()
+            self.save(update_fields=['scheduled_for_deletion'])
+            if scheduled_for_deletion is None:
+                # The item no longer counts as stock once it is scheduled for deletion
+                apply_stock_changes([stock_change(storage_location, product_description, quantity_on_pallet, -1)])
+            # Schedule for deletion after TIME_TO_WAIT_BEFORE_DELETION days
+            TransactionHistory.objects.create(
+                inventory_item=self,
+                action_name=TransactionHistory.Actions.DELETED,
+                performed_by=associate  # In a real application, set the associate performing the deletion
+            )
+        invalidate_inventory_item(self)
+        
+
+class LocationSummary(models.Model):
+    """Model to store running totals of the live inventory at each storage location.
+
+    The totals are updated in the same transaction as every inventory write, so reading the
+    pallets and units at a location is a single primary key lookup. Only items not scheduled for
+    deletion are counted, and negative quantities count as zero units. The
+    rebuild_inventory_summaries command recomputes the totals from scratch."""
+    storage_location = models.CharField(max_length=4, primary_key=True)
+    pallet_count = models.IntegerField(default=0)
+    total_units = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.storage_location} - {self.pallet_count} pallets, {self.total_units} units"
+
+class ProductSummary(models.Model):
+    """Model to store running totals of the live inventory of each product description.
+    Maintained the same way as LocationSummary."""
+    product_description = models.CharField(max_length=200, primary_key=True)
+    pallet_count = models.IntegerField(default=0)
+    total_units = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product_description} - {self.pallet_count} pallets, {self.total_units} units"
@@ -0,0 +1,215 @@
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils import timezone
+
+# Default number of inventory products shown per page; override with INVENTORY_PAGE_SIZE in settings
+DEFAULT_PAGE_SIZE = 50
+# Upper bound on the page size a form can request; override with INVENTORY_MAX_PAGE_SIZE in settings
+DEFAULT_MAX_PAGE_SIZE = 500
+# Default number of transactions shown per page of an item's history; override with TRANSACTION_HISTORY_PAGE_SIZE in settings
+DEFAULT_HISTORY_PAGE_SIZE = 50
+
+# Columns of an inventory product shown in lists
+LIST_FIELDS = ('record_id', 'label_id', 'storage_location', 'quantity_on_pallet', 'product_description', 'scheduled_for_deletion')
+
+# A product as shown in lists: the list columns in a tuple, readable by name like a model instance
+InventoryRow = namedtuple('InventoryRow', LIST_FIELDS)
+
+
+def inventory_rows(queryset):
+    """Read the list columns of the products of a queryset as InventoryRows.
+    Only those columns are selected, and no model instances are built, which is most of the cost
+    of reading a page of products."""
+    return list(map(InventoryRow._make, queryset.values_list(*LIST_FIELDS)))
+
+
+def get_page_size(form_data:QueryDict):
+    """Return the page size requested in the form data.
+    Falls back to the configured default and is clamped to the configured maximum."""
+    default_page_size = getattr(settings, 'INVENTORY_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    max_page_size = getattr(settings, 'INVENTORY_MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)
+    page_size = form_data.get('page_size')
+    try:
+        page_size = int(page_size.strip())
+    except (AttributeError, ValueError):
+        return default_page_size
+    return max(1, min(page_size, max_page_size))
+
+
+def get_cursor(form_data:QueryDict, name):
+    """Return the record id carried in the named cursor field, or None if it is missing or invalid."""
+    cursor = form_data.get(name)
+    try:
+        return int(cursor.strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+def history_cursor(transaction):
+    """Encode the position of a transaction history record as `<timestamp in microseconds>_<record id>`."""
+    epoch = datetime(1970, 1, 1, tzinfo=dt_timezone.utc if timezone.is_aware(transaction.timestamp) else None)
+    return f"{(transaction.timestamp - epoch) // timedelta(microseconds=1)}_{transaction.record_id}"
+
+
+def get_history_cursor(form_data:QueryDict, name):
+    """Return the (timestamp, record id) position carried in the named history cursor field,
+    or None if it is missing or invalid."""
+    try:
+        microseconds, record_id = (int(part) for part in form_data.get(name).strip().split('_'))
+        epoch = datetime(1970, 1, 1, tzinfo=dt_timezone.utc if settings.USE_TZ else None)
+        return epoch + timedelta(microseconds=microseconds), record_id
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+class InventoryPage:
+    """One page of inventory products selected with keyset pagination on record_id.
+
+    Pages are selected with `record_id > after` or `record_id < before` and a LIMIT of one
+    row more than the page size, so neither OFFSET nor a COUNT over the matching rows is ever
+    needed and the cost of a page does not grow with the size of the table.
+
+    The page behaves like the list of products it holds, so templates can iterate it and
+    views can call len() on it. The products are InventoryRows holding only the list columns. next_cursor and previous_cursor are the record ids to send
+    back as `after` and `before` to move forward or backward, or None at either end."""
+
+    # Form fields carried between pages so the next request repeats the same search
+    SEARCH_PARAMETERS = ('product_id', 'label_id', 'exact_label_id', 'storage_location', 'quantity_on_pallet',
+                         'product_description', 'scheduled_for_deletion', 'page_size')
+
+    def __init__(self, products, page_size, next_cursor=None, previous_cursor=None, search_parameters=()):
+        self.products = products
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.search_parameters = search_parameters
+
+    @classmethod
+    def _page_query(cls, queryset, form_data:QueryDict):
+        """Return the query for the rows of the page described by the cursor fields in the form data,
+        and a function that builds the page from those rows."""
+        page_size = get_page_size(form_data)
+        after = get_cursor(form_data, 'after')
+        before = get_cursor(form_data, 'before')
+        search_parameters = [(name, form_data.get(name)) for name in cls.SEARCH_PARAMETERS if form_data.get(name)]
+        if before is not None:
+            def build_previous_page(products):
+                # Put the page walked backwards from the cursor back in ascending order
+                has_previous = len(products) > page_size
+                products = products[:page_size][::-1]
+                previous_cursor = products[0].record_id if has_previous and products else None
+                # The row the cursor points at is on the following page
+                next_cursor = products[-1].record_id if products else None
+                return cls(products, page_size, next_cursor, previous_cursor, search_parameters)
+            return queryset.filter(record_id__lt=before).order_by('-record_id').values_list(*LIST_FIELDS)[:page_size + 1], build_previous_page
+
+        def build_next_page(products):
+            has_next = len(products) > page_size
+            products = products[:page_size]
+            next_cursor = products[-1].record_id if has_next else None
+            # A page reached through an after cursor always has the cursor's own page before it
+            previous_cursor = products[0].record_id if after is not None and products else None
+            return cls(products, page_size, next_cursor, previous_cursor, search_parameters)
+        if after is not None:
+            queryset = queryset.filter(record_id__gt=after)
+        return queryset.order_by('record_id').values_list(*LIST_FIELDS)[:page_size + 1], build_next_page
+
+    @classmethod
+    def from_queryset(cls, queryset, form_data:QueryDict):
+        """Select the page of the queryset described by the cursor fields in the form data."""
+        query, build_page = cls._page_query(queryset, form_data)
+        return build_page(list(map(InventoryRow._make, query)))
+
+    @classmethod
+    async def afrom_queryset(cls, queryset, form_data:QueryDict):
+        """Async version of from_queryset, reading the page with the async ORM."""
+        query, build_page = cls._page_query(queryset, form_data)
+        return build_page([InventoryRow._make(product) async for product in query])
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def __len__(self):
+        return len(self.products)
+
+    def __bool__(self):
+        return bool(self.products)
+
+    def __getitem__(self, index):
+        return self.products[index]
+
+
+
+class TransactionHistoryPage:
+    """One page of an inventory product's transaction history, newest first.
+
+    Transactions are ordered by timestamp, then record id, and pages are selected with a
+    (timestamp, record id) cursor and a LIMIT of one row more than the page size. Record ids do
+    not follow timestamps when history is written with explicit timestamps or commits late, so a
+    record id alone cannot split the history by time. next_cursor is the position, encoded by
+    history_cursor(), to send back as `history_before` to load the next, older page, or None when
+    the oldest transaction is on this page."""
+
+    def __init__(self, transactions, page_size, next_cursor=None, cursor=None, archived=False):
+        self.transactions = transactions
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+        self.archived = archived
+
+    @classmethod
+    def _page_query(cls, queryset, query_data:QueryDict):
+        """Return the query for the rows of the page older than the `history_before` cursor in the
+        query data, and a function that builds the page from those rows."""
+        page_size = getattr(settings, 'TRANSACTION_HISTORY_PAGE_SIZE', DEFAULT_HISTORY_PAGE_SIZE)
+        cursor = get_history_cursor(query_data, 'history_before')
+        if cursor is not None:
+            timestamp, record_id = cursor
+            # The row-value comparison (timestamp, record_id) < cursor, with a plain bound on
+            # timestamp so the history's (inventory_item, timestamp) index serves the range
+            queryset = queryset.filter(
+                Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, record_id__lt=record_id),
+                timestamp__lte=timestamp,
+            )
+
+        def build_page(transactions):
+            next_cursor = history_cursor(transactions[page_size - 1]) if len(transactions) > page_size else None
+            return cls(transactions[:page_size], page_size, next_cursor, cursor, bool(query_data.get('archived')))
+        return queryset.order_by('-timestamp', '-record_id')[:page_size + 1], build_page
+
+    @classmethod
+    def from_queryset(cls, queryset, query_data:QueryDict):
+        """Select the page of the queryset older than the `history_before` cursor in the query data."""
+        query, build_page = cls._page_query(queryset, query_data)
+        return build_page(list(query))
+
+    @classmethod
+    async def afrom_queryset(cls, queryset, query_data:QueryDict):
+        """Async version of from_queryset, reading the page with the async ORM."""
+        query, build_page = cls._page_query(queryset, query_data)
+        return build_page([transaction async for transaction in query])
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.transactions)
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def __bool__(self):
+        return bool(self.transactions)
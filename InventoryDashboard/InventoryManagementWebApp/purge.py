@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import TIME_TO_WAIT_BEFORE_DELETION, ArchivedTransactionHistory, Inventory, TransactionHistory
+from .search import remove_inventory_item
+from .cache import invalidate_inventory_items
+
+logger = logging.getLogger(__name__)
+
+# Number of inventory items deleted per transaction; override with INVENTORY_PURGE_BATCH_SIZE in settings
+DEFAULT_PURGE_BATCH_SIZE = 500
+# Seconds to pause between batches so other writers are not kept waiting; override with INVENTORY_PURGE_SLEEP_SECONDS in settings
+DEFAULT_PURGE_SLEEP_SECONDS = 1.0
+
+
+def purge_expired_inventory(batch_size=None, sleep_seconds=None, dry_run=False, now=None):
+    """Delete inventory items scheduled for deletion more than TIME_TO_WAIT_BEFORE_DELETION days ago.
+
+    Items are deleted in batches of batch_size together with their transaction history, archived
+    history included, each batch in its own short transaction, pausing sleep_seconds between
+    batches. With dry_run nothing is deleted and the batches that would be purged are counted.
+    Yields a dictionary per batch with the number of items, history records and archived
+    history records purged."""
+    batch_size = batch_size or getattr(settings, 'INVENTORY_PURGE_BATCH_SIZE', DEFAULT_PURGE_BATCH_SIZE)
+    if sleep_seconds is None:
+        sleep_seconds = getattr(settings, 'INVENTORY_PURGE_SLEEP_SECONDS', DEFAULT_PURGE_SLEEP_SECONDS)
+    cutoff = (now or timezone.now()) - timedelta(days=TIME_TO_WAIT_BEFORE_DELETION)
+    expired = Inventory.objects.filter(scheduled_for_deletion__lt=cutoff).order_by('record_id')
+    last_record_id = 0
+    while True:
+        with transaction.atomic():
+            record_ids = list(expired.filter(record_id__gt=last_record_id).values_list('record_id', flat=True)[:batch_size])
+            if not record_ids:
+                return
+            last_record_id = record_ids[-1]
+            purged = {
+                'inventory': len(record_ids),
+                'transaction_history': TransactionHistory.objects.filter(inventory_item_id__in=record_ids).count(),
+                'archived_transaction_history': ArchivedTransactionHistory.objects.filter(inventory_item_id__in=record_ids).count(),
+            }
+            if not dry_run:
+                # Deleting the items cascades to both history tables
+                Inventory.objects.filter(record_id__in=record_ids).delete()
+                for record_id in record_ids:
+                    remove_inventory_item(record_id)
+                invalidate_inventory_items(record_ids)
+        yield purged
+        if sleep_seconds:
+            time.sleep(sleep_seconds)
+
+
+class PurgeScheduler(threading.Thread):
+    """Background thread that runs purge_expired_inventory every interval_seconds.
+
+    Started by the app when INVENTORY_PURGE_INTERVAL_SECONDS is set. The first run waits a full
+    interval, so short-lived management commands exit before the scheduler ever touches the database."""
+
+    def __init__(self, interval_seconds):
+        super().__init__(name='inventory-purge-scheduler', daemon=True)
+        self.interval_seconds = interval_seconds
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval_seconds):
+            try:
+                for purged in purge_expired_inventory():
+                    logger.info("Purged %(inventory)d inventory items, %(transaction_history)d history records "
+                                "and %(archived_transaction_history)d archived history records.", purged)
+            except Exception:
+                logger.exception("Purging expired inventory items failed.")
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_scheduler = None
+
+
+def start_purge_scheduler():
+    """Start the background purge scheduler if INVENTORY_PURGE_INTERVAL_SECONDS is set and it is not already running."""
+    global _scheduler
+    interval_seconds = getattr(settings, 'INVENTORY_PURGE_INTERVAL_SECONDS', None)
+    if interval_seconds and _scheduler is None:
+        _scheduler = PurgeScheduler(interval_seconds)
+        _scheduler.start()
+    return _scheduler
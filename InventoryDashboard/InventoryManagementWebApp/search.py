@@ -0,0 +1,195 @@
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Dotted path of the search backend used when INVENTORY_SEARCH_BACKEND is not set in settings
+DEFAULT_SEARCH_BACKEND = 'InventoryManagementWebApp.search.NGramSearchBackend'
+# Fraction of the query's trigrams a product must contain to count as a match
+DEFAULT_MIN_SCORE = 0.5
+# Seconds before the in-process index is rebuilt to pick up writes made by other processes
+DEFAULT_INDEX_MAX_AGE = 300
+
+_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def trigrams(text):
+    """Split text into the set of lowercase trigrams of its words.
+    Each word is padded the way pg_trgm pads it, so short words and word starts still produce trigrams."""
+    grams = set()
+    for word in _WORD_PATTERN.findall((text or '').lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SearchBackend:
+    """Interface for product search backends.
+
+    search() returns the record ids of the inventory products best matching the query,
+    best match first. index_item() and remove_item() are called after an inventory product
+    is written so backends that keep their own index can stay current."""
+
+    def search(self, query, limit):
+        raise NotImplementedError
+
+    def index_item(self, inventory_item):
+        pass
+
+    def remove_item(self, record_id):
+        pass
+
+
+class NGramSearchBackend(SearchBackend):
+    """In-process trigram inverted index over Inventory.label_id and product_description.
+
+    The index is built from the database on first use and after it is older than
+    INVENTORY_SEARCH_INDEX_MAX_AGE seconds, and is kept current in between from the
+    inventory write paths. A product's score is the fraction of the query's trigrams found
+    in its label or description, so partial words and small typos still match, ranked below
+    exact ones."""
+
+    def __init__(self, min_score=None, max_age=None):
+        self.min_score = min_score if min_score is not None else getattr(settings, 'INVENTORY_SEARCH_MIN_SCORE', DEFAULT_MIN_SCORE)
+        self.max_age = max_age if max_age is not None else getattr(settings, 'INVENTORY_SEARCH_INDEX_MAX_AGE', DEFAULT_INDEX_MAX_AGE)
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._documents = {}
+        self._built_at = None
+
+    def _ensure_built(self):
+        if self._built_at is None or time.monotonic() - self._built_at > self.max_age:
+            self.rebuild()
+
+    def rebuild(self):
+        """Rebuild the whole index from the inventory table."""
+        from .models import Inventory
+        postings = {}
+        documents = {}
+        rows = Inventory.objects.values_list('record_id', 'label_id', 'product_description')
+        for record_id, label_id, product_description in rows.iterator(chunk_size=2000):
+            grams = trigrams(label_id) | trigrams(product_description)
+            documents[record_id] = grams
+            for gram in grams:
+                postings.setdefault(gram, set()).add(record_id)
+        with self._lock:
+            self._postings = postings
+            self._documents = documents
+            self._built_at = time.monotonic()
+
+    def _remove(self, record_id):
+        for gram in self._documents.pop(record_id, ()):
+            record_ids = self._postings.get(gram)
+            if record_ids is not None:
+                record_ids.discard(record_id)
+                if not record_ids:
+                    del self._postings[gram]
+
+    def index_item(self, inventory_item):
+        if self._built_at is None:
+            # The first search builds the whole index, which will include this product
+            return
+        grams = trigrams(inventory_item.label_id) | trigrams(inventory_item.product_description)
+        with self._lock:
+            self._remove(inventory_item.record_id)
+            self._documents[inventory_item.record_id] = grams
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(inventory_item.record_id)
+
+    def remove_item(self, record_id):
+        with self._lock:
+            self._remove(record_id)
+
+    def search(self, query, limit):
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        self._ensure_built()
+        matches = {}
+        with self._lock:
+            for gram in query_grams:
+                for record_id in self._postings.get(gram, ()):
+                    matches[record_id] = matches.get(record_id, 0) + 1
+            # Rank by the share of the query found, then prefer products with less unrelated text
+            ranked = [
+                (shared / len(query_grams), shared / len(self._documents[record_id]), record_id)
+                for record_id, shared in matches.items()
+                if shared / len(query_grams) >= self.min_score
+            ]
+        ranked.sort(key=lambda match: (-match[0], -match[1], match[2]))
+        return [record_id for _, _, record_id in ranked[:limit]]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Search backend using PostgreSQL's pg_trgm similarity functions.
+
+    Ranking happens in the database, backed by the trigram GIN indexes created by the
+    migrations on PostgreSQL, so nothing is held in process memory and every worker sees
+    the same results. Requires the pg_trgm extension.
+
+    Candidates are found with the % and %> operators, which the GIN indexes serve, and only
+    those are scored and ranked; a filter on the similarity functions themselves would scan
+    every row. The operators' thresholds are set to the minimum score for the search's
+    transaction, so the candidates are exactly the products scoring at least that."""
+
+    def __init__(self, min_score=None):
+        self.min_score = min_score if min_score is not None else getattr(settings, 'INVENTORY_SEARCH_MIN_SCORE', DEFAULT_MIN_SCORE)
+
+    def search(self, query, limit):
+        from django.contrib.postgres.lookups import TrigramSimilar, TrigramWordSimilar
+        from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+        from django.db import connection
+        from django.db.models import F, Value
+        from django.db.models.functions import Greatest
+        from .models import Inventory
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('pg_trgm.similarity_threshold', %s, true), "
+                    "set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                    [str(self.min_score), str(self.min_score)],
+                )
+            return list(
+                Inventory.objects.filter(
+                    TrigramWordSimilar(F('product_description'), Value(query)) | TrigramSimilar(F('label_id'), Value(query))
+                )
+                .annotate(
+                    score=Greatest(TrigramWordSimilarity(query, 'product_description'), TrigramSimilarity('label_id', query))
+                )
+                .order_by('-score', 'record_id')
+                .values_list('record_id', flat=True)[:limit]
+            )
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """Return the search backend configured by INVENTORY_SEARCH_BACKEND, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(getattr(settings, 'INVENTORY_SEARCH_BACKEND', DEFAULT_SEARCH_BACKEND))()
+    return _backend
+
+
+def reset_search_backend():
+    """Discard the current search backend so the next search creates and builds a fresh one."""
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def index_inventory_item(inventory_item):
+    """Update the search index for an inventory product once the current transaction commits."""
+    transaction.on_commit(lambda: get_search_backend().index_item(inventory_item))
+
+
+def remove_inventory_item(record_id):
+    """Remove an inventory product from the search index once the current transaction commits."""
+    transaction.on_commit(lambda: get_search_backend().remove_item(record_id))
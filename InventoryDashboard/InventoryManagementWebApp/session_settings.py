@@ -0,0 +1,30 @@
+# Session stores session_settings() can configure
+SESSION_STORES = ('db', 'cached_db', 'cache', 'signed_cookies')
+
+
+def session_settings(store='cache', cache_alias='default'):
+    """Return the Django settings that keep sessions in the given store, for use in the project settings:
+
+        from InventoryManagementWebApp.session_settings import session_settings
+        globals().update(session_settings('cache'))
+
+    'db' is Django's default and reads the sessions table on every signed in request. 'cached_db'
+    reads sessions from the cache and only falls back to the table on a miss, and 'cache' keeps
+    them in the cache alone, so they are lost if the cache is cleared; both want a cache shared
+    by every process, such as Redis or Memcached. 'signed_cookies' keeps the session in the
+    cookie itself and never touches the server, but a signed out cookie cannot be revoked before
+    it expires.
+
+    Every store saves a session only when the request changed it."""
+    if store not in SESSION_STORES:
+        raise ValueError(f"Unknown session store {store!r}; expected one of {', '.join(SESSION_STORES)}.")
+    configured = {
+        'SESSION_ENGINE': f'django.contrib.sessions.backends.{store}',
+        'SESSION_SAVE_EVERY_REQUEST': False,
+    }
+    if store in ('cache', 'cached_db'):
+        configured['SESSION_CACHE_ALIAS'] = cache_alias
+    if store == 'signed_cookies':
+        # The cookie is readable by the browser; keep it out of reach of page scripts
+        configured['SESSION_COOKIE_HTTPONLY'] = True
+    return configured
@@ -0,0 +1,68 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+
+
+def stock_units(quantity):
+    """Units a pallet contributes to the summaries. Negative quantities, like the -100 placeholder
+    given to pallets created without a count, contribute nothing."""
+    return max(quantity, 0)
+
+
+def stock_change(storage_location, product_description, quantity, pallets=1):
+    """The change to the summaries of adding a live pallet (pallets=1) or removing one (pallets=-1)."""
+    return (storage_location, product_description, pallets, pallets * stock_units(quantity))
+
+
+def _increment(model, key_field, key, pallets, units):
+    totals = {'pallet_count': F('pallet_count') + pallets, 'total_units': F('total_units') + units}
+    if model.objects.filter(pk=key).update(**totals):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**{key_field: key}, pallet_count=pallets, total_units=units)
+    except IntegrityError:
+        # Another transaction created the summary row first; add to it instead
+        model.objects.filter(pk=key).update(**totals)
+
+
+def apply_stock_changes(changes):
+    """Apply stock changes to the location and product summaries.
+
+    Call inside the transaction that writes the inventory items, so the summaries commit or
+    roll back together with them. Changes to the same summary row are combined first, and rows
+    are updated in key order so concurrent transactions lock them in the same order."""
+    from .models import LocationSummary, ProductSummary
+    location_totals = defaultdict(lambda: [0, 0])
+    product_totals = defaultdict(lambda: [0, 0])
+    for storage_location, product_description, pallets, units in changes:
+        location_totals[storage_location][0] += pallets
+        location_totals[storage_location][1] += units
+        product_totals[product_description][0] += pallets
+        product_totals[product_description][1] += units
+    for model, key_field, totals in ((LocationSummary, 'storage_location', location_totals),
+                                     (ProductSummary, 'product_description', product_totals)):
+        for key in sorted(totals):
+            pallets, units = totals[key]
+            if pallets or units:
+                _increment(model, key_field, key, pallets, units)
+
+
+def rebuild_summaries():
+    """Recompute the location and product summaries from the live inventory items.
+    Returns the number of location and product summary rows written."""
+    from .models import Inventory, LocationSummary, ProductSummary
+    units = Sum(Case(When(quantity_on_pallet__gt=0, then=F('quantity_on_pallet')), default=Value(0)))
+    with transaction.atomic():
+        LocationSummary.objects.all().delete()
+        ProductSummary.objects.all().delete()
+        locations = LocationSummary.objects.bulk_create(
+            LocationSummary(storage_location=row['storage_location'], pallet_count=row['pallets'], total_units=row['units'] or 0)
+            for row in Inventory.live_items.order_by().values('storage_location').annotate(pallets=Count('record_id'), units=units)
+        )
+        products = ProductSummary.objects.bulk_create(
+            ProductSummary(product_description=row['product_description'], pallet_count=row['pallets'], total_units=row['units'] or 0)
+            for row in Inventory.live_items.order_by().values('product_description').annotate(pallets=Count('record_id'), units=units)
+        )
+    return len(locations), len(products)
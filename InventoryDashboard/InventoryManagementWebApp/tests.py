@@ -1,8 +1,65 @@
-from django.test import TestCase
+from django.test import Client, LiveServerTestCase, TestCase, TransactionTestCase, override_settings
 
 # Create your tests here.
 from django.contrib.auth.models import User
+from django.http import QueryDict
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from unittest import skipUnless
+import os
+import tempfile
+import json
+import threading
+import time
+from django.conf import settings
 from .models import *
+from .search import get_search_backend, reset_search_backend
+from .cache import LocalCache, filters_match, get_inventory_cache, reset_inventory_cache
+from .instrumentation import get_request_metrics
+from .warehouse_data import DEFAULT_ASSOCIATE_PASSWORD, generate_warehouse
+from .pagination import InventoryRow
+
+
+class FileDatabaseMixin:
+    """Run a test case against a SQLite database file when the test database is in memory.
+
+    Every thread shares the one connection to an in-memory test database, so requests served at
+    the same time collide on its transactions. With a file, each thread opens its own connection
+    and writers wait for each other's transactions."""
+
+    @classmethod
+    def setUpClass(cls):
+        from django.db import connection
+        cls._memory_database = None
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Keep the in-memory connection open, so its database outlives the class, and restore it afterwards
+            cls._memory_database = (connection.connection, dict(connection.settings_dict))
+            connection.connection = None
+            connection.settings_dict.update(
+                NAME=os.path.join(tempfile.mkdtemp(), 'test.sqlite3'),
+                OPTIONS={**connection.settings_dict['OPTIONS'], 'timeout': 30, 'transaction_mode': 'IMMEDIATE'},
+            )
+            call_command('migrate', verbosity=0, interactive=False)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        from django.db import connection
+        super().tearDownClass()
+        if cls._memory_database:
+            memory_connection, settings_dict = cls._memory_database
+            connection.close()
+            os.remove(connection.settings_dict['NAME'])
+            connection.settings_dict.clear()
+            connection.settings_dict.update(settings_dict)
+            connection.connection = memory_connection
 
 
 class LoginTests(TestCase):
@@ -36,6 +93,116 @@ class LoginTests(TestCase):
         resp = self.client.get('/select-operations/')
         self.assertEqual(resp.status_code, 302)  # Should redirect to login since user is logged out
 
+    def test_login_and_logout_do_not_write_associate(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/login/', {'username': self.username, 'password': self.password})
+            self.client.get('/logout/')
+        associate_writes = [query['sql'] for query in queries if '_associate' in query['sql'] and not query['sql'].startswith('SELECT')]
+        self.assertEqual(associate_writes, [])
+
+    def test_authenticate_does_not_save(self):
+        associate = Associate.objects.get(name=self.username)
+        with self.assertNumQueries(0):
+            self.assertTrue(associate.authenticate(self.password))
+            self.assertFalse(associate.authenticate('badpass'))
+
+ASSOCIATE_BACKEND = ['InventoryManagementWebApp.backends.AssociateBackend']
+ASSOCIATE_MIDDLEWARE = settings.MIDDLEWARE + ['InventoryManagementWebApp.middleware.AssociateMiddleware']
+
+class AssociateResolutionTests(TestCase):
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.inventory_item = Inventory.objects.create(
+            label_id='ITEM123',
+            storage_location='A1',
+            quantity_on_pallet=50,
+            product_description='Test Product',
+            associate=self.associate
+        )
+        self.url = '/api/inventory-products/%d/adjust/' % self.inventory_item.record_id
+
+    def count_adjust_queries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.post(self.url, {'increase_quantity': '1'})
+        self.assertEqual(resp.status_code, 200)
+        return len(queries)
+
+    def test_backend_joins_associate_into_user_query(self):
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        without_backend = self.count_adjust_queries()
+        self.client.get('/logout/')
+        with self.settings(AUTHENTICATION_BACKENDS=ASSOCIATE_BACKEND, MIDDLEWARE=ASSOCIATE_MIDDLEWARE):
+            self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+            self.assertEqual(self.count_adjust_queries(), without_backend - 1)
+
+    def test_cached_user_skips_query_until_associate_changes(self):
+        from django.core.cache import cache
+        self.addCleanup(cache.clear)
+        with self.settings(AUTHENTICATION_BACKENDS=ASSOCIATE_BACKEND, MIDDLEWARE=ASSOCIATE_MIDDLEWARE, INVENTORY_USER_CACHE_TIMEOUT=30):
+            self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+            uncached = self.count_adjust_queries()
+            self.assertEqual(self.count_adjust_queries(), uncached - 1)
+            self.associate.is_manager = False
+            self.associate.save()
+            self.assertEqual(self.count_adjust_queries(), uncached)
+            resp = self.client.delete('/api/inventory-products/%d/' % self.inventory_item.record_id)
+            self.assertEqual(resp.status_code, 403)
+
+    def test_middleware_sets_request_associate(self):
+        from django.test import RequestFactory
+        from .middleware import AssociateMiddleware
+        request = RequestFactory().get('/')
+        request.user = self.associate.django_user
+        AssociateMiddleware(lambda request: None)(request)
+        self.assertEqual(request.associate.name, 'inventorymanager')
+
+class SessionTests(TestCase):
+    def setUp(self):
+        Associate.objects.create(name='testassociate', password='Secr3tPass!')
+
+    def test_login_writes_session_once_after_creating_it(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/login/', {'username': 'testassociate', 'password': 'Secr3tPass!'})
+        session_writes = [query['sql'] for query in queries if 'django_session' in query['sql'] and query['sql'].startswith(('INSERT', 'UPDATE'))]
+        # The session is created when login() cycles its key, then saved once with the signed in user
+        self.assertEqual(len(session_writes), 2)
+
+    def test_signed_in_requests_do_not_write_session(self):
+        self.client.post('/login/', {'username': 'testassociate', 'password': 'Secr3tPass!'})
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/select-operations/')
+        self.assertFalse([query for query in queries if 'django_session' in query['sql'] and not query['sql'].startswith('SELECT')])
+
+    def test_signed_cookie_sessions_sign_in_and_out(self):
+        from .session_settings import session_settings
+        with self.settings(**session_settings('signed_cookies')):
+            resp = self.client.post('/login/', {'username': 'testassociate', 'password': 'Secr3tPass!'})
+            self.assertTrue(resp.url.endswith('/select-operations/'))
+            self.assertEqual(self.client.get('/select-operations/').status_code, 200)
+            self.client.get('/logout/')
+            self.assertEqual(self.client.get('/select-operations/').status_code, 302)
+
+    def test_unknown_session_store_is_rejected(self):
+        from .session_settings import session_settings
+        with self.assertRaises(ValueError):
+            session_settings('file')
+
+    def test_benchmark_reports_each_store(self):
+        out = StringIO()
+        call_command('benchmark_sessions', 'testassociate', 'Secr3tPass!', requests=3, stores=['db', 'cache', 'signed_cookies'], stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split(':')[0] for line in lines], ['db', 'cache', 'signed_cookies'])
+        self.assertIn('(0.00 session queries)', lines[1])
+        self.assertIn('(0.00 session queries)', lines[2])
+
 class InventoryTests(TestCase):
     def setUp(self):
         # Create a test associate
@@ -108,6 +275,14 @@ class InventoryTests(TestCase):
         self.assertEqual(transaction.action_name, TransactionHistory.Actions.DELETED)
         self.assertEqual(transaction.performed_by.id, self.associate.id)
 
+    def test_live_and_pending_deletion_managers(self):
+        self.inventory_item.delete(self.associate)
+        live_item = Inventory.objects.create(label_id='ITEM606', product_description='Live Product', associate=self.associate)
+        self.assertEqual(list(Inventory.live_items.all()), [live_item])
+        self.assertEqual(list(Inventory.pending_deletion.all()), [self.inventory_item])
+        # The default manager still returns every item
+        self.assertEqual(Inventory.objects.count(), 2)
+
     def test_cannot_delete_inventory_item_as_non_manager(self):
         with self.assertRaises(PermissionError):
             self.inventory_item.delete(self.not_manager)
@@ -171,6 +346,39 @@ class InventoryTests(TestCase):
                 quantity_on_pallet=20
             )
 
+    def test_failed_create_leaves_no_inventory_item(self):
+        initial_count = Inventory.objects.count()
+        with self.assertRaises(Exception):
+            # The item insert succeeds but its creation record cannot be written without an associate
+            Inventory.objects.create(
+                label_id='ITEM505',
+                product_description='Rolled Back Product',
+                associate=None
+            )
+        self.assertEqual(Inventory.objects.count(), initial_count)
+        self.assertFalse(Inventory.objects.filter(label_id='ITEM505').exists())
+
+    def test_create_writes_item_row_once(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            item = Inventory.objects.create(label_id='ITEM606', product_description='Single Write Product', associate=self.associate)
+        inventory_sql = [query['sql'] for query in queries if query['sql'].split(' (')[0].endswith('"InventoryManagementWebApp_inventory"')]
+        self.assertEqual(len(inventory_sql), 1)
+        self.assertTrue(inventory_sql[0].startswith('INSERT'))
+        self.assertEqual(item.creation_record().performed_by, self.associate)
+
+    def test_updates_write_only_changed_column(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            self.inventory_item.update_quantity(60, self.associate)
+        update_sql = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "InventoryManagementWebApp_inventory"')]
+        self.assertEqual(len(update_sql), 1)
+        self.assertIn('quantity_on_pallet', update_sql[0])
+        self.assertNotIn('label_id', update_sql[0])
+        self.assertNotIn('product_description', update_sql[0])
+
     def test_create_inventory_item_with_duplicate_label_id(self):
         Inventory.objects.create(
             label_id='DUPLICATE123',
@@ -190,6 +398,689 @@ class InventoryTests(TestCase):
         self.assertIsNotNone(second_item)
         self.assertEqual(second_item.label_id, 'DUPLICATE123')
 
+class AdjustInventoryQuantityTests(TestCase):
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        self.inventory_item = Inventory.objects.create(
+            label_id='ITEM123',
+            storage_location='A1',
+            quantity_on_pallet=50,
+            product_description='Test Product',
+            associate=self.associate
+        )
+
+    def test_adjust_quantity_records_before_and_after(self):
+        # Another scanner changed the pallet after this copy of the item was loaded
+        Inventory.objects.filter(record_id=self.inventory_item.record_id).update(quantity_on_pallet=40)
+        self.inventory_item.adjust_quantity(-15, self.associate)
+        self.assertEqual(Inventory.objects.get(record_id=self.inventory_item.record_id).quantity_on_pallet, 25)
+        self.assertEqual(self.inventory_item.quantity_on_pallet, 25)
+        transaction = TransactionHistory.objects.get(inventory_item=self.inventory_item, action_name=TransactionHistory.Actions.EDIT_QUANTITY)
+        self.assertEqual((transaction.previous_quantity, transaction.new_quantity), (40, 25))
+
+    def test_adjust_quantity_below_zero_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.inventory_item.adjust_quantity(-51, self.associate)
+        self.assertEqual(Inventory.objects.get(record_id=self.inventory_item.record_id).quantity_on_pallet, 50)
+        self.assertFalse(TransactionHistory.objects.filter(action_name=TransactionHistory.Actions.EDIT_QUANTITY).exists())
+
+    def test_update_quantity_view_post_increase_quantity(self):
+        resp = self.client.post('/update-inventory-product-quantity-on-pallet/', {
+            'product_id': self.inventory_item.record_id,
+            'increase_quantity': 5
+        })
+        self.assertContains(resp, 'Inventory product quantity updated successfully.')
+        self.assertEqual(Inventory.objects.get(record_id=self.inventory_item.record_id).quantity_on_pallet, 55)
+
+class AdjustInventoryQuantityConcurrencyTests(TransactionTestCase):
+    THREADS = 8
+    ADJUSTMENTS_PER_THREAD = 25
+
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.inventory_item = Inventory.objects.create(
+            label_id='ITEM123',
+            storage_location='A1',
+            quantity_on_pallet=0,
+            product_description='Test Product',
+            associate=self.associate
+        )
+
+    def _adjust_repeatedly(self, errors):
+        from django.db import OperationalError, connection
+        try:
+            # Each thread uses its own copy of the pallet, as each scanner request would
+            inventory_item = Inventory(record_id=self.inventory_item.record_id)
+            for _ in range(self.ADJUSTMENTS_PER_THREAD):
+                while True:
+                    try:
+                        inventory_item.adjust_quantity(1, self.associate)
+                        break
+                    except OperationalError:
+                        # SQLite reports a locked database instead of waiting; try again
+                        time.sleep(0.001)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def test_concurrent_adjustments_are_not_lost(self):
+        errors = []
+        threads = [threading.Thread(target=self._adjust_repeatedly, args=(errors,)) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        total = self.THREADS * self.ADJUSTMENTS_PER_THREAD
+        self.assertEqual(Inventory.objects.get(record_id=self.inventory_item.record_id).quantity_on_pallet, total)
+        # Every adjustment saw a different starting quantity, so none overwrote another
+        history = TransactionHistory.objects.filter(inventory_item=self.inventory_item, action_name=TransactionHistory.Actions.EDIT_QUANTITY)
+        self.assertEqual(sorted(history.values_list('previous_quantity', flat=True)), list(range(total)))
+        self.assertTrue(all(t.new_quantity == t.previous_quantity + 1 for t in history))
+
+class PurgeScheduledInventoryTests(TestCase):
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.items = [
+            Inventory.objects.create(
+                label_id='PURGE{:03d}'.format(i),
+                storage_location='A1',
+                quantity_on_pallet=10,
+                product_description='Purge Product {}'.format(i),
+                associate=self.associate
+            )
+            for i in range(4)
+        ]
+        for item in self.items[:3]:
+            item.delete(self.associate)
+        # Two items have waited out TIME_TO_WAIT_BEFORE_DELETION; the third was deleted today and the fourth is live
+        Inventory.objects.filter(record_id__in=[item.record_id for item in self.items[:2]]).update(
+            scheduled_for_deletion=timezone.now() - timedelta(days=TIME_TO_WAIT_BEFORE_DELETION + 1)
+        )
+
+    def test_purge_deletes_expired_items_and_history_in_batches(self):
+        out = StringIO()
+        call_command('purge_scheduled_inventory', batch_size=1, sleep=0, stdout=out)
+        self.assertIn('Batch 2: Purged 1 inventory items, 2 history records', out.getvalue())
+        self.assertIn('Purged 2 inventory items in total.', out.getvalue())
+        self.assertEqual(sorted(Inventory.objects.values_list('label_id', flat=True)), ['PURGE002', 'PURGE003'])
+        self.assertFalse(TransactionHistory.objects.filter(inventory_item_id__in=[item.record_id for item in self.items[:2]]).exists())
+
+    def test_purge_dry_run_deletes_nothing(self):
+        out = StringIO()
+        call_command('purge_scheduled_inventory', sleep=0, dry_run=True, stdout=out)
+        self.assertIn('Would purge 2 inventory items in total.', out.getvalue())
+        self.assertEqual(Inventory.objects.count(), 4)
+
+class InventorySummaryTests(TestCase):
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        self.inventory_item = Inventory.objects.create(
+            label_id='ITEM123',
+            storage_location='A1',
+            quantity_on_pallet=50,
+            product_description='Test Product',
+            associate=self.associate
+        )
+        Inventory.objects.create(
+            label_id='ITEM456',
+            storage_location='A1',
+            quantity_on_pallet=20,
+            product_description='Other Product',
+            associate=self.associate
+        )
+
+    def totals(self, model, key):
+        summary = model.objects.filter(pk=key).first()
+        return (summary.pallet_count, summary.total_units) if summary is not None else (0, 0)
+
+    def test_summaries_follow_moves_quantity_changes_and_deletes(self):
+        self.assertEqual(self.totals(LocationSummary, 'A1'), (2, 70))
+        self.assertEqual(self.totals(ProductSummary, 'Test Product'), (1, 50))
+        self.inventory_item.update_location('B2', self.associate)
+        self.assertEqual(self.totals(LocationSummary, 'A1'), (1, 20))
+        self.assertEqual(self.totals(LocationSummary, 'B2'), (1, 50))
+        self.inventory_item.update_quantity(30, self.associate)
+        self.inventory_item.adjust_quantity(5, self.associate)
+        self.assertEqual(self.totals(LocationSummary, 'B2'), (1, 35))
+        self.assertEqual(self.totals(ProductSummary, 'Test Product'), (1, 35))
+        self.inventory_item.delete(self.associate)
+        self.inventory_item.delete(self.associate)
+        self.assertEqual(self.totals(LocationSummary, 'B2'), (0, 0))
+        self.assertEqual(self.totals(ProductSummary, 'Test Product'), (0, 0))
+
+    def test_batch_updates_and_imports_update_summaries(self):
+        self.client.post('/batch-update-inventory-products/', json.dumps({'updates': [
+            {'product_id': self.inventory_item.record_id, 'new_location': 'C3'},
+            {'product_id': self.inventory_item.record_id, 'new_quantity': 10},
+        ]}), content_type='application/json')
+        self.assertEqual(self.totals(LocationSummary, 'C3'), (1, 10))
+        self.assertEqual(self.totals(LocationSummary, 'A1'), (1, 20))
+        manifest = SimpleUploadedFile('manifest.csv', b'label_id,storage_location,quantity_on_pallet,product_description\nNEW1,C3,4,Test Product\n')
+        self.client.post('/bulk-import-inventory-products/', {'manifest': manifest, 'manifest_format': 'csv'})
+        self.assertEqual(self.totals(LocationSummary, 'C3'), (2, 14))
+        self.assertEqual(self.totals(ProductSummary, 'Test Product'), (2, 14))
+
+    def test_rebuild_command_matches_incremental_totals(self):
+        self.inventory_item.update_location('B2', self.associate)
+        expected = sorted(LocationSummary.objects.filter(pallet_count__gt=0).values_list('storage_location', 'pallet_count', 'total_units'))
+        LocationSummary.objects.update(pallet_count=99)
+        out = StringIO()
+        call_command('rebuild_inventory_summaries', stdout=out)
+        self.assertIn('Rebuilt summaries of 2 storage locations and 2 products.', out.getvalue())
+        self.assertEqual(sorted(LocationSummary.objects.values_list('storage_location', 'pallet_count', 'total_units')), expected)
+
+    def test_summary_page_looks_up_location_by_key(self):
+        with self.assertNumQueries(3):
+            # Session, user and the summary lookup
+            resp = self.client.get('/inventory-summary/', {'storage_location': 'A1'})
+        self.assertContains(resp, '<td>70</td>', html=True)
+        self.assertEqual(resp.context['product_summaries'], [])
+
+class InventoryApiTests(TestCase):
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        self.items = [
+            Inventory.objects.create(
+                label_id='API{:03d}'.format(i),
+                storage_location='A1',
+                quantity_on_pallet=10,
+                product_description='Api Product {}'.format(i),
+                associate=self.associate
+            )
+            for i in range(3)
+        ]
+
+    def test_create_returns_compact_product(self):
+        resp = self.client.post('/api/inventory-products/?fields=record_id,label_id', json.dumps({
+            'label_id': 'API999', 'storage_location': 'B2', 'quantity_on_pallet': 5, 'product_description': 'New Product'
+        }), content_type='application/json')
+        self.assertEqual(resp.status_code, 201)
+        product = Inventory.objects.get(label_id='API999')
+        self.assertEqual(resp.content, b'{"record_id":%d,"label_id":"API999"}' % product.record_id)
+
+    def test_create_without_description(self):
+        resp = self.client.post('/api/inventory-products/', json.dumps({'label_id': 'API998', 'storage_location': 'B2', 'quantity_on_pallet': 5}), content_type='application/json')
+        self.assertEqual(resp.status_code, 201)
+        resp = self.client.post('/api/inventory-products/', {'label_id': 'API999', 'storage_location': 'B2', 'quantity_on_pallet': 5})
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(list(Inventory.objects.filter(label_id__in=['API998', 'API999']).values_list('product_description', flat=True)), ['', ''])
+
+    def test_create_rejects_invalid_product(self):
+        resp = self.client.post('/api/inventory-products/', json.dumps({'label_id': 'API999', 'storage_location': 'TOOLONG', 'quantity_on_pallet': 5}), content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('storage_location', resp.json()['error'])
+        self.assertFalse(Inventory.objects.filter(label_id='API999').exists())
+
+    def test_search_is_paged_with_cursors(self):
+        resp = self.client.get('/api/inventory-products/', {'label_id': 'API', 'page_size': 2, 'fields': 'record_id'})
+        self.assertEqual(resp.json(), {'results': [{'record_id': self.items[0].record_id}, {'record_id': self.items[1].record_id}], 'next': self.items[1].record_id, 'previous': None})
+        resp = self.client.get('/api/inventory-products/', {'label_id': 'API', 'page_size': 2, 'fields': 'record_id', 'after': self.items[1].record_id})
+        self.assertEqual(resp.json()['results'], [{'record_id': self.items[2].record_id}])
+        self.assertLess(len(resp.content), 100)
+
+    def test_unknown_field_is_rejected(self):
+        resp = self.client.get('/api/inventory-products/', {'fields': 'record_id,password'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_detail_with_history(self):
+        resp = self.client.get('/api/inventory-products/%d/' % self.items[0].record_id, {'fields': 'label_id', 'history': 1})
+        data = resp.json()
+        self.assertEqual(data['label_id'], 'API000')
+        self.assertEqual([transaction['action_name'] for transaction in data['history']], ['CREA'])
+        self.assertEqual(self.client.get('/api/inventory-products/999999/').status_code, 404)
+
+    def test_move_and_adjust(self):
+        url = '/api/inventory-products/%d/' % self.items[0].record_id
+        resp = self.client.post(url + 'move/?fields=storage_location', json.dumps({'new_location': 'C3'}), content_type='application/json')
+        self.assertEqual(resp.json(), {'storage_location': 'C3'})
+        resp = self.client.post(url + 'adjust/?fields=quantity_on_pallet', {'increase_quantity': '-4'})
+        self.assertEqual(resp.json(), {'quantity_on_pallet': 6})
+        resp = self.client.post(url + 'adjust/', {'new_quantity': '-1'})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post('/api/inventory-products/999999/move/', {'new_location': 'C3'})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_delete_requires_manager(self):
+        url = '/api/inventory-products/%d/?fields=scheduled_for_deletion' % self.items[0].record_id
+        resp = self.client.delete(url)
+        self.assertIsNotNone(resp.json()['scheduled_for_deletion'])
+        Associate.objects.create(name='picker', password='P1ck3r!', is_manager=False)
+        self.client.get('/logout/')
+        self.client.post('/login/', {'username': 'picker', 'password': 'P1ck3r!'})
+        self.assertEqual(self.client.delete('/api/inventory-products/%d/' % self.items[1].record_id).status_code, 403)
+        self.assertIsNone(Inventory.objects.get(record_id=self.items[1].record_id).scheduled_for_deletion)
+
+    def test_requires_login(self):
+        self.client.get('/logout/')
+        resp = self.client.get('/api/inventory-products/')
+        self.assertEqual(resp.status_code, 401)
+
+class AsyncInventoryApiTests(TestCase):
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.items = [
+            Inventory.objects.create(
+                label_id='ASYNC{:03d}'.format(i),
+                storage_location='A1',
+                quantity_on_pallet=10,
+                product_description='Async Product {}'.format(i),
+                associate=self.associate
+            )
+            for i in range(3)
+        ]
+
+    async def test_search_and_read(self):
+        await self.async_client.aforce_login(self.associate.django_user)
+        resp = await self.async_client.get('/async-api/inventory-products/', {'label_id': 'ASYNC', 'page_size': 2, 'fields': 'label_id'})
+        self.assertEqual(resp.json(), {'results': [{'label_id': 'ASYNC000'}, {'label_id': 'ASYNC001'}], 'next': self.items[1].record_id, 'previous': None})
+        resp = await self.async_client.get('/async-api/inventory-products/%d/' % self.items[2].record_id, {'history': 1})
+        self.assertEqual(resp.json()['label_id'], 'ASYNC002')
+        self.assertEqual(len(resp.json()['history']), 1)
+        resp = await self.async_client.get('/async-api/inventory-products/999999/')
+        self.assertEqual(resp.status_code, 404)
+
+    async def test_move_and_adjust(self):
+        await self.async_client.aforce_login(self.associate.django_user)
+        url = '/async-api/inventory-products/%d/' % self.items[0].record_id
+        resp = await self.async_client.post(url + 'move/?fields=storage_location', {'new_location': 'C3'})
+        self.assertEqual(resp.json(), {'storage_location': 'C3'})
+        resp = await self.async_client.post(url + 'adjust/?fields=quantity_on_pallet', {'increase_quantity': '5'})
+        self.assertEqual(resp.json(), {'quantity_on_pallet': 15})
+        self.assertEqual(await TransactionHistory.objects.filter(inventory_item_id=self.items[0].record_id).acount(), 3)
+
+    async def test_requires_login(self):
+        resp = await self.async_client.get('/async-api/inventory-products/')
+        self.assertEqual(resp.status_code, 401)
+
+class AsyncScreenTests(TestCase):
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.items = [
+            Inventory.objects.create(
+                label_id='ASYNC{:03d}'.format(i),
+                storage_location='A1',
+                quantity_on_pallet=10,
+                product_description='Async Product {}'.format(i),
+                associate=self.associate
+            )
+            for i in range(3)
+        ]
+
+    async def test_search(self):
+        await self.async_client.aforce_login(self.associate.django_user)
+        resp = await self.async_client.post('/async/read-inventory-products/', {'label_id': 'ASYNC', 'page_size': 2})
+        self.assertEqual([product.label_id for product in resp.context['inventory_products']], ['ASYNC000', 'ASYNC001'])
+        self.assertContains(resp, 'Welcome, inventorymanager!')
+        resp = await self.async_client.post('/async/update-inventory-product-location/', {'label_id': 'NONE'})
+        self.assertContains(resp, 'No inventory products found matching the criteria.')
+
+    async def test_location_update_renders_the_screen_again(self):
+        await self.async_client.aforce_login(self.associate.django_user)
+        resp = await self.async_client.post('/async/update-inventory-product-location/', {
+            'label_id': 'ASYNC', 'product_id': str(self.items[0].record_id), 'new_storage_location': 'C3',
+        })
+        self.assertContains(resp, 'Inventory product location updated successfully.')
+        self.assertEqual([product.storage_location for product in resp.context['inventory_products']], ['C3'])
+        self.assertEqual((await Inventory.objects.aget(record_id=self.items[0].record_id)).storage_location, 'C3')
+
+    async def test_quantity_update_returns_the_row(self):
+        await self.async_client.aforce_login(self.associate.django_user)
+        resp = await self.async_client.post('/async/update-inventory-product-quantity-on-pallet/', {
+            'product_id': str(self.items[1].record_id), 'increase_quantity': '5', 'fragment': 'row',
+        })
+        self.assertContains(resp, '<td>15</td>', html=True)
+        self.assertNotContains(resp, '<html')
+        resp = await self.async_client.post('/async/update-inventory-product-quantity-on-pallet/', {
+            'product_id': '999999', 'new_quantity': '5', 'fragment': 'row',
+        })
+        self.assertEqual(resp.status_code, 400)
+
+    async def test_requires_login(self):
+        resp = await self.async_client.get('/async/read-inventory-products/')
+        self.assertEqual(resp.status_code, 302)
+        self.assertIn('/login/', resp['Location'])
+
+class BenchmarkHandlersTests(FileDatabaseMixin, TransactionTestCase):
+    def test_benchmark_reports_both_handlers(self):
+        associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        Inventory.objects.create(label_id='BENCH001', storage_location='A1', quantity_on_pallet=10, product_description='Bench Product', associate=associate)
+        out = StringIO()
+        call_command('benchmark_handlers', 'inventorymanager', scanners=2, requests=2, workers=2, stdout=out)
+        self.assertIn('WSGI handler: 8 requests', out.getvalue())
+        self.assertIn('ASGI handler: 8 requests', out.getvalue())
+        self.assertIn(', 0 errors', out.getvalue())
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        self.items = [
+            Inventory.objects.create(
+                label_id='EXPORT{:03d}'.format(i),
+                storage_location='A{}'.format(i),
+                quantity_on_pallet=10 + i,
+                product_description='Export, Product {}'.format(i),
+                associate=self.associate
+            )
+            for i in range(3)
+        ]
+        self.items[1].update_location('B1', self.associate)
+
+    def test_inventory_csv_export_streams_filtered_rows(self):
+        resp = self.client.get('/export-inventory-products/', {'label_id': 'EXPORT', 'storage_location': 'A'})
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp['Content-Type'], 'text/csv')
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'record_id,label_id,storage_location,quantity_on_pallet,product_description,scheduled_for_deletion')
+        self.assertEqual(lines[1:], ['%d,EXPORT000,A0,10,"Export, Product 0",' % self.items[0].record_id, '%d,EXPORT002,A2,12,"Export, Product 2",' % self.items[2].record_id])
+
+    def test_history_ndjson_export_filters_by_date_and_action(self):
+        today = timezone.localdate().isoformat()
+        resp = self.client.get('/export-transaction-history/', {'format': 'ndjson', 'action_name': 'MOVE', 'since': today, 'until': today})
+        rows = [json.loads(line) for line in b''.join(resp.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['inventory_item_id'], rows[0]['performed_by_name'], rows[0]['new_location']), (self.items[1].record_id, 'inventorymanager', 'B1'))
+        resp = self.client.get('/export-transaction-history/', {'format': 'ndjson', 'until': '2000-01-01'})
+        self.assertEqual(b''.join(resp.streaming_content), b'')
+        self.assertEqual(self.client.get('/export-transaction-history/', {'since': 'yesterday'}).status_code, 400)
+
+    def test_export_command_writes_history(self):
+        out = StringIO()
+        call_command('export_inventory', 'history', product_id=str(self.items[1].record_id), stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('record_id,inventory_item_id,action_name,timestamp,performed_by_name'))
+
+@override_settings(INVENTORY_FEED_POLL_INTERVAL_SECONDS=0.01)
+class TransactionHistoryChangeFeedTests(TestCase):
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        # Feed positions are handed out once each write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.inventory_item = Inventory.objects.create(
+                label_id='FEED001',
+                storage_location='A1',
+                quantity_on_pallet=10,
+                product_description='Feed Product',
+                associate=self.associate
+            )
+            self.inventory_item.update_location('B2', self.associate)
+            self.inventory_item.update_quantity(7, self.associate)
+
+    def test_feed_returns_batches_in_order_with_item_state(self):
+        resp = self.client.get('/api/transaction-history/changes/', {'limit': 2})
+        data = resp.json()
+        self.assertEqual([change['action_name'] for change in data['changes']], ['CREA', 'MOVE'])
+        self.assertEqual(data['changes'][1]['item'], {
+            'record_id': self.inventory_item.record_id, 'label_id': 'FEED001', 'storage_location': 'B2',
+            'quantity_on_pallet': 7, 'product_description': 'Feed Product', 'scheduled_for_deletion': None,
+        })
+        resp = self.client.get('/api/transaction-history/changes/', {'after': data['next'], 'limit': 2})
+        data = resp.json()
+        self.assertEqual([change['action_name'] for change in data['changes']], ['QUAN'])
+        resp = self.client.get('/api/transaction-history/changes/', {'after': data['next']})
+        self.assertEqual(resp.json(), {'changes': [], 'next': data['next']})
+
+    def test_long_poll_waits_then_returns_empty_batch(self):
+        last = TransactionHistory.objects.order_by('-record_id').first().record_id
+        started = time.monotonic()
+        resp = self.client.get('/api/transaction-history/changes/', {'after': last, 'wait': '0.1'})
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertEqual(resp.json()['changes'], [])
+
+    def test_change_committed_late_with_a_lower_record_id_is_not_skipped(self):
+        last = self.client.get('/api/transaction-history/changes/').json()['next']
+        # A record id handed out before the ones already returned, whose transaction commits only now
+        late_record_id = TransactionHistory.objects.order_by('record_id').first().record_id - 100
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionHistory.objects.create(record_id=late_record_id, inventory_item=self.inventory_item,
+                                              action_name=TransactionHistory.Actions.EDIT_QUANTITY, performed_by=self.associate,
+                                              previous_quantity=7, new_quantity=8)
+        data = self.client.get('/api/transaction-history/changes/', {'after': last}).json()
+        self.assertEqual([change['record_id'] for change in data['changes']], [late_record_id])
+        self.assertGreater(data['next'], last)
+
+    def test_changes_left_without_a_position_are_positioned_by_the_feed(self):
+        last = self.client.get('/api/transaction-history/changes/').json()['next']
+        # As if the writer stopped between its commit and handing out the positions
+        stranded = TransactionHistory.objects.create(inventory_item=self.inventory_item, action_name=TransactionHistory.Actions.EDIT_QUANTITY,
+                                                     performed_by=self.associate, previous_quantity=7, new_quantity=9)
+        with override_settings(INVENTORY_FEED_SETTLE_SECONDS=60):
+            self.assertEqual(self.client.get('/api/transaction-history/changes/', {'after': last}).json()['changes'], [])
+        with override_settings(INVENTORY_FEED_SETTLE_SECONDS=0):
+            data = self.client.get('/api/transaction-history/changes/', {'after': last}).json()
+        self.assertEqual([change['record_id'] for change in data['changes']], [stranded.record_id])
+
+    async def test_async_long_poll_returns_changes(self):
+        await self.async_client.aforce_login(self.associate.django_user)
+        resp = await self.async_client.get('/async-api/transaction-history/changes/', {'wait': '1'})
+        self.assertEqual(len(resp.json()['changes']), 3)
+
+INSTRUMENTED_MIDDLEWARE = ['InventoryManagementWebApp.instrumentation.InstrumentationMiddleware'] + settings.MIDDLEWARE
+
+@override_settings(MIDDLEWARE=INSTRUMENTED_MIDDLEWARE, INVENTORY_INSTRUMENTATION=True)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        for label_id in ('INST001', 'INST002'):
+            Inventory.objects.create(
+                label_id=label_id,
+                storage_location='A1',
+                quantity_on_pallet=10,
+                product_description='Instrumented Product',
+                associate=self.associate
+            )
+        get_request_metrics().clear()
+        self.addCleanup(get_request_metrics().clear)
+
+    def test_records_queries_render_time_and_size_per_view(self):
+        resp = self.client.get('/read-inventory-products/')
+        summary = self.client.get('/instrumentation-summary/').json()
+        view = summary['views']['read_inventory_products']
+        self.assertEqual(view['requests'], 1)
+        self.assertGreater(view['mean_queries'], 0)
+        self.assertGreater(view['mean_render_ms'], 0)
+        self.assertEqual(view['mean_response_bytes'], len(resp.content))
+
+    def test_metrics_endpoint_serves_prometheus_totals(self):
+        self.client.get('/read-inventory-products/')
+        resp = self.client.get('/metrics/')
+        self.assertTrue(resp['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('inventory_requests_total{view="read_inventory_products"} 1', resp.content.decode())
+        self.assertIn('# TYPE inventory_request_queries_total counter', resp.content.decode())
+
+    @override_settings(INVENTORY_SLOW_QUERY_MS=0, INVENTORY_REPEATED_QUERY_THRESHOLD=2)
+    def test_slow_and_repeated_queries_are_flagged(self):
+        with self.assertLogs('InventoryManagementWebApp.instrumentation', 'WARNING') as logs:
+            self.client.post('/batch-update-inventory-products/', {
+                'product_id': list(Inventory.objects.values_list('record_id', flat=True)),
+                'new_storage_location': ['B2', 'B3'],
+            })
+        view = get_request_metrics().summary()['views']['batch_update_inventory_products']
+        self.assertTrue(view['slow_queries'])
+        # Each moved product writes its own row and history entry with the same SQL
+        self.assertTrue(any(query['count'] >= 2 for query in view['repeated_queries']))
+        self.assertTrue(any('Slow query' in line for line in logs.output))
+
+    @override_settings(INVENTORY_INSTRUMENTATION=False)
+    def test_disabled_middleware_records_nothing(self):
+        # A new client loads the middleware under the overridden settings
+        Client().get('/read-inventory-products/')
+        self.assertEqual(get_request_metrics().summary()['requests'], 0)
+
+
+class WarehouseDataTests(TestCase):
+    def test_generated_warehouse_is_seeded_and_consistent(self):
+        report = generate_warehouse(200, seed=7, associates=3, long_histories=2, long_history_length=40, batch_size=64)
+        self.assertEqual(Inventory.objects.count(), 200)
+        self.assertEqual(TransactionHistory.objects.count(), report.transactions)
+        self.assertEqual(Associate.objects.filter(name__startswith='associate').count(), 3)
+        for item in (Inventory.objects.get(record_id=report.long_history_items[0]), Inventory.objects.order_by('record_id').first()):
+            history = list(TransactionHistory.objects.filter(inventory_item=item).order_by('record_id'))
+            # Each item starts with its creation record and ends in the state its last transactions left it in
+            self.assertEqual(item.creation_record(), history[0])
+            self.assertEqual(item.storage_location, [change.new_location for change in history if change.new_location][-1])
+            self.assertEqual(item.quantity_on_pallet, [change.new_quantity for change in history if change.new_quantity is not None][-1])
+        self.assertGreater(TransactionHistory.objects.filter(inventory_item_id=report.long_history_items[0]).count(), 20)
+        timestamps = list(TransactionHistory.objects.order_by('record_id').values_list('timestamp', flat=True))
+        self.assertEqual(timestamps, sorted(timestamps))
+        # The history keeps the generated timestamps, spread over the last year
+        self.assertLess(timestamps[0], timezone.now() - timedelta(days=300))
+        self.assertEqual(ProductSummary.objects.aggregate(pallets=models.Sum('pallet_count'))['pallets'], Inventory.live_items.count())
+        first_run = list(Inventory.objects.order_by('record_id').values_list('storage_location', 'quantity_on_pallet', 'product_description'))
+        Inventory.objects.all().delete()
+        generate_warehouse(200, seed=7, associates=3, long_histories=2, long_history_length=40, batch_size=64)
+        self.assertEqual(list(Inventory.objects.order_by('record_id').values_list('storage_location', 'quantity_on_pallet', 'product_description')), first_run)
+
+    def test_benchmark_command_writes_json_results(self):
+        out = StringIO()
+        call_command('benchmark_inventory', rows=100, associates=2, long_histories=1, long_history_length=20, repeat=2, stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual(results['dataset']['items'], 100)
+        for name in ('read_inventory_products.label_id_prefix', 'read_inventory_product.long_history',
+                     'inventory.create', 'inventory.update_location', 'inventory.update_quantity'):
+            self.assertEqual(results['results'][name]['calls'], 2)
+        self.assertEqual(results['results']['read_inventory_product.long_history']['queries'], 2)
+        # The list rows are read before the write benchmarks create their products
+        self.assertEqual(results['results']['list_rows.projected_rows']['rows'], Inventory.live_items.exclude(label_id__startswith='BENCH').count())
+        self.assertIn('held_kib_per_10k_rows', results['results']['list_rows.model_instances'])
+
+
+class LoadTestTests(FileDatabaseMixin, LiveServerTestCase):
+    def setUp(self):
+        generate_warehouse(60, associates=2, long_histories=0)
+
+    def test_scanners_run_and_their_log_replays(self):
+        log_path = os.path.join(tempfile.mkdtemp(), 'requests.ndjson')
+        output_path = os.path.join(tempfile.mkdtemp(), 'results.json')
+        transactions = TransactionHistory.objects.count()
+        call_command('load_test', url=self.live_server_url, scanners=4, rounds=3, associates=2, deployment='wsgi',
+                     record=log_path, output=output_path, stdout=StringIO())
+        with open(output_path) as output_file:
+            results = json.load(output_file)
+        self.assertEqual(results['deployment'], 'wsgi')
+        self.assertEqual(results['total']['errors'], 0)
+        self.assertEqual(results['endpoints']['login']['statuses'], {'302': 4})
+        self.assertEqual(results['endpoints']['update_location']['requests'], 12)
+        new_history = TransactionHistory.objects.order_by('record_id')[transactions:]
+        self.assertEqual(len(new_history), 12 + results['endpoints']['update_quantity']['requests'])
+        # Each scanner kept its own session, so the updates were made as both associates
+        self.assertEqual({change.performed_by.name for change in new_history}, {'associate0001', 'associate0002'})
+        with open(log_path) as log:
+            self.assertNotIn(DEFAULT_ASSOCIATE_PASSWORD, log.read())
+        out = StringIO()
+        call_command('load_test', url=self.live_server_url, replay=log_path, concurrency=2, output=output_path, stdout=out)
+        with open(output_path) as output_file:
+            replayed = json.load(output_file)
+        self.assertEqual(replayed['total']['requests'], results['total']['requests'])
+        self.assertEqual(replayed['total']['errors'], 0)
+        # The password left out of the log is sent in its place, so every replayed sign in succeeds
+        self.assertEqual(replayed['endpoints']['POST /login/']['statuses'], {'302': 4})
+        self.assertIn('POST /update-inventory-product-location/', replayed['endpoints'])
+
+
+class LocalCacheTests(TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        local_cache = LocalCache(timeout=60, max_entries=2)
+        local_cache.set('a', 1)
+        local_cache.set('b', 2)
+        local_cache.get('a')
+        local_cache.set('c', 3)
+        self.assertIsNone(local_cache.get('b'))
+        self.assertEqual((local_cache.get('a'), local_cache.get('c')), (1, 3))
+        self.assertEqual(local_cache.evictions, 1)
+
+    def test_entries_expire_after_timeout(self):
+        local_cache = LocalCache(timeout=0, max_entries=2)
+        local_cache.set('a', 1)
+        time.sleep(0.001)
+        self.assertIsNone(local_cache.get('a'))
+
+    def test_filters_match(self):
+        values = {'label_id': 'ITEM001', 'storage_location': 'A1', 'quantity_on_pallet': 5, 'scheduled_for_deletion': None}
+        self.assertTrue(filters_match({'label_id__startswith': 'item', 'scheduled_for_deletion__isnull': True}, values))
+        self.assertFalse(filters_match({'storage_location__startswith': 'B'}, values))
+        self.assertFalse(filters_match({'quantity_on_pallet': 6}, values))
+
+class InventoryCacheTests(TransactionTestCase):
+    def setUp(self):
+        reset_inventory_cache()
+        self.addCleanup(reset_inventory_cache)
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        self.item1 = Inventory.objects.create(label_id='ITEM001', storage_location='A1', quantity_on_pallet=20, product_description='Test Product 1', associate=self.associate)
+        self.item2 = Inventory.objects.create(label_id='ITEM002', storage_location='B2', quantity_on_pallet=30, product_description='Test Product 2', associate=self.associate)
+
+    def _search(self, storage_location):
+        from .views import Middleware
+        return [p.record_id for p in Middleware._read_inventory_products(QueryDict('storage_location=' + storage_location), self.associate)]
+
+    def test_repeated_search_is_served_from_cache(self):
+        self.assertEqual(self._search('A1'), [self.item1.record_id])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._search('A1'), [self.item1.record_id])
+        self.assertEqual(get_inventory_cache().statistics()['hits'], 1)
+
+    def test_write_invalidates_only_affected_searches(self):
+        self._search('A1')
+        self._search('B2')
+        # Moving item 2 into A1 changes the A1 search, and its old B2 search, but not a C3 search
+        self._search('C3')
+        self.item2.update_location('A1', self.associate)
+        self.assertEqual(self._search('A1'), [self.item1.record_id, self.item2.record_id])
+        self.assertEqual(self._search('B2'), [])
+        with self.assertNumQueries(0):
+            self._search('C3')
+
+    def test_create_invalidates_matching_searches(self):
+        self._search('A1')
+        new_item = Inventory.objects.create(label_id='ITEM003', storage_location='A1', product_description='Test Product 3', associate=self.associate)
+        self.assertEqual(self._search('A1'), [self.item1.record_id, new_item.record_id])
+
+    def test_item_detail_is_cached_and_invalidated(self):
+        url = '/read-inventory-product/?q={}'.format(self.item1.record_id)
+        self.client.get(url)
+        self.assertEqual(get_inventory_cache().statistics()['hits'], 0)
+        resp = self.client.get(url)
+        self.assertEqual(get_inventory_cache().statistics()['hits'], 1)
+        invalidations = get_inventory_cache().statistics()['invalidations']
+        self.item1.update_quantity(99, self.associate)
+        resp = self.client.get(url)
+        self.assertEqual(resp.context['inventory_product'].quantity_on_pallet, 99)
+        # The write invalidates once straight away and once more when it commits
+        self.assertEqual(self.client.get('/inventory-cache-statistics/').json()['invalidations'], invalidations + 2)
+
+    def test_bulk_import_invalidates_once_per_batch_after_commit(self):
+        from .bulk_import import import_inventory_manifest
+        self._search('A1')
+        invalidations = get_inventory_cache().statistics()['invalidations']
+        manifest = StringIO(''.join('{{"label_id": "BULK{:03d}", "storage_location": "A1"}}\n'.format(i) for i in range(5)))
+        report = import_inventory_manifest(manifest, 'json', self.associate, batch_size=2)
+        self.assertEqual(report.created, 5)
+        self.assertEqual(get_inventory_cache().statistics()['invalidations'], invalidations + 3)
+        self.assertEqual(len(self._search('A1')), 6)
+
+    def test_purge_invalidates_the_purged_items_once_per_batch(self):
+        from .purge import purge_expired_inventory
+        self.item1.delete(self.associate)
+        Inventory.objects.filter(record_id=self.item1.record_id).update(scheduled_for_deletion=timezone.now() - timedelta(days=TIME_TO_WAIT_BEFORE_DELETION + 1))
+        cache_filters = {'storage_location__startswith': 'A1', 'scheduled_for_deletion__isnull': False}
+        get_inventory_cache().set_search_page(cache_filters, {}, [self.item1])
+        get_inventory_cache().set_item_detail(self.item1.record_id, {'inventory_product': self.item1})
+        self.assertIsNotNone(get_inventory_cache().get_item_detail(self.item1.record_id))
+        invalidations = get_inventory_cache().statistics()['invalidations']
+        list(purge_expired_inventory(sleep_seconds=0))
+        self.assertEqual(get_inventory_cache().statistics()['invalidations'], invalidations + 1)
+        self.assertIsNone(get_inventory_cache().get_search_page(cache_filters, {}))
+        self.assertIsNone(get_inventory_cache().get_item_detail(self.item1.record_id))
+
 class CreateNewInventoryProductViewTests(TestCase):
     def setUp(self):
         # Create a test associate and log in
@@ -231,6 +1122,100 @@ class CreateNewInventoryProductViewTests(TestCase):
         with self.assertRaises(Inventory.DoesNotExist):
             Inventory.objects.get(product_description='New Test Product')
 
+class BulkImportInventoryProductsTests(TestCase):
+    def setUp(self):
+        # Create a test associate and log in
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+
+    def test_bulk_import_view_post_csv(self):
+        manifest = SimpleUploadedFile('manifest.csv', (
+            'label_id,storage_location,quantity_on_pallet,product_description\n'
+            'BULK001,A1,10,Bulk Product 1\n'
+            ' ,A2,20,Missing Label\n'
+            'BULK003,,,Bulk Product 3\n'
+        ).encode())
+        resp = self.client.post('/bulk-import-inventory-products/', {'manifest': manifest, 'manifest_format': 'csv'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, '2 inventory products created successfully.')
+        self.assertContains(resp, '1 manifest rows could not be imported.')
+        self.assertEqual(resp.context['report'].errors[0][0], 2)
+        # Missing columns fall back to the same defaults as a single create
+        item = Inventory.objects.get(label_id='BULK003')
+        self.assertEqual(item.storage_location, 'HOLD')
+        self.assertEqual(item.quantity_on_pallet, -100)
+
+    def test_bulk_import_json_lines_in_batches(self):
+        from .bulk_import import import_inventory_manifest
+        manifest = StringIO(''.join(
+            '{{"label_id": "JSON{:03d}", "storage_location": "B{}", "quantity_on_pallet": {}, "product_description": "Json Product"}}\n'.format(i, i, i)
+            for i in range(5)
+        ))
+        report = import_inventory_manifest(manifest, 'json', self.associate, batch_size=2)
+        self.assertEqual(report.created, 5)
+        self.assertEqual(report.errors, [])
+        # Every imported pallet has its creation record, like InventoryManager.create writes
+        for item in Inventory.objects.filter(label_id__startswith='JSON'):
+            creation_record = item.creation_record()
+            self.assertEqual(creation_record.performed_by, self.associate)
+            self.assertEqual(creation_record.new_quantity, item.quantity_on_pallet)
+
+    def test_bulk_import_json_array_reports_invalid_rows(self):
+        from .bulk_import import import_inventory_manifest
+        manifest = StringIO('[{"label_id": "ARR001", "quantity_on_pallet": 5}, {"label_id": "ARR002", "quantity_on_pallet": "many"}, 7]')
+        report = import_inventory_manifest(manifest, 'json', self.associate)
+        self.assertEqual(report.created, 1)
+        self.assertEqual([row_number for row_number, _ in report.errors], [2, 3])
+
+    def test_bulk_import_json_array_is_read_in_chunks(self):
+        from . import bulk_import
+        manifest = StringIO('[\n' + ',\n'.join(
+            '{{"label_id": "CHUNK{:03d}", "quantity_on_pallet": {}, "product_description": "Chunked, [Product]"}}'.format(i, i * 1000)
+            for i in range(20)
+        ) + '\n]\n')
+        original_read_size = bulk_import.JSON_READ_SIZE
+        bulk_import.JSON_READ_SIZE = 7
+        self.addCleanup(setattr, bulk_import, 'JSON_READ_SIZE', original_read_size)
+        report = bulk_import.import_inventory_manifest(manifest, 'json', self.associate, batch_size=6)
+        self.assertEqual((report.created, report.errors), (20, []))
+        self.assertEqual(Inventory.objects.get(label_id='CHUNK019').quantity_on_pallet, 19000)
+
+    def test_bulk_import_json_array_reports_where_it_stops_parsing(self):
+        from .bulk_import import import_inventory_manifest
+        report = import_inventory_manifest(StringIO('[{"label_id": "TRUNC001"}, {"label_id": '), 'json', self.associate)
+        self.assertEqual(report.created, 1)
+        self.assertEqual(report.errors[0][0], None)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Rejects rows with an SQLite trigger')
+    def test_bulk_import_reports_only_the_rows_the_database_refuses(self):
+        from .bulk_import import import_inventory_manifest
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TRIGGER reject_label BEFORE INSERT ON "InventoryManagementWebApp_inventory" '
+                "WHEN NEW.label_id = 'REFUSED' BEGIN SELECT RAISE(ABORT, 'label refused'); END"
+            )
+        self.addCleanup(lambda: connection.cursor().execute('DROP TRIGGER IF EXISTS reject_label'))
+        manifest = StringIO(''.join(
+            '{{"label_id": "{}", "quantity_on_pallet": 1}}\n'.format(label_id)
+            for label_id in ('ROW001', 'REFUSED', 'ROW003', 'ROW004')
+        ))
+        report = import_inventory_manifest(manifest, 'json', self.associate, batch_size=3)
+        self.assertEqual(report.created, 3)
+        self.assertEqual([row_number for row_number, _ in report.errors], [2])
+        self.assertIn('label refused', report.errors[0][1])
+        self.assertEqual(sorted(Inventory.objects.filter(label_id__startswith='ROW').values_list('label_id', flat=True)), ['ROW001', 'ROW003', 'ROW004'])
+        # Every created pallet has exactly one creation record, none were left from the refused batch
+        self.assertEqual(TransactionHistory.objects.filter(inventory_item__label_id__startswith='ROW').count(), 3)
+
+    def test_import_inventory_manifest_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as manifest:
+            manifest.write('label_id,storage_location,quantity_on_pallet,product_description\nCMD001,C1,3,Command Product\n')
+        self.addCleanup(os.remove, manifest.name)
+        out = StringIO()
+        call_command('import_inventory_manifest', manifest.name, associate='inventorymanager', stdout=out)
+        self.assertIn('Created 1 inventory products', out.getvalue())
+        self.assertTrue(Inventory.objects.filter(label_id='CMD001', storage_location='C1').exists())
+
 class ReadInventoryProductsViewTests(TestCase):
     def setUp(self):
         # Create a test associate and log in
@@ -272,6 +1257,36 @@ class ReadInventoryProductsViewTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertContains(resp, 'No inventory products found matching the criteria.')
 
+    def test_read_inventory_products_matches_prefix_case_sensitively(self):
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'item00'})
+        self.assertContains(resp, 'No inventory products found matching the criteria.')
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'ITEM00'})
+        self.assertContains(resp, 'Test Product 1')
+        self.assertContains(resp, 'Test Product 2')
+
+    def test_read_inventory_products_matches_whole_label_exactly(self):
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'ITEM00', 'exact_label_id': 'on'})
+        self.assertContains(resp, 'No inventory products found matching the criteria.')
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'ITEM002', 'exact_label_id': 'on'})
+        self.assertContains(resp, 'Test Product 2')
+        self.assertNotContains(resp, 'Test Product 1')
+
+    def test_prefix_range_skips_surrogates_and_stops_at_the_last_character(self):
+        from .views import Middleware
+        self.assertEqual(Middleware._prefix_range('label_id', 'AB')['label_id__lt'], 'AC')
+        self.assertEqual(Middleware._prefix_range('label_id', 'A\ud7ff')['label_id__lt'], 'A\ue000')
+        self.assertNotIn('label_id__lt', Middleware._prefix_range('label_id', 'A\U0010ffff'))
+
+    @skipUnless(connection.vendor == 'sqlite', 'Reads the SQLite query plan')
+    def test_prefix_and_exact_label_searches_use_the_live_label_index(self):
+        from .views import Middleware
+        products, _, _ = Middleware._filter_inventory_products(QueryDict('label_id=ITEM00'))
+        self.assertIn('USING INDEX inventory_live_label_id_idx (label_id>? AND label_id<?)', products.order_by('record_id').explain())
+        products, _, _ = Middleware._filter_inventory_products(QueryDict('label_id=ITEM001&exact_label_id=on'))
+        self.assertIn('USING INDEX inventory_live_label_id_idx (label_id=?)', products.order_by('record_id').explain())
+        products, _, _ = Middleware._filter_inventory_products(QueryDict('storage_location=A'))
+        self.assertIn('USING INDEX inventory_live_location_idx (storage_location>? AND storage_location<?)', products.explain())
+
 class UpdateInventoryProductLocationViewTests(TestCase):
     def setUp(self):
         # Create a test associate and log in
@@ -313,6 +1328,252 @@ class UpdateInventoryProductLocationViewTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertContains(resp, 'No inventory products found matching the criteria.')
 
+    def test_read_inventory_products_view_post_excludes_scheduled_for_deletion(self):
+        Inventory.objects.get(label_id='ITEM002').delete(self.associate)
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'ITEM'})
+        self.assertContains(resp, 'Test Product 1')
+        self.assertNotContains(resp, 'Test Product 2')
+        # Checking the box searches only the items scheduled for deletion
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'ITEM', 'scheduled_for_deletion': 'on'})
+        self.assertContains(resp, 'Test Product 2')
+        self.assertNotContains(resp, 'Test Product 1')
+
+    def test_read_inventory_products_view_post_label_prefix(self):
+        resp = self.client.post('/read-inventory-products/', {
+            'label_id': 'ITEM00'
+        })
+        self.assertContains(resp, 'Test Product 1')
+        self.assertContains(resp, 'Test Product 2')
+        # Label IDs are matched from the start, not anywhere in the text
+        resp = self.client.post('/read-inventory-products/', {
+            'label_id': 'TEM001'
+        })
+        self.assertContains(resp, 'No inventory products found matching the criteria.')
+
+    def test_read_inventory_products_view_post_description_substring(self):
+        resp = self.client.post('/read-inventory-products/', {
+            'product_description': 'Product 2'
+        })
+        self.assertContains(resp, 'Test Product 2')
+        self.assertNotContains(resp, 'Test Product 1')
+
+    def test_update_location_returns_only_the_row_when_asked(self):
+        page = self.client.post('/update-inventory-product-location/', {
+            'product_id': self.item1.record_id, 'new_storage_location': 'C3',
+        })
+        resp = self.client.post('/update-inventory-product-location/', {
+            'product_id': self.item1.record_id, 'new_storage_location': 'D4', 'fragment': 'row',
+        })
+        self.assertEqual(resp.status_code, 200)
+        content = resp.content.decode()
+        self.assertTrue(content.startswith(f'<tr id="{self.item1.record_id}" onclick="display_update_product_location_form('))
+        self.assertIn('<td>D4</td>', content)
+        self.assertNotIn('<form', content)
+        self.assertLess(len(resp.content) * 10, len(page.content))
+        self.assertEqual(Inventory.objects.get(record_id=self.item1.record_id).storage_location, 'D4')
+
+    def test_failed_row_update_returns_error_text(self):
+        resp = self.client.post('/update-inventory-product-location/', {
+            'product_id': '999999', 'new_storage_location': 'D4', 'fragment': 'row',
+        })
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.content.decode(), 'Failed to update inventory product location. Please try again.')
+
+    def test_row_update_of_quantity(self):
+        resp = self.client.post('/update-inventory-product-quantity-on-pallet/', {
+            'product_id': self.item2.record_id, 'new_quantity': '12', 'fragment': 'row',
+        })
+        self.assertContains(resp, '<td>12</td>')
+        self.assertContains(resp, 'display_update_product_quantity_form(')
+        # The row is read as a projected list row, like the search results
+        self.assertIsInstance(resp.context['product'], InventoryRow)
+
+    def test_navigation_and_search_form_are_cached_fragments(self):
+        cache.clear()
+        self.client.get('/update-inventory-product-location/')
+        self.assertIn('Read Inventory Items', cache.get(make_template_fragment_key('inventory_navigation', ['update_inventory_product_location'])))
+        self.assertIn('name="label_id"', cache.get(make_template_fragment_key('read_inventory_products_form')))
+        resp = self.client.get('/update-inventory-product-location/')
+        self.assertContains(resp, 'Read Inventory Items')
+        self.assertContains(resp, 'csrfmiddlewaretoken')
+        self.client.get('/select-operations/')
+        self.assertIn('Inventory Summary', cache.get(make_template_fragment_key('inventory_navigation', ['select_operations'])))
+
+class ReadInventoryProductsPaginationTests(TestCase):
+    def setUp(self):
+        # Create a test associate and log in
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        # Create enough test inventory items to fill several pages
+        self.items = [
+            Inventory.objects.create(
+                label_id='PAGE{:03d}'.format(i),
+                storage_location='A1',
+                quantity_on_pallet=i,
+                product_description='Paged Product {:03d}'.format(i),
+                associate=self.associate
+            )
+            for i in range(7)
+        ]
+
+    def test_first_page_is_limited_to_page_size(self):
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'PAGE', 'page_size': 3})
+        self.assertEqual(resp.status_code, 200)
+        page = resp.context['inventory_products']
+        self.assertEqual([p.record_id for p in page], [item.record_id for item in self.items[:3]])
+        self.assertEqual(page.next_cursor, self.items[2].record_id)
+        self.assertIsNone(page.previous_cursor)
+        self.assertContains(resp, 'Next Page')
+        self.assertNotContains(resp, 'Previous Page')
+
+    def test_pages_hold_projected_rows_of_the_list_columns(self):
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'PAGE', 'page_size': 3})
+        page = resp.context['inventory_products']
+        self.assertIsInstance(page[0], InventoryRow)
+        self.assertEqual(page[0].label_id, 'PAGE000')
+        self.assertEqual(page[0].quantity_on_pallet, 0)
+        self.assertContains(resp, 'Paged Product 000')
+
+    def test_next_and_previous_cursors(self):
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'PAGE', 'page_size': 3, 'after': self.items[2].record_id})
+        page = resp.context['inventory_products']
+        self.assertEqual([p.record_id for p in page], [item.record_id for item in self.items[3:6]])
+        self.assertEqual(page.previous_cursor, self.items[3].record_id)
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'PAGE', 'page_size': 3, 'before': page.previous_cursor})
+        page = resp.context['inventory_products']
+        self.assertEqual([p.record_id for p in page], [item.record_id for item in self.items[:3]])
+        self.assertIsNone(page.previous_cursor)
+        self.assertEqual(page.next_cursor, self.items[2].record_id)
+
+    def test_last_page_has_no_next_cursor(self):
+        resp = self.client.post('/read-inventory-products/', {'label_id': 'PAGE', 'page_size': 3, 'after': self.items[5].record_id})
+        page = resp.context['inventory_products']
+        self.assertEqual([p.record_id for p in page], [self.items[6].record_id])
+        self.assertIsNone(page.next_cursor)
+
+    def test_page_query_does_not_count_or_offset(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .views import Middleware
+        with CaptureQueriesContext(connection) as queries:
+            Middleware._read_inventory_products(QueryDict('label_id=PAGE&page_size=3&after={}'.format(self.items[0].record_id)), self.associate)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT', queries[0]['sql'].upper())
+        self.assertNotIn('OFFSET', queries[0]['sql'].upper())
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        # Start every test from a freshly built search index
+        reset_search_backend()
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        self.widget = Inventory.objects.create(label_id='LBL100', product_description='Blue Widget Large', associate=self.associate)
+        self.gadget = Inventory.objects.create(label_id='LBL200', product_description='Red Gadget', associate=self.associate)
+        self.gizmo = Inventory.objects.create(label_id='LBL300', product_description='Blue Gizmo', associate=self.associate)
+
+    def test_search_matches_partial_words_and_typos(self):
+        self.assertEqual(get_search_backend().search('widgte', limit=10), [self.widget.record_id])
+        self.assertEqual(get_search_backend().search('gadg', limit=10), [self.gadget.record_id])
+
+    def test_search_ranks_closer_matches_first(self):
+        # Both blue products match; the one with less unrelated text ranks first
+        self.assertEqual(get_search_backend().search('blue', limit=10), [self.gizmo.record_id, self.widget.record_id])
+
+    def test_search_matches_label_id(self):
+        self.assertEqual(get_search_backend().search('LBL200', limit=10)[0], self.gadget.record_id)
+
+    def test_search_index_kept_current_on_create(self):
+        get_search_backend().search('blue', limit=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            new_item = Inventory.objects.create(label_id='LBL400', product_description='Blue Sprocket', associate=self.associate)
+        self.assertIn(new_item.record_id, get_search_backend().search('sprocket', limit=10))
+
+    def test_read_inventory_products_view_post_search(self):
+        resp = self.client.post('/read-inventory-products/', {'search': 'blu gizmo'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([p.record_id for p in resp.context['inventory_products']], [self.gizmo.record_id])
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL with pg_trgm')
+class PostgresSearchBackendTests(TestCase):
+    def setUp(self):
+        from .search import PostgresSearchBackend
+        self.backend = PostgresSearchBackend(min_score=0.5)
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.widget = Inventory.objects.create(label_id='LBL100', product_description='Blue Widget Large', associate=self.associate)
+        self.gadget = Inventory.objects.create(label_id='LBL200', product_description='Red Gadget', associate=self.associate)
+
+    def test_search_matches_descriptions_and_labels(self):
+        self.assertEqual(self.backend.search('widget', limit=10), [self.widget.record_id])
+        self.assertEqual(self.backend.search('LBL200', limit=10)[0], self.gadget.record_id)
+        self.assertEqual(self.backend.search('sprocket', limit=10), [])
+
+    def test_search_candidates_come_from_the_trigram_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        with CaptureQueriesContext(connection) as queries:
+            self.backend.search('widget', limit=10)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + queries.captured_queries[-1]['sql'])
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('inventory_description_trgm_idx', plan)
+        self.assertIn('inventory_label_id_trgm_idx', plan)
+
+class BatchUpdateInventoryProductsViewTests(TestCase):
+    def setUp(self):
+        # Create a test associate and log in
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        self.items = [
+            Inventory.objects.create(
+                label_id='BATCH{:03d}'.format(i),
+                storage_location='A1',
+                quantity_on_pallet=10,
+                product_description='Batch Product {}'.format(i),
+                associate=self.associate
+            )
+            for i in range(3)
+        ]
+
+    def test_batch_update_locations_and_quantities_json(self):
+        updates = [
+            {'product_id': self.items[0].record_id, 'new_location': 'C1'},
+            {'product_id': self.items[1].record_id, 'new_location': 'C2'},
+            {'product_id': self.items[2].record_id, 'new_quantity': 25},
+            {'product_id': self.items[2].record_id, 'new_quantity': -5},
+            {'product_id': 9999, 'new_location': 'C3'},
+            {'product_id': self.items[0].record_id, 'new_location': 'TOOLONG'},
+        ]
+        resp = self.client.post('/batch-update-inventory-products/', json.dumps({'updates': updates}), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        summary = resp.json()
+        self.assertEqual(summary['updated'], 3)
+        self.assertEqual([error['index'] for error in summary['errors']], [3, 4, 5])
+        self.assertEqual(
+            list(Inventory.objects.filter(label_id__startswith='BATCH').order_by('record_id').values_list('storage_location', 'quantity_on_pallet')),
+            [('C1', 10), ('C2', 10), ('A1', 25)]
+        )
+        move = TransactionHistory.objects.get(inventory_item=self.items[1], action_name=TransactionHistory.Actions.MOVE_LOCATION)
+        self.assertEqual((move.previous_location, move.new_location), ('A1', 'C2'))
+        quantity = TransactionHistory.objects.get(inventory_item=self.items[2], action_name=TransactionHistory.Actions.EDIT_QUANTITY)
+        self.assertEqual((quantity.previous_quantity, quantity.new_quantity), (10, 25))
+
+    def test_batch_update_locations_form_post(self):
+        resp = self.client.post('/batch-update-inventory-products/', {
+            'product_id': [item.record_id for item in self.items],
+            'new_storage_location': ['D1', 'D2', 'D3'],
+        })
+        self.assertEqual(resp.json(), {'updated': 3, 'errors': []})
+        self.assertEqual(sorted(Inventory.objects.filter(label_id__startswith='BATCH').values_list('storage_location', flat=True)), ['D1', 'D2', 'D3'])
+
+    def test_batch_update_uses_fixed_number_of_queries(self):
+        from .views import Middleware
+        updates = [{'product_id': item.record_id, 'new_location': 'E1'} for item in self.items]
+        LocationSummary.objects.create(storage_location='E1')
+        # Savepoint, load, bulk update, history insert, one summary update per location touched and release,
+        # whatever the size of the batch
+        with self.assertNumQueries(7):
+            Middleware._batch_update_inventory_products(updates, self.associate)
+
 class ReadInventoryProductViewTests(TestCase):
     def setUp(self):
         # Create a test associate and log in
@@ -339,12 +1600,96 @@ class ReadInventoryProductViewTests(TestCase):
         self.assertContains(resp, 'Test Product')
         self.assertContains(resp, 'ITEM123')
 
+    def test_read_inventory_product_view_query_count_independent_of_history_length(self):
+        other_associate = Associate.objects.create(name='otherassociate', password='0therPass!')
+        self.inventory_item.update_location('B1', other_associate)
+        url = '/read-inventory-product/?q={}'.format(self.inventory_item.record_id)
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as short_history_queries:
+            self.client.get(url)
+        for i in range(30):
+            self.inventory_item.update_quantity(i, other_associate if i % 2 else self.associate)
+        with CaptureQueriesContext(connection) as long_history_queries:
+            resp = self.client.get(url)
+        self.assertContains(resp, 'otherassociate')
+        self.assertEqual(len(long_history_queries), len(short_history_queries))
+
+    @override_settings(TRANSACTION_HISTORY_PAGE_SIZE=2)
+    def test_read_inventory_product_view_history_pages(self):
+        for quantity in (10, 20, 30):
+            self.inventory_item.update_quantity(quantity, self.associate)
+        resp = self.client.get('/read-inventory-product/', {'q': self.inventory_item.record_id})
+        page = resp.context['transaction_history']
+        self.assertEqual([t.new_quantity for t in page], [30, 20])
+        self.assertContains(resp, 'Older Transactions')
+        resp = self.client.get('/read-inventory-product/', {'q': self.inventory_item.record_id, 'history_before': page.next_cursor})
+        page = resp.context['transaction_history']
+        self.assertEqual([t.new_quantity for t in page], [10, 50])
+        self.assertFalse(page.has_next)
+        self.assertContains(resp, 'Newest Transactions')
+
+    @override_settings(TRANSACTION_HISTORY_PAGE_SIZE=2)
+    def test_read_inventory_product_view_history_pages_follow_timestamps_not_record_ids(self):
+        for quantity in (10, 20, 30, 40):
+            self.inventory_item.update_quantity(quantity, self.associate)
+        # Written with timestamps out of record id order, like generated or late-committed history
+        now = timezone.now()
+        for new_quantity, minutes_ago in ((50, 50), (10, 10), (20, 40), (30, 20), (40, 30)):
+            TransactionHistory.objects.filter(inventory_item=self.inventory_item, new_quantity=new_quantity).update(timestamp=now - timedelta(minutes=minutes_ago))
+        seen = []
+        params = {'q': self.inventory_item.record_id}
+        while True:
+            page = self.client.get('/read-inventory-product/', params).context['transaction_history']
+            seen.extend(t.new_quantity for t in page)
+            if not page.has_next:
+                break
+            params['history_before'] = page.next_cursor
+        self.assertEqual(seen, [10, 30, 40, 20, 50])
+
     def test_read_inventory_product_view_get_not_found(self):
         resp = self.client.get('/read-inventory-product/', {'q': 9999})  # Assuming 9999 does not exist
         # Verify redirected to read inventory products page
         self.assertEqual(resp.status_code, 302)
         self.assertEqual(resp.url, '/read-inventory-products/')
 
+class ArchiveTransactionHistoryTests(TestCase):
+    def setUp(self):
+        # Create a test associate and log in
+        self.associate = Associate.objects.create(name='inventorymanager', password='Inv3nt0ry!', is_manager=True)
+        self.client.post('/login/', {'username': 'inventorymanager', 'password': 'Inv3nt0ry!'})
+        self.inventory_item = Inventory.objects.create(
+            label_id='ITEM123',
+            storage_location='A1',
+            quantity_on_pallet=50,
+            product_description='Test Product',
+            associate=self.associate
+        )
+        self.inventory_item.update_location('B2', self.associate)
+        self.inventory_item.update_quantity(40, self.associate)
+        # Age every record except the latest quantity change past the archive cutoff
+        TransactionHistory.objects.exclude(action_name=TransactionHistory.Actions.EDIT_QUANTITY).update(timestamp=timezone.now() - timedelta(days=100))
+
+    def test_archive_moves_old_records(self):
+        call_command('archive_transaction_history', older_than_days=90, stdout=StringIO())
+        # The creation record stays so the item's creation_record can find it
+        self.assertEqual(
+            sorted(TransactionHistory.objects.values_list('action_name', flat=True)),
+            [TransactionHistory.Actions.CREATED, TransactionHistory.Actions.EDIT_QUANTITY]
+        )
+        archived = ArchivedTransactionHistory.objects.get()
+        self.assertEqual(archived.action_name, TransactionHistory.Actions.MOVE_LOCATION)
+        self.assertEqual(archived.new_location, 'B2')
+        self.assertEqual(archived.performed_by, self.associate)
+
+    def test_read_inventory_product_view_reads_archive_on_demand(self):
+        call_command('archive_transaction_history', older_than_days=90, stdout=StringIO())
+        resp = self.client.get('/read-inventory-product/', {'q': self.inventory_item.record_id})
+        self.assertNotContains(resp, 'A1 -> B2')
+        self.assertContains(resp, 'Archived Transactions')
+        resp = self.client.get('/read-inventory-product/', {'q': self.inventory_item.record_id, 'archived': 1})
+        self.assertContains(resp, 'A1 -> B2')
+
 class UpdateInventoryProductQuantityOnPalletViewTests(TestCase):
     def setUp(self):
         # Create a test associate and log in
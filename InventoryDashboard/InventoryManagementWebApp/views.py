@@ -1,6 +1,11 @@
 from django.shortcuts import render
 from django.http import HttpResponse
 from django.http import QueryDict
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from django.db import transaction
+from asgiref.sync import sync_to_async
+import json
 # Create your views here.
 
 
@@ -8,8 +13,44 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from .models import Associate, Inventory, TransactionHistory
+from django.contrib.auth.views import redirect_to_login
+from functools import wraps
+from .models import Associate, Inventory, TransactionHistory, ArchivedTransactionHistory, LocationSummary, ProductSummary
 from .forms import *
+from .pagination import LIST_FIELDS, InventoryPage, InventoryRow, TransactionHistoryPage, get_page_size, get_cursor, inventory_rows
+from .search import get_search_backend
+from .bulk_import import import_inventory_manifest
+from .cache import get_inventory_cache, invalidate_inventory_items
+from .summaries import apply_stock_changes, stock_change
+from .middleware import aget_associate, get_associate
+from .export import CONTENT_TYPES, EXPORT_FORMATS, HISTORY_EXPORT_FIELDS, INVENTORY_EXPORT_FIELDS, export_lines, history_export_rows, inventory_export_rows
+from .instrumentation import get_request_metrics
+from django.conf import settings
+import io
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Number of products listed on the summary page; override with INVENTORY_SUMMARY_PRODUCTS in settings
+DEFAULT_SUMMARY_PRODUCTS = 50
+# Seconds the navigation and search form fragments of the update screens stay cached; override with INVENTORY_FRAGMENT_CACHE_TIMEOUT in settings
+DEFAULT_FRAGMENT_CACHE_TIMEOUT = 300
+# Value of the fragment form field asking an update screen for just the updated product's table row
+FRAGMENT_ROW = 'row'
+
+def async_login_required(view):
+    """Async version of login_required for the async screens.
+    Sets request.user to the signed in user, so rendering the screen does not load it again
+    synchronously, and resolves the signed in associate."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        await aget_associate(request)
+        return await view(request, *args, **kwargs)
+    return wrapper
 
 class Endpoints:
     def index(request):
@@ -37,15 +78,10 @@ class Endpoints:
             password = request.POST.get('password', '')
             user = authenticate(request, username=username, password=password)
             if user is not None:
+                # The session middleware saves the new session once the response is ready
                 login(request, user)
-                # Ensure session is persisted after login
-                request.session.save()
-                # Get the Associate object and mark as authenticated
-                associate = getattr(user, 'associate', None)
-                if associate:
-                    associate.authenticate(password)
-                    associate.save()
-                else:
+                # The session records that the associate is signed in, so nothing is written to the Associate
+                if getattr(user, 'associate', None) is None:
                     # Not a regular associate; redirect to admin site
                     return redirect('/admin/')
                 # Successful login -> take the user to SelectOperations screen
@@ -64,15 +100,8 @@ class Endpoints:
         """
         # Check if user already has a valid session
         if Endpoints.has_valid_session(request):
-            # User already logged in; log them out
+            # User already logged in; log them out, which also flushes the session
             logout(request)
-            # Invalidate the session
-            request.session.flush()
-            # Unauthenitcate the Associate object
-            associate = getattr(request.user, 'associate', None)
-            if associate:
-                associate.is_authenticated = False
-                associate.save()
         return redirect('login')
 
     @login_required
@@ -82,7 +111,7 @@ class Endpoints:
         Verifies the user has an active session before returning the page.
         Redirects to login_view if no valid session exists.
         """
-        return render(request, 'InventoryManagementWebApp/select_operations.html')
+        return Endpoints._render_cached_page(request, 'InventoryManagementWebApp/select_operations.html', {})
 
     @login_required
     def create_new_inventory_product(request):
@@ -91,7 +120,7 @@ class Endpoints:
         create_new_inventory_product_form = CreateInventoryProductForm()
         if request.method == 'POST':
             # Process form data here to create a new inventory product
-            result = Middleware._create_new_inventory_product(request.POST, request.user.associate)
+            result = Middleware._create_new_inventory_product(request.POST, get_associate(request))
             # If the creation was successful, redirect to select_operations; if not, re-render the form
             if result == 1:
                 # Return success message for the frontend to display in create_new_inventory_product.html
@@ -103,6 +132,25 @@ class Endpoints:
                 return render(request, "InventoryManagementWebApp/create_new_inventory_product.html", {'form': create_new_inventory_product_form}, status=200)
         return render(request, "InventoryManagementWebApp/create_new_inventory_product.html", {'form': create_new_inventory_product_form})
 
+    @login_required
+    def bulk_import_inventory_products(request):
+        """Create many inventory products at once from an uploaded CSV or JSON manifest.
+        If the method is a post request, import the manifest and display how many products were
+        created along with the errors of any rows that were rejected."""
+        if request.method == 'POST':
+            bulk_import_inventory_products_form = BulkImportInventoryProductsForm(request.POST, request.FILES)
+            if bulk_import_inventory_products_form.is_valid():
+                report = Middleware._bulk_import_inventory_products(
+                    request.FILES['manifest'], bulk_import_inventory_products_form.cleaned_data['manifest_format'], get_associate(request)
+                )
+                if report.created:
+                    messages.success(request, f"{report.created} inventory products created successfully.")
+                if report.errors:
+                    messages.error(request, f"{report.rejected} manifest rows could not be imported.")
+                return render(request, "InventoryManagementWebApp/bulk_import_inventory_products.html", {'form': BulkImportInventoryProductsForm(), 'report': report}, status=200)
+            messages.error(request, 'Failed to read the manifest. Please try again.')
+        return render(request, "InventoryManagementWebApp/bulk_import_inventory_products.html", {'form': BulkImportInventoryProductsForm()})
+
     @login_required
     def read_inventory_products(request):
         """Read existing inventory products.
@@ -110,7 +158,7 @@ class Endpoints:
         read_inventory_products_form = ReadInventoryProductsForm()
         if request.method == 'POST':
             # Process form data here to read inventory products
-            products = Middleware._read_inventory_products(request.POST, request.user.associate)
+            products = Middleware._read_inventory_products(request.POST, get_associate(request))
             if products is None or len(products) == 0:
                 # There are no products matching the criteria; re-render the form with a message
                 messages.info(request, 'No inventory products found matching the criteria.')
@@ -123,12 +171,13 @@ class Endpoints:
     @login_required
     def read_inventory_product(request):
         """Read a single existing inventory product.
-        Extract the product ID from the query parameters and display the product details."""
+        Extract the product ID from the query parameters and display the product details.
+        The transaction history is shown one page at a time, newest first; the history_before
+        query parameter selects the page of older transactions."""
         record_id = request.GET.get('q')
         if record_id:
             try:
-                product = Inventory.objects.get(record_id=int(record_id.strip()))
-                transaction_history = TransactionHistory.objects.filter(inventory_item=product).order_by('-timestamp')
+                product, transaction_history = Middleware._read_inventory_product(int(record_id.strip()), request.GET)
                 return render(request, "InventoryManagementWebApp/read_inventory_product.html", {'inventory_product': product, 'transaction_history': transaction_history})
             except Inventory.DoesNotExist:
                 messages.error(request, f'No inventory product found with Record ID: {record_id}.')
@@ -145,25 +194,28 @@ class Endpoints:
         if request.method == 'POST':
             if 'new_storage_location' in request.POST:
                 # This is a request to update the location
-                result = Middleware._update_inventory_product_location(request.POST, request.user.associate)
+                result = Middleware._update_inventory_product_location(request.POST, get_associate(request))
+                if request.POST.get('fragment') == FRAGMENT_ROW:
+                    return Endpoints._product_row_response(request, result, 'display_update_product_location_form',
+                                                           'Failed to update inventory product location. Please try again.')
                 # Get the products again to display
-                products = Middleware._read_inventory_products(request.POST, request.user.associate)
+                products = Middleware._read_inventory_products(request.POST, get_associate(request))
                 if result == 1:
                     messages.success(request, "Inventory product location updated successfully.")
                 else:
                     messages.error(request, 'Failed to update inventory product location. Please try again.')
-                return render(request, "InventoryManagementWebApp/update_inventory_product_location.html", {'form': read_inventory_products_form, 'inventory_products': products}, status=200)
+                return Endpoints._render_cached_page(request, "InventoryManagementWebApp/update_inventory_product_location.html", {'form': read_inventory_products_form, 'inventory_products': products}, status=200)
             else:
                 # This is a request to search for products to update
-                products = Middleware._read_inventory_products(request.POST, request.user.associate)
+                products = Middleware._read_inventory_products(request.POST, get_associate(request))
                 if products is None or len(products) == 0:
                     # There are no products matching the criteria; re-render the form with a message
                     messages.info(request, 'No inventory products found matching the criteria.')
-                    return render(request, "InventoryManagementWebApp/update_inventory_product_location.html", {'form': read_inventory_products_form}, status=200)
+                    return Endpoints._render_cached_page(request, "InventoryManagementWebApp/update_inventory_product_location.html", {'form': read_inventory_products_form}, status=200)
                 else:
                     # There are products matching the criteria; render them
-                    return render(request, "InventoryManagementWebApp/update_inventory_product_location.html", {'inventory_products': products, 'form': read_inventory_products_form}, status=200)
-        return render(request, "InventoryManagementWebApp/update_inventory_product_location.html", {'form': read_inventory_products_form})
+                    return Endpoints._render_cached_page(request, "InventoryManagementWebApp/update_inventory_product_location.html", {'inventory_products': products, 'form': read_inventory_products_form}, status=200)
+        return Endpoints._render_cached_page(request, "InventoryManagementWebApp/update_inventory_product_location.html", {'form': read_inventory_products_form})
 
     @login_required
     def update_inventory_product_quantity_on_pallet(request):
@@ -173,80 +225,395 @@ class Endpoints:
         If it is a request to update the quantity, it will process the form data to update the quantity."""
         read_inventory_products_form = ReadInventoryProductsForm()
         if request.method == 'POST':
-            if 'new_quantity' in request.POST:
-                # This is a request to update the location
-                result = Middleware._update_inventory_product_quantity_on_pallet(request.POST, request.user.associate)
+            if 'new_quantity' in request.POST or 'increase_quantity' in request.POST:
+                # This is a request to update the quantity
+                result = Middleware._update_inventory_product_quantity_on_pallet(request.POST, get_associate(request))
+                if request.POST.get('fragment') == FRAGMENT_ROW:
+                    return Endpoints._product_row_response(request, result, 'display_update_product_quantity_form',
+                                                           'Failed to update inventory product quantity. Please try again.')
                 # Get the products again to display
-                products = Middleware._read_inventory_products(request.POST, request.user.associate)
+                products = Middleware._read_inventory_products(request.POST, get_associate(request))
                 if result == 1:
                     messages.success(request, "Inventory product quantity updated successfully.")
                 else:
                     messages.error(request, 'Failed to update inventory product quantity. Please try again.')
-                return render(request, "InventoryManagementWebApp/update_inventory_product_quantity_on_pallet.html", {'form': read_inventory_products_form, 'inventory_products': products}, status=200)
+                return Endpoints._render_cached_page(request, "InventoryManagementWebApp/update_inventory_product_quantity_on_pallet.html", {'form': read_inventory_products_form, 'inventory_products': products}, status=200)
             else:
                 # This is a request to search for products to update
-                products = Middleware._read_inventory_products(request.POST, request.user.associate)
+                products = Middleware._read_inventory_products(request.POST, get_associate(request))
                 if products is None or len(products) == 0:
                     # There are no products matching the criteria; re-render the form with a message
                     messages.info(request, 'No inventory products found matching the criteria.')
-                    return render(request, "InventoryManagementWebApp/update_inventory_product_quantity_on_pallet.html", {'form': read_inventory_products_form}, status=200)
+                    return Endpoints._render_cached_page(request, "InventoryManagementWebApp/update_inventory_product_quantity_on_pallet.html", {'form': read_inventory_products_form}, status=200)
                 else:
                     # There are products matching the criteria; render them
-                    return render(request, "InventoryManagementWebApp/update_inventory_product_quantity_on_pallet.html", {'inventory_products': products, 'form': read_inventory_products_form}, status=200)
-        return render(request, "InventoryManagementWebApp/update_inventory_product_quantity_on_pallet.html", {'form': read_inventory_products_form})
+                    return Endpoints._render_cached_page(request, "InventoryManagementWebApp/update_inventory_product_quantity_on_pallet.html", {'inventory_products': products, 'form': read_inventory_products_form}, status=200)
+        return Endpoints._render_cached_page(request, "InventoryManagementWebApp/update_inventory_product_quantity_on_pallet.html", {'form': read_inventory_products_form})
+
+    def _render_cached_page(request, template_name, context, status=200):
+        """Render select_operations or an update screen. Their navigation, and the search form of the
+        update screens, are the same for every associate, so they are cached as template fragments
+        for INVENTORY_FRAGMENT_CACHE_TIMEOUT seconds."""
+        context['fragment_cache_timeout'] = getattr(settings, 'INVENTORY_FRAGMENT_CACHE_TIMEOUT', DEFAULT_FRAGMENT_CACHE_TIMEOUT)
+        return render(request, template_name, context, status=status)
+
+    def _product_row_response(request, result, row_action, error_message):
+        """Respond to an update sent with fragment=row with only the updated product's table row, which
+        the page swaps in place, instead of searching again and rendering the whole screen.
+        A failed update is answered with the error message as plain text and status 400."""
+        if result != 1:
+            return HttpResponse(error_message, status=400, content_type='text/plain; charset=utf-8')
+        # Read just the listed columns, like the search results the row is swapped into
+        product = inventory_rows(Inventory.objects.filter(record_id=int(request.POST.get('product_id').strip())))[0]
+        return render(request, "InventoryManagementWebApp/inventory_product_row.html", {'product': product, 'row_action': row_action})
+
+    @login_required
+    def batch_update_inventory_products(request):
+        """Move and adjust many inventory products in a single request.
+        Accepts a JSON body holding a list of updates, either directly or under "updates", where each
+        update has a product_id and a new_location or a new_quantity. Form posts may instead repeat
+        product_id alongside new_storage_location or new_quantity.
+        Responds with a JSON summary of the batch rather than re-rendering the search results."""
+        if request.method != 'POST':
+            return JsonResponse({'error': 'Batch updates must be sent as a POST request.'}, status=405)
+        if request.content_type == 'application/json':
+            try:
+                updates = json.loads(request.body)
+            except ValueError:
+                return JsonResponse({'error': 'The request body is not valid JSON.'}, status=400)
+            if isinstance(updates, dict):
+                updates = updates.get('updates')
+            if not isinstance(updates, list):
+                return JsonResponse({'error': 'Expected a list of updates.'}, status=400)
+        else:
+            product_ids = request.POST.getlist('product_id')
+            if 'new_storage_location' in request.POST:
+                updates = [{'product_id': product_id, 'new_location': new_location} for product_id, new_location in zip(product_ids, request.POST.getlist('new_storage_location'))]
+            else:
+                updates = [{'product_id': product_id, 'new_quantity': new_quantity} for product_id, new_quantity in zip(product_ids, request.POST.getlist('new_quantity'))]
+        summary = Middleware._batch_update_inventory_products(updates, get_associate(request))
+        return JsonResponse(summary, status=200)
+
+    @login_required
+    def inventory_cache_statistics(request):
+        """Report the hit, miss, eviction and invalidation counters of the inventory cache as JSON."""
+        inventory_cache = get_inventory_cache()
+        if inventory_cache is None:
+            return JsonResponse({'enabled': False}, status=200)
+        return JsonResponse({'enabled': True, **inventory_cache.statistics()}, status=200)
+
+    @login_required
+    def inventory_summary(request):
+        """Show the pallet and unit totals of the live inventory.
+        With a storage_location or product_description in the query, shows the totals of just that
+        location or product; otherwise lists every occupied location and the largest products."""
+        location_summaries, product_summaries = Middleware._read_inventory_summary(request.GET)
+        return render(request, "InventoryManagementWebApp/inventory_summary.html", {
+            'location_summaries': location_summaries,
+            'product_summaries': product_summaries,
+            'storage_location': request.GET.get('storage_location', ''),
+            'product_description': request.GET.get('product_description', ''),
+        })
+
+    @login_required
+    def export_inventory_products(request):
+        """Stream the inventory products matching the query as CSV or NDJSON.
+        Takes the same filters as the search form, as query parameters, plus format=csv or
+        format=ndjson; fuzzy search terms are ignored. Rows are streamed as they are read, so
+        the export never holds more than one chunk of rows in memory."""
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return JsonResponse({'error': f"Unsupported export format: {export_format}"}, status=400)
+        try:
+            products, _, _ = Middleware._filter_inventory_products(request.GET)
+        except ValueError:
+            return JsonResponse({'error': 'Product ID and quantity on pallet must be whole numbers.'}, status=400)
+        return Endpoints._export_response(export_format, INVENTORY_EXPORT_FIELDS, inventory_export_rows(products), 'inventory')
+
+    @login_required
+    def export_transaction_history(request):
+        """Stream the transaction history as CSV or NDJSON.
+        Accepts product_id, action_name, since and until (dates or datetimes) and archived as
+        query parameters, plus format=csv or format=ndjson."""
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return JsonResponse({'error': f"Unsupported export format: {export_format}"}, status=400)
+        try:
+            rows = history_export_rows(request.GET)
+        except ValueError as e:
+            return JsonResponse({'error': f"Invalid filter: {e}"}, status=400)
+        return Endpoints._export_response(export_format, HISTORY_EXPORT_FIELDS, rows, 'transaction_history')
+
+    def _export_response(export_format, fields, rows, name):
+        response = StreamingHttpResponse(export_lines(export_format, fields, rows), content_type=CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{name}.{export_format}"'
+        return response
+
+    def metrics(request):
+        """Serve the request metrics recorded by InstrumentationMiddleware in the Prometheus text format.
+        Left open for scrapers; the metrics hold view names and counters, but no SQL or data."""
+        return HttpResponse(get_request_metrics().prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    @login_required
+    def instrumentation_summary(request):
+        """Report per view statistics of the recent requests recorded by InstrumentationMiddleware as JSON,
+        with the slow and repeated queries flagged among them."""
+        return JsonResponse(get_request_metrics().summary(), status=200)
 
     @login_required
     def delete_inventory_product(request):
         """Delete an inventory product."""
         return render(request, "InventoryManagementWebApp/delete_inventory_product.html")
 
+class AsyncEndpoints:
+    """Async versions of the read and update screens the scanners use, served under /async/.
+
+    Served by an ASGI deployment, a scanner waiting on the database no longer holds a worker
+    thread. Searches and the updated row are read with the async ORM. Updates still run the
+    Middleware functions in a thread, because Django transactions are not available in async code."""
+
+    @async_login_required
+    async def read_inventory_products(request):
+        """Async version of Endpoints.read_inventory_products."""
+        read_inventory_products_form = ReadInventoryProductsForm()
+        if request.method == 'POST':
+            products = await Middleware._aread_inventory_products(request.POST, await aget_associate(request))
+            if not products:
+                messages.info(request, 'No inventory products found matching the criteria.')
+                return render(request, "InventoryManagementWebApp/read_inventory_products.html", {'form': read_inventory_products_form}, status=200)
+            return render(request, "InventoryManagementWebApp/read_inventory_products.html", {'inventory_products': products, 'form': read_inventory_products_form}, status=200)
+        return render(request, "InventoryManagementWebApp/read_inventory_products.html", {'form': read_inventory_products_form})
+
+    @async_login_required
+    async def update_inventory_product_location(request):
+        """Async version of Endpoints.update_inventory_product_location."""
+        if request.method == 'POST' and 'new_storage_location' in request.POST:
+            result = await sync_to_async(Middleware._update_inventory_product_location)(request.POST, await aget_associate(request))
+            return await AsyncEndpoints._update_response(request, result, "InventoryManagementWebApp/update_inventory_product_location.html",
+                                                         'display_update_product_location_form', "Inventory product location updated successfully.",
+                                                         'Failed to update inventory product location. Please try again.')
+        return await AsyncEndpoints._search_response(request, "InventoryManagementWebApp/update_inventory_product_location.html")
+
+    @async_login_required
+    async def update_inventory_product_quantity_on_pallet(request):
+        """Async version of Endpoints.update_inventory_product_quantity_on_pallet."""
+        if request.method == 'POST' and ('new_quantity' in request.POST or 'increase_quantity' in request.POST):
+            result = await sync_to_async(Middleware._update_inventory_product_quantity_on_pallet)(request.POST, await aget_associate(request))
+            return await AsyncEndpoints._update_response(request, result, "InventoryManagementWebApp/update_inventory_product_quantity_on_pallet.html",
+                                                         'display_update_product_quantity_form', "Inventory product quantity updated successfully.",
+                                                         'Failed to update inventory product quantity. Please try again.')
+        return await AsyncEndpoints._search_response(request, "InventoryManagementWebApp/update_inventory_product_quantity_on_pallet.html")
+
+    async def _search_response(request, template_name):
+        """Render an update screen, with the products matching the search if the method is a post request."""
+        read_inventory_products_form = ReadInventoryProductsForm()
+        if request.method != 'POST':
+            return Endpoints._render_cached_page(request, template_name, {'form': read_inventory_products_form})
+        products = await Middleware._aread_inventory_products(request.POST, await aget_associate(request))
+        if not products:
+            messages.info(request, 'No inventory products found matching the criteria.')
+            return Endpoints._render_cached_page(request, template_name, {'form': read_inventory_products_form}, status=200)
+        return Endpoints._render_cached_page(request, template_name, {'inventory_products': products, 'form': read_inventory_products_form}, status=200)
+
+    async def _update_response(request, result, template_name, row_action, success_message, error_message):
+        """Respond to an update like the sync screens: with just the updated row if fragment=row was sent,
+        otherwise with the screen searched again and the outcome as a message."""
+        if request.POST.get('fragment') == FRAGMENT_ROW:
+            if result != 1:
+                return HttpResponse(error_message, status=400, content_type='text/plain; charset=utf-8')
+            product = InventoryRow._make(await Inventory.objects.filter(
+                record_id=int(request.POST.get('product_id').strip())
+            ).values_list(*LIST_FIELDS).aget())
+            return render(request, "InventoryManagementWebApp/inventory_product_row.html", {'product': product, 'row_action': row_action})
+        products = await Middleware._aread_inventory_products(request.POST, await aget_associate(request))
+        if result == 1:
+            messages.success(request, success_message)
+        else:
+            messages.error(request, error_message)
+        return Endpoints._render_cached_page(request, template_name, {'form': ReadInventoryProductsForm(), 'inventory_products': products}, status=200)
+
 class Middleware:
     def _create_new_inventory_product(form_data:QueryDict, associate):
         """Create a new inventory product.
         Extracts data from the html form data and creates the product in the database.
         Returns 1 on success, 0 on failure."""
-        label_id = form_data.get('label_id').strip()
-        product_description = form_data.get('product_description').strip()
-        quantity_on_pallet = form_data.get('quantity_on_pallet').strip()
-        storage_location = form_data.get('storage_location').strip()
         try:
-            Inventory.objects.create(
-                label_id=label_id,
-                product_description=product_description,
-                quantity_on_pallet=int(quantity_on_pallet),
-                storage_location=storage_location,
-                associate=associate
-            )
+            Middleware._create_inventory_product(form_data, associate)
             return 1
         except Exception as e:
-            print(f"Error creating inventory product: {e}")
+            logger.warning("Error creating inventory product: %s", e)
             return 0
+
+    def _create_inventory_product(form_data, associate):
+        """Create a new inventory product from the form data and return it.
+        The product description is optional and defaults to blank.
+        Raises an exception if the product could not be created."""
+        label_id = form_data.get('label_id').strip()
+        product_description = form_data.get('product_description', '').strip()
+        quantity_on_pallet = form_data.get('quantity_on_pallet').strip()
+        storage_location = form_data.get('storage_location').strip()
+        return Inventory.objects.create(
+            label_id=label_id,
+            product_description=product_description,
+            quantity_on_pallet=int(quantity_on_pallet),
+            storage_location=storage_location,
+            associate=associate
+        )
         
+    def _bulk_import_inventory_products(manifest, manifest_format, associate):
+        """Create inventory products from an uploaded manifest file.
+        Decodes the upload as it is read and returns the ImportReport of the import."""
+        return import_inventory_manifest(io.TextIOWrapper(manifest, encoding='utf-8-sig', newline=''), manifest_format, associate)
+
     def _read_inventory_products(form_data:QueryDict, associate):
         """Read existing inventory products.
-        Returns a list of inventory products matching the criteria.
-        Extracts data from the html form data to filter the products."""
+        Returns one page of the inventory products matching the criteria, ordered by record id.
+        Extracts data from the html form data to filter the products, and reads the page size
+        and the after/before cursors from it to select the page.
+        Label ID and storage location are matched by prefix, case-sensitively, so the lookup can use
+        their indexes; a label marked as wholly scanned is matched exactly. Only the product description
+        is matched anywhere in the text.
+        If search terms are given, the page instead holds the best fuzzy matches, best first.
+        Only live items are searched unless the scheduled for deletion box is checked, in which case
+        only items scheduled for deletion are searched."""
+        products, cache_filters, search = Middleware._filter_inventory_products(form_data)
+        if search:
+            return Middleware._search_inventory_products(products, search, form_data)
+        inventory_cache = get_inventory_cache()
+        if inventory_cache is None:
+            return InventoryPage.from_queryset(products, form_data)
+        paging = Middleware._paging(form_data)
+        page = inventory_cache.get_search_page(cache_filters, paging)
+        if page is None:
+            page = InventoryPage.from_queryset(products, form_data)
+            inventory_cache.set_search_page(cache_filters, paging, page)
+        return page
+
+    async def _aread_inventory_products(form_data:QueryDict, associate):
+        """Async version of _read_inventory_products, reading the page with the async ORM.
+        Fuzzy searches still run in a thread, since the search backends are synchronous."""
+        products, cache_filters, search = Middleware._filter_inventory_products(form_data)
+        if search:
+            return await sync_to_async(Middleware._search_inventory_products)(products, search, form_data)
+        inventory_cache = get_inventory_cache()
+        if inventory_cache is None:
+            return await InventoryPage.afrom_queryset(products, form_data)
+        paging = Middleware._paging(form_data)
+        page = inventory_cache.get_search_page(cache_filters, paging)
+        if page is None:
+            page = await InventoryPage.afrom_queryset(products, form_data)
+            inventory_cache.set_search_page(cache_filters, paging, page)
+        return page
+
+    def _paging(form_data:QueryDict):
+        return {'after': get_cursor(form_data, 'after'), 'before': get_cursor(form_data, 'before'), 'page_size': get_page_size(form_data)}
+
+    def _filter_inventory_products(form_data:QueryDict):
+        """Build the queryset of the inventory products matching the search form data.
+        Returns the queryset, the normalized filters the inventory cache keys its pages on,
+        and the stripped search terms, if any."""
         record_id = form_data.get('product_id')
         label_id = form_data.get('label_id')
         storage_location = form_data.get('storage_location')
         quantity_on_pallet = form_data.get('quantity_on_pallet')
         product_description = form_data.get('product_description')
         scheduled_for_deletion = form_data.get('scheduled_for_deletion')
+        search = form_data.get('search')
         filters = {}
         if record_id:
             filters['record_id'] = int(record_id.strip())
-        if label_id:
-            filters['label_id__icontains'] = label_id.strip()
+        if label_id and form_data.get('exact_label_id'):
+            filters['label_id'] = label_id.strip()
+        elif label_id:
+            filters['label_id__startswith'] = label_id.strip()
         if storage_location:
-            filters['storage_location__icontains'] = storage_location.strip()
+            filters['storage_location__startswith'] = storage_location.strip()
         if quantity_on_pallet:
             filters['quantity_on_pallet'] = int(quantity_on_pallet.strip())
         if product_description:
             filters['product_description__icontains'] = product_description.strip()
+        query_filters = {}
+        for lookup, value in filters.items():
+            if lookup.endswith('__startswith'):
+                query_filters.update(Middleware._prefix_range(lookup[:-len('__startswith')], value))
+            else:
+                query_filters[lookup] = value
         if scheduled_for_deletion:
-            # If the checkbox is checked, filter for scheduled for deletion items with non-null deletion date
-            filters['scheduled_for_deletion__isnull'] = False
-        return Inventory.objects.filter(**filters)
+            # If the checkbox is checked, search the items scheduled for deletion instead of the live items
+            products = Inventory.pending_deletion.filter(**query_filters)
+        else:
+            products = Inventory.live_items.filter(**query_filters)
+        # Cache pages by the normalized search so equivalent searches share an entry
+        cache_filters = {**filters, 'scheduled_for_deletion__isnull': not scheduled_for_deletion}
+        return products, cache_filters, (search or '').strip()
+
+    def _prefix_range(field, prefix):
+        """Return the filters matching the values of a field that start with the prefix, case-sensitively.
+        The prefix is matched as the range field >= prefix AND field < the prefix with its last character
+        incremented, which a B-tree index on the field serves on every database; SQLite cannot use one
+        for the LIKE of startswith. startswith is kept to recheck the rows of the range, so collations
+        that do not order by code point still only match the prefix."""
+        filters = {f'{field}__gte': prefix, f'{field}__startswith': prefix}
+        following = ord(prefix[-1]) + 1
+        if following <= 0x10FFFF:
+            # Skip the surrogates, which are not characters
+            filters[f'{field}__lt'] = prefix[:-1] + chr(0xE000 if 0xD800 <= following < 0xE000 else following)
+        return filters
+
+    def _search_inventory_products(products, search, form_data:QueryDict):
+        """Rank inventory products by how well their label ID or description matches the search terms.
+        Returns a single page of the best matches among the given products, best match first.
+        Ranked results are not paged with cursors; refine the search terms to narrow them."""
+        page_size = get_page_size(form_data)
+        # Ask the backend for extra matches in case some are excluded by the other filters
+        ranked_ids = get_search_backend().search(search, limit=page_size * 10)
+        rank = {record_id: position for position, record_id in enumerate(ranked_ids)}
+        products = sorted(inventory_rows(products.filter(record_id__in=ranked_ids)), key=lambda product: rank[product.record_id])
+        search_parameters = [('search', search)] + [(name, form_data.get(name)) for name in InventoryPage.SEARCH_PARAMETERS if form_data.get(name)]
+        return InventoryPage(products[:page_size], page_size, search_parameters=search_parameters)
+
+    def _read_inventory_product(record_id, query_data:QueryDict):
+        """Read a single inventory product and one page of its transaction history.
+        The first page of an item's details is served from the inventory cache when possible.
+        Raises Inventory.DoesNotExist if there is no product with the record id."""
+        cacheable = not query_data.get('history_before') and not query_data.get('archived')
+        inventory_cache = get_inventory_cache() if cacheable else None
+        if inventory_cache is not None:
+            detail = inventory_cache.get_item_detail(record_id)
+            if detail is not None:
+                return detail
+        product = Inventory.objects.get(record_id=record_id)
+        detail = (product, Middleware._read_transaction_history(product, query_data))
+        if inventory_cache is not None:
+            inventory_cache.set_item_detail(record_id, detail)
+        return detail
+
+    async def _aread_inventory_product(record_id, query_data:QueryDict):
+        """Async version of _read_inventory_product, reading the product and its history with the async ORM."""
+        cacheable = not query_data.get('history_before') and not query_data.get('archived')
+        inventory_cache = get_inventory_cache() if cacheable else None
+        if inventory_cache is not None:
+            detail = inventory_cache.get_item_detail(record_id)
+            if detail is not None:
+                return detail
+        product = await Inventory.objects.aget(record_id=record_id)
+        transactions = Middleware._transaction_history_queryset(product, query_data)
+        detail = (product, await TransactionHistoryPage.afrom_queryset(transactions, query_data))
+        if inventory_cache is not None:
+            inventory_cache.set_item_detail(record_id, detail)
+        return detail
+
+    def _read_transaction_history(inventory_item, query_data:QueryDict):
+        """Read one page of the transaction history of an inventory product.
+        The associate who performed each transaction is fetched in the same query,
+        so the page costs a single query however long the history is.
+        If the archived query parameter is set, the page is read from the archived history instead."""
+        transactions = Middleware._transaction_history_queryset(inventory_item, query_data)
+        return TransactionHistoryPage.from_queryset(transactions, query_data)
+
+    def _transaction_history_queryset(inventory_item, query_data:QueryDict):
+        history_model = ArchivedTransactionHistory if query_data.get('archived') else TransactionHistory
+        return history_model.objects.filter(inventory_item=inventory_item).select_related('performed_by')
 
     def _update_inventory_product_location(form_data, associate):
         """Update location for an existing inventory product.
@@ -259,25 +626,131 @@ class Middleware:
             inventory_item.update_location(new_location.strip(), associate)
             return 1
         except Exception as e:
-            print(f"Error updating inventory product location: {e}")
+            logger.warning("Error updating inventory product location: %s", e)
             return 0
 
     def _update_inventory_product_quantity_on_pallet(form_data, associate):
         """Update quantity on pallet for an existing inventory product.
         Extracts data from the html form data to update the product quantity.
+        If increase_quantity is given instead of new_quantity, the quantity is adjusted by that amount,
+        which is safe against other associates adjusting the same pallet at the same time.
         Returns 1 on success, 0 on failure."""
         new_quantity = form_data.get('new_quantity')
+        increase_quantity = form_data.get('increase_quantity')
         product_id = form_data.get('product_id')
         try:
+            if not new_quantity and increase_quantity:
+                inventory_item = Inventory.objects.get(record_id=int(product_id.strip()))
+                inventory_item.adjust_quantity(int(increase_quantity.strip()), associate)
+                return 1
             if int(new_quantity.strip()) < 0:
                 raise ValueError("Quantity on pallet cannot be negative.")
             inventory_item = Inventory.objects.get(record_id=int(product_id.strip()))
             inventory_item.update_quantity(int(new_quantity.strip()), associate)
             return 1
         except Exception as e:
-            print(f"Error updating inventory product quantity: {e}")
+            logger.warning("Error updating inventory product quantity: %s", e)
             return 0
 
+    def _batch_update_inventory_products(updates, associate):
+        """Apply many location moves and quantity changes in one transaction.
+        Each update is a dictionary with a product_id and either a new_location or a new_quantity,
+        validated with the same rules as the single-product updates. The products are loaded with one
+        query, written back with one bulk update per changed column, and their transaction history is
+        recorded with one bulk insert. Invalid updates are skipped and reported.
+        Returns a summary with the number of updates applied and the errors of the rest."""
+        summary = {'updated': 0, 'errors': []}
+        changes = []
+        for index, update in enumerate(updates):
+            try:
+                if not isinstance(update, dict):
+                    raise ValueError("Update is not an object.")
+                product_id = int(str(update.get('product_id')).strip())
+                if update.get('new_location') is not None:
+                    form = UpdateInventoryProductLocationForm({'new_location': str(update['new_location']).strip()})
+                    if not form.is_valid():
+                        raise ValueError(' '.join(form.errors['new_location']))
+                    changes.append((index, product_id, 'storage_location', form.cleaned_data['new_location']))
+                elif update.get('new_quantity') is not None:
+                    form = UpdateInventoryProductQuantityForm({'new_quantity': str(update['new_quantity']).strip()})
+                    if not form.is_valid() or form.cleaned_data['new_quantity'] is None:
+                        raise ValueError(' '.join(form.errors.get('new_quantity', ["Enter a whole number."])))
+                    if form.cleaned_data['new_quantity'] < 0:
+                        raise ValueError("Quantity on pallet cannot be negative.")
+                    changes.append((index, product_id, 'quantity_on_pallet', form.cleaned_data['new_quantity']))
+                else:
+                    raise ValueError("Update needs a new_location or a new_quantity.")
+            except (TypeError, ValueError) as e:
+                product_id = update.get('product_id') if isinstance(update, dict) else None
+                summary['errors'].append({'index': index, 'product_id': product_id, 'error': str(e)})
+        with transaction.atomic():
+            inventory_items = Inventory.objects.select_for_update().in_bulk([product_id for _, product_id, _, _ in changes])
+            changed_fields = {'storage_location': {}, 'quantity_on_pallet': {}}
+            transaction_histories = []
+            stock_changes = []
+            for index, product_id, field, value in changes:
+                inventory_item = inventory_items.get(product_id)
+                if inventory_item is None:
+                    summary['errors'].append({'index': index, 'product_id': product_id, 'error': "Inventory product does not exist."})
+                    continue
+                if field == 'storage_location':
+                    transaction_histories.append(TransactionHistory(
+                        inventory_item=inventory_item,
+                        action_name=TransactionHistory.Actions.MOVE_LOCATION,
+                        performed_by=associate,
+                        previous_location=inventory_item.storage_location,
+                        new_location=value
+                    ))
+                else:
+                    transaction_histories.append(TransactionHistory(
+                        inventory_item=inventory_item,
+                        action_name=TransactionHistory.Actions.EDIT_QUANTITY,
+                        performed_by=associate,
+                        previous_quantity=inventory_item.quantity_on_pallet,
+                        new_quantity=value
+                    ))
+                if inventory_item.scheduled_for_deletion is None:
+                    stock_changes.append(stock_change(inventory_item.storage_location, inventory_item.product_description, inventory_item.quantity_on_pallet, -1))
+                setattr(inventory_item, field, value)
+                if inventory_item.scheduled_for_deletion is None:
+                    stock_changes.append(stock_change(inventory_item.storage_location, inventory_item.product_description, inventory_item.quantity_on_pallet))
+                changed_fields[field][product_id] = inventory_item
+            for field, changed_items in changed_fields.items():
+                if changed_items:
+                    Inventory.objects.bulk_update(changed_items.values(), [field])
+            TransactionHistory.objects.bulk_create(transaction_histories)
+            apply_stock_changes(stock_changes)
+            invalidate_inventory_items(record_id for changed_items in changed_fields.values() for record_id in changed_items)
+        summary['updated'] = len(transaction_histories)
+        summary['errors'].sort(key=lambda error: error['index'])
+        return summary
+
+    def _read_inventory_summary(query_data:QueryDict):
+        """Read the location and product summaries.
+        A storage_location or product_description in the query is looked up by primary key, so the
+        totals cost one indexed read however many items are in stock. Without either, returns every
+        occupied location and the INVENTORY_SUMMARY_PRODUCTS products with the most units."""
+        storage_location = (query_data.get('storage_location') or '').strip()
+        product_description = (query_data.get('product_description') or '').strip()
+        if storage_location or product_description:
+            location_summaries = list(LocationSummary.objects.filter(pk=storage_location, pallet_count__gt=0)) if storage_location else []
+            product_summaries = list(ProductSummary.objects.filter(pk=product_description, pallet_count__gt=0)) if product_description else []
+            return location_summaries, product_summaries
+        product_limit = getattr(settings, 'INVENTORY_SUMMARY_PRODUCTS', DEFAULT_SUMMARY_PRODUCTS)
+        location_summaries = list(LocationSummary.objects.filter(pallet_count__gt=0).order_by('storage_location'))
+        product_summaries = list(ProductSummary.objects.filter(pallet_count__gt=0).order_by('-total_units', 'product_description')[:product_limit])
+        return location_summaries, product_summaries
+
     def _delete_inventory_product(form_data, associate):
-        """Delete an inventory product."""
-        return render(request, "InventoryManagementWebApp/delete_inventory_product.html")
\ No newline at end of file
+        """Delete an inventory product.
+        Extracts the product ID from the form data and schedules the product for deletion.
+        Only managers can delete inventory products.
+        Returns 1 on success, 0 on failure."""
+        product_id = form_data.get('product_id')
+        try:
+            inventory_item = Inventory.objects.get(record_id=int(product_id.strip()))
+            inventory_item.delete(associate)
+            return 1
+        except Exception as e:
+            logger.warning("Error deleting inventory product: %s", e)
+            return 0
\ No newline at end of file
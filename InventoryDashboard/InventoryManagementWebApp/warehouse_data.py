@@ -0,0 +1,233 @@
+import random
+from array import array
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import reset_inventory_cache
+from .models import ArchivedTransactionHistory, Associate, Inventory, TransactionHistory
+from .search import reset_search_backend
+from .summaries import rebuild_summaries
+
+# Rows written per bulk insert and transaction while generating
+DEFAULT_GENERATE_BATCH_SIZE = 5000
+# Password of the generated associates, so load tests can sign in as them
+DEFAULT_ASSOCIATE_PASSWORD = 'Warehouse1!'
+
+# Vendor prefixes of the generated label IDs; label searches by prefix select one vendor's pallets
+LABEL_PREFIXES = ('ACME', 'BLUE', 'CORE', 'DELT', 'EAST', 'FORT', 'GRAN', 'HALO')
+BRANDS = ('Acme', 'Bluebird', 'Contoso', 'Delta', 'Evergreen', 'Fabrikam', 'Granite', 'Harbor', 'Ironwood', 'Juniper')
+PRODUCTS = ('Paper Towels', 'Dish Soap', 'Canned Beans', 'Bottled Water', 'Coffee Beans', 'Dog Food', 'Batteries',
+            'Light Bulbs', 'Trash Bags', 'Laundry Detergent', 'Rice', 'Olive Oil', 'Cereal', 'Napkins', 'Shampoo')
+SIZES = ('Small', 'Medium', 'Large', 'Family Size', 'Bulk', '6 Pack', '12 Pack', '24 Pack')
+
+
+class WarehouseReport:
+    """What generate_warehouse wrote."""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.items = 0
+        self.transactions = 0
+        self.associates = 0
+        # Record ids of the items given long transaction histories
+        self.long_history_items = []
+
+    def as_dict(self):
+        return {
+            'seed': self.seed,
+            'items': self.items,
+            'transactions': self.transactions,
+            'associates': self.associates,
+            'long_history_items': self.long_history_items,
+        }
+
+
+def _insert_history(history):
+    """Write TransactionHistory records with one INSERT statement run for each of them, in one transaction.
+    bulk_create would replace the timestamps they are given with the current time, since timestamp
+    is auto_now_add."""
+    fields = TransactionHistory._meta.concrete_fields
+    quote_name = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote_name(TransactionHistory._meta.db_table),
+        ', '.join(quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, [[field.get_db_prep_save(getattr(record, field.attname), connection) for field in fields] for record in history])
+        transaction.on_commit(TransactionHistory.objects.assign_feed_positions, robust=True)
+
+
+def _next_id(*models):
+    return max(model.objects.aggregate(last=Max('record_id'))['last'] or 0 for model in models) + 1
+
+
+def _create_associates(count, password):
+    """Create the generated associates that do not exist yet, with one password hash shared by all of them.
+    The first associate is a manager. Returns the ids of all the generated associates."""
+    names = [f'associate{number:04d}' for number in range(1, count + 1)]
+    existing = set(Associate.objects.filter(name__in=names).values_list('name', flat=True))
+    missing = [name for name in names if name not in existing]
+    if missing:
+        hashed_password = make_password(password)
+        with transaction.atomic():
+            users = User.objects.bulk_create([User(username=name, password=hashed_password) for name in missing])
+            Associate.objects.bulk_create([
+                Associate(name=user.username, password=password, django_user=user, is_manager=user.username == names[0])
+                for user in users
+            ])
+    associate_ids = dict(Associate.objects.filter(name__in=names).values_list('name', 'id'))
+    return [associate_ids[name] for name in names]
+
+
+def _simulate_events(rng, events, long_items, long_share, rows, locations, current_locations, current_quantities, associates):
+    """Yield the moves and quantity edits made after the items were created, oldest first, applying each
+    one to the current locations and quantities. The same random generator state yields the same events."""
+    for _ in range(events):
+        if long_items and rng.random() < long_share:
+            item = rng.choice(long_items)
+        else:
+            item = rng.randrange(rows)
+        performed_by = rng.choice(associates)
+        if rng.random() < 0.5:
+            previous = current_locations[item]
+            current_locations[item] = rng.randrange(len(locations))
+            yield item, TransactionHistory.Actions.MOVE_LOCATION, performed_by, locations[previous], locations[current_locations[item]]
+        else:
+            previous = current_quantities[item]
+            current_quantities[item] = rng.randint(0, 500)
+            yield item, TransactionHistory.Actions.EDIT_QUANTITY, performed_by, previous, current_quantities[item]
+
+
+def generate_warehouse(rows, seed=0, associates=20, history_per_item=3, long_histories=10, long_history_length=1000,
+                       deleted_fraction=0.01, days=365, password=DEFAULT_ASSOCIATE_PASSWORD,
+                       batch_size=DEFAULT_GENERATE_BATCH_SIZE):
+    """Fill the database with a synthetic warehouse of rows inventory items for benchmarks and load tests.
+
+    The same arguments and seed always produce the same data. Items are spread over vendors,
+    storage locations and a catalog of products scaled to the number of rows, and each has on
+    average history_per_item transactions: its creation, then moves and quantity edits made by
+    randomly chosen associates over the last days. long_histories items get about
+    long_history_length extra transactions each, and deleted_fraction of the items are scheduled
+    for deletion. Transaction timestamps grow with record ids, as the history pages expect.
+
+    Rows are written with bulk inserts of batch_size rows, one transaction per batch, using
+    explicit record ids that follow the rows already in the tables. The location and product
+    summaries are rebuilt afterwards, and the search index and inventory cache are reset.
+    Returns a WarehouseReport."""
+    rng = random.Random(seed)
+    report = WarehouseReport(seed)
+    associate_ids = _create_associates(associates, password)
+    report.associates = len(associate_ids)
+
+    locations = [f'{aisle}{bay:03d}' for aisle in 'ABCDEFGHJKLMNPQRSTUVWXYZ' for bay in range(1, 1000)]
+    locations = ['HOLD'] + locations[:max(20, min(len(locations), rows // 20))]
+    descriptions = [f'{brand} {product} {size}' for brand in BRANDS for product in PRODUCTS for size in SIZES]
+    rng.shuffle(descriptions)
+    descriptions = descriptions[:max(10, min(len(descriptions), rows // 50))]
+
+    # The state of every item is kept in compact arrays so millions of rows fit in memory
+    prefixes = array('B', (rng.randrange(len(LABEL_PREFIXES)) for _ in range(rows)))
+    products = array('I', (rng.randrange(len(descriptions)) for _ in range(rows)))
+    initial_locations = array('I', (rng.randrange(len(locations)) for _ in range(rows)))
+    # Some pallets keep the placeholder quantity they were created with
+    initial_quantities = array('i', (-100 if rng.random() < 0.05 else rng.randint(1, 500) for _ in range(rows)))
+    deleted = [item for item in range(rows) if rng.random() < deleted_fraction]
+    long_items = rng.sample(range(rows), min(long_histories, rows))
+    events = rows * max(history_per_item - 1, 0) + len(long_items) * long_history_length
+    long_share = len(long_items) * long_history_length / events if events else 0
+    events_seed = rng.getrandbits(64)
+
+    # Play the events once to learn where every item ends up
+    final_locations = array('I', initial_locations)
+    final_quantities = array('i', initial_quantities)
+    for _ in _simulate_events(random.Random(events_seed), events, long_items, long_share, rows, locations,
+                              final_locations, final_quantities, associate_ids):
+        pass
+
+    first_item_id = _next_id(Inventory)
+    first_history_id = _next_id(TransactionHistory, ArchivedTransactionHistory)
+    # Items are created over the first half of the period, and moved and edited over the rest of it
+    now = timezone.now()
+    start = now - timedelta(days=days)
+    period = now - start
+    # Deletions come last, within the deletion wait so the purge leaves them
+    deleted_dates = {item: now - period * 0.01 * (len(deleted) - position) / (len(deleted) + 1) for position, item in enumerate(deleted)}
+    report.long_history_items = [first_item_id + item for item in long_items]
+
+    for batch_start in range(0, rows, batch_size):
+        batch = range(batch_start, min(batch_start + batch_size, rows))
+        with transaction.atomic():
+            Inventory.objects.bulk_create([
+                Inventory(
+                    record_id=first_item_id + item,
+                    label_id=f'{LABEL_PREFIXES[prefixes[item]]}{first_item_id + item:09d}',
+                    storage_location=locations[final_locations[item]],
+                    quantity_on_pallet=final_quantities[item],
+                    product_description=descriptions[products[item]],
+                    scheduled_for_deletion=deleted_dates.get(item),
+                )
+                for item in batch
+            ], batch_size=batch_size)
+            _insert_history([
+                TransactionHistory(
+                    record_id=first_history_id + item,
+                    inventory_item_id=first_item_id + item,
+                    action_name=TransactionHistory.Actions.CREATED,
+                    timestamp=start + period * 0.5 * item / rows,
+                    performed_by_id=rng.choice(associate_ids),
+                    new_quantity=initial_quantities[item],
+                    new_location=locations[initial_locations[item]],
+                )
+                for item in batch
+            ])
+    report.items = rows
+
+    # Play the events again from the start, now writing them
+    current_locations = array('I', initial_locations)
+    current_quantities = array('i', initial_quantities)
+    history_id = first_history_id + rows
+    history = []
+    for number, (item, action, performed_by, previous, new) in enumerate(_simulate_events(
+            random.Random(events_seed), events, long_items, long_share, rows, locations,
+            current_locations, current_quantities, associate_ids)):
+        values = ({'previous_location': previous, 'new_location': new} if action == TransactionHistory.Actions.MOVE_LOCATION
+                  else {'previous_quantity': previous, 'new_quantity': new})
+        history.append(TransactionHistory(
+            record_id=history_id,
+            inventory_item_id=first_item_id + item,
+            action_name=action,
+            timestamp=start + period * (0.5 + 0.49 * number / events),
+            performed_by_id=performed_by,
+            **values,
+        ))
+        history_id += 1
+        if len(history) >= batch_size:
+            _insert_history(history)
+            history = []
+    for item in deleted:
+        history.append(TransactionHistory(
+            record_id=history_id,
+            inventory_item_id=first_item_id + item,
+            action_name=TransactionHistory.Actions.DELETED,
+            timestamp=deleted_dates[item],
+            performed_by_id=associate_ids[0],
+        ))
+        history_id += 1
+    _insert_history(history)
+    report.transactions = history_id - first_history_id
+
+    # Move the id sequences past the explicit ids; SQLite tracks them by itself
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Inventory, TransactionHistory]):
+            cursor.execute(sql)
+    rebuild_summaries()
+    reset_search_backend()
+    reset_inventory_cache()
+    return report